@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Lamp, LampType, UserProfile, Cart, CartItem, Order
+from .models import Lamp, LampType, UserProfile, Cart, CartItem, Order, OrderItem
 
 @admin.register(LampType)
 class LampTypeAdmin(admin.ModelAdmin):
@@ -28,8 +28,16 @@ class CartItemAdmin(admin.ModelAdmin):
     list_display = ('cart', 'lamp', 'quantity')
     search_fields = ('cart__user__username', 'lamp__article')
 
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    can_delete = False
+    readonly_fields = ('lamp', 'article', 'brand', 'quantity', 'price_tier', 'unit_price', 'line_total')
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ('cart', 'sales_manager', 'status', 'created_at')
+    list_display = ('cart', 'sales_manager', 'status', 'total', 'created_at')
+    readonly_fields = ('subtotal', 'discount', 'total')
+    inlines = [OrderItemInline]
     list_filter = ('status',)
     search_fields = ('cart__user__username', 'sales_manager__username')
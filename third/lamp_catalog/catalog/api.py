@@ -0,0 +1,121 @@
+import json
+import re
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from .filters import parse_power
+
+try:
+    import brotli
+except ImportError:  # Сжатие brotli необязательно: без пакета ответы сжимаются gzip
+    brotli = None
+
+# Поля, доступные в API (?fields=article,price); id возвращается всегда
+API_FIELDS = [
+    'id', 'article', 'brand', 'lamp_type', 'has_dimmer', 'power_watts', 'height_cm', 'color',
+    'price', 'small_wholesale_price', 'small_wholesale_quantity',
+    'large_wholesale_price', 'large_wholesale_quantity', 'description', 'updated_at',
+]
+# По умолчанию описание не отдается - это самое объемное поле
+DEFAULT_API_FIELDS = [field for field in API_FIELDS if field != 'description']
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# Меньшие ответы не сжимаются: заголовки и накладные расходы больше выигрыша
+MIN_COMPRESS_LENGTH = 200
+
+# Значения has_dimmer, включающие фильтр "только с диммером"
+DIMMER_VALUES = ('1', 'true')
+
+ACCEPT_BROTLI = re.compile(r'\bbr\b')
+ACCEPT_GZIP = re.compile(r'\bgzip\b')
+
+
+class ApiError(Exception):
+    pass
+
+
+def parse_fields(value):
+    """Список полей из параметра fields; пустое значение - поля по умолчанию"""
+    if not value:
+        return list(DEFAULT_API_FIELDS)
+    fields = ['id']
+    for field in value.split(','):
+        field = field.strip()
+        if field not in API_FIELDS:
+            raise ApiError(f'Неизвестное поле: {field}')
+        if field not in fields:
+            fields.append(field)
+    return fields
+
+
+def parse_limit(value):
+    if not value:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ApiError(f'limit должен быть от 1 до {MAX_LIMIT}')
+    return limit
+
+
+def parse_filters(params):
+    """Проверяет числовые и логические фильтры списка (см. catalog.filters.filter_lamps)"""
+    for name in ('min_power', 'max_power'):
+        if params.get(name):
+            try:
+                parse_power(params[name])
+            except ValueError:
+                raise ApiError(f'{name} должен быть целым неотрицательным числом')
+    has_dimmer = params.get('has_dimmer')
+    if has_dimmer and has_dimmer.lower() not in DIMMER_VALUES:
+        raise ApiError(f'has_dimmer может быть только {" или ".join(DIMMER_VALUES)}')
+
+
+def dumps(data):
+    """Компактный JSON: без пробелов, Decimal - строкой, чтобы не терять копейки"""
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def compress_response(request, response):
+    """Сжимает ответ brotli (если установлен пакет и клиент его принимает) или gzip"""
+    if response.streaming or response.has_header('Content-Encoding') \
+            or len(response.content) < MIN_COMPRESS_LENGTH:
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if brotli is not None and ACCEPT_BROTLI.search(accept_encoding):
+        content, encoding = brotli.compress(response.content, quality=5), 'br'
+    elif ACCEPT_GZIP.search(accept_encoding):
+        content, encoding = compress_string(response.content), 'gzip'
+    else:
+        return response
+    if len(content) >= len(response.content):
+        return response
+    response.content = content
+    response['Content-Length'] = str(len(content))
+    response['Content-Encoding'] = encoding
+    # Сжатое тело отличается побайтно: строгий ETag становится слабым, как в GZipMiddleware
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
+
+
+def compress(view):
+    """Декоратор представления (синхронного или асинхронного): сжатие ответа по Accept-Encoding"""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            return compress_response(request, await view(request, *args, **kwargs))
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        return compress_response(request, view(request, *args, **kwargs))
+    return wrapper
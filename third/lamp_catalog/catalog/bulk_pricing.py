@@ -0,0 +1,127 @@
+from dataclasses import dataclass
+from decimal import Decimal
+
+import numpy as np
+
+from .models import Lamp
+
+# Коды уровней цены совпадают с порядком Lamp.PRICE_TIER_CHOICES
+TIERS = [tier for tier, label in Lamp.PRICE_TIER_CHOICES]
+RETAIL, SMALL_WHOLESALE, LARGE_WHOLESALE = range(3)
+
+# Суммы считаются в копейках в int64; дальше этой границы возможно переполнение
+MAX_CENTS = 2 ** 62
+
+
+def to_cents(value):
+    """Decimal с двумя знаками после запятой -> целое число копеек, без потери точности"""
+    if value is None:
+        return 0
+    cents = value.scaleb(2)
+    if cents != cents.to_integral_value():
+        raise ValueError(f'Цена {value} содержит доли копейки')
+    return int(cents)
+
+
+def from_cents(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+@dataclass
+class BulkQuote:
+    """Результат пакетного расчета. Все денежные массивы - в копейках."""
+    lamp_ids: np.ndarray
+    quantities: np.ndarray
+    tier_codes: np.ndarray
+    unit_cents: np.ndarray
+    line_cents: np.ndarray
+
+    def __len__(self):
+        return len(self.lamp_ids)
+
+    def tiers(self):
+        return [TIERS[code] for code in self.tier_codes]
+
+    def unit_prices(self):
+        return [from_cents(cents) for cents in self.unit_cents]
+
+    def line_totals(self):
+        return [from_cents(cents) for cents in self.line_cents]
+
+    def total(self):
+        return from_cents(sum(int(cents) for cents in self.line_cents))
+
+
+class PriceTable:
+    """
+    Таблица цен ламп в виде массивов NumPy для пакетного расчета цен.
+    Повторяет правила Lamp.get_price_tier: оптовый уровень действует, только если
+    и цена, и пороговое количество заданы и не равны нулю; крупный опт важнее мелкого.
+    Цены хранятся в целых копейках, поэтому результат совпадает с Decimal-расчетом точно.
+    """
+
+    fields = ('id', 'price', 'small_wholesale_price', 'small_wholesale_quantity',
+              'large_wholesale_price', 'large_wholesale_quantity')
+
+    def __init__(self, rows):
+        rows = sorted(rows, key=lambda row: row[0])
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.price = np.array([to_cents(row[1]) for row in rows], dtype=np.int64)
+        self.small_price = np.array([to_cents(row[2]) for row in rows], dtype=np.int64)
+        self.small_quantity = np.array([row[3] or 0 for row in rows], dtype=np.int64)
+        self.large_price = np.array([to_cents(row[4]) for row in rows], dtype=np.int64)
+        self.large_quantity = np.array([row[5] or 0 for row in rows], dtype=np.int64)
+        # Пустые и нулевые значения отключают уровень, как и в get_price_tier
+        self.small_enabled = (self.small_price != 0) & (self.small_quantity != 0)
+        self.large_enabled = (self.large_price != 0) & (self.large_quantity != 0)
+        self.max_price = int(np.abs(np.concatenate([self.price, self.small_price, self.large_price])).max(initial=0))
+
+    @classmethod
+    def load(cls, queryset=None):
+        """Загружает цены одним запросом; по умолчанию - для всех ламп"""
+        if queryset is None:
+            queryset = Lamp.objects.all()
+        return cls(queryset.order_by().values_list(*cls.fields))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def positions(self, lamp_ids):
+        """Индексы строк таблицы для переданных id; отсутствующие id - ошибка"""
+        positions = np.searchsorted(self.ids, lamp_ids)
+        positions = np.minimum(positions, max(len(self.ids) - 1, 0))
+        found = self.ids[positions] == lamp_ids if len(self.ids) else np.zeros(len(lamp_ids), dtype=bool)
+        if not found.all():
+            missing = sorted(set(lamp_ids[~found].tolist()))
+            raise Lamp.DoesNotExist(f'Нет цен для ламп: {missing}')
+        return positions
+
+    def quote(self, lamp_ids, quantities):
+        """
+        Рассчитывает цены для пар (лампа, количество).
+        lamp_ids и quantities - последовательности одинаковой длины, id могут повторяться.
+        """
+        lamp_ids = np.asarray(lamp_ids, dtype=np.int64)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        if lamp_ids.shape != quantities.shape or lamp_ids.ndim != 1:
+            raise ValueError('lamp_ids и quantities должны быть одномерными и одной длины')
+        if len(quantities) and int(np.abs(quantities).max()) * self.max_price >= MAX_CENTS:
+            raise ValueError('Количество слишком велико для расчета в копейках')
+
+        rows = self.positions(lamp_ids)
+        large = self.large_enabled[rows] & (quantities >= self.large_quantity[rows])
+        small = ~large & self.small_enabled[rows] & (quantities >= self.small_quantity[rows])
+
+        tier_codes = np.select([large, small], [LARGE_WHOLESALE, SMALL_WHOLESALE], RETAIL)
+        unit_cents = np.select(
+            [large, small],
+            [self.large_price[rows], self.small_price[rows]],
+            self.price[rows],
+        )
+        return BulkQuote(lamp_ids, quantities, tier_codes, unit_cents, unit_cents * quantities)
+
+
+def quote_prices(lamp_ids, quantities):
+    """Загружает цены только нужных ламп и рассчитывает их одним проходом"""
+    table = PriceTable.load(Lamp.objects.filter(id__in=set(lamp_ids)))
+    return table.quote(lamp_ids, quantities)
@@ -0,0 +1,151 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Версия каталога входит во все ключи: при изменении ламп она увеличивается,
+# и старые записи перестают читаться (и вытесняются по таймауту)
+VERSION_KEY = 'catalog:version'
+METRICS_KEY = 'catalog:metrics:{name}:{result}'
+LAMP_KEY = 'catalog:lamp:v{version}:{pk}'
+DEFAULT_TIMEOUT = 300
+
+# Параметры списка, влияющие на результат; остальные (utm-метки и т.п.) в ключ не входят
+LIST_PARAMS = [
+    'lamp_type', 'has_dimmer', 'min_power', 'max_power', 'brand', 'color', 'search',
+    'sort_by', 'sort_order', 'group_by', 'pagination', 'page', 'cursor',
+]
+EMPTY_SIGNIFICANT = {'sort_by'}
+# Счетчики попаданий: страницы, выборки id, карточки ламп, счетчики фильтров, ответы API
+METRIC_NAMES = ('page', 'ids', 'lamp', 'facets', 'api')
+
+
+def get_timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def get_catalog_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+async def aget_catalog_version():
+    """Асинхронный вариант get_catalog_version() для асинхронных представлений"""
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, 1, None)
+        version = await cache.aget(VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version():
+    """Инвалидирует все закэшированные страницы и выборки каталога"""
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, None)
+        return cache.incr(VERSION_KEY)
+
+
+def normalize_params(params, names=LIST_PARAMS):
+    """
+    Приводит GET-параметры к каноническому виду: только значимые параметры в фиксированном порядке,
+    пустые значения отбрасываются там, где представление трактует их как отсутствующие.
+    Сами значения не меняются, чтобы разные запросы не получили одну запись кэша.
+    """
+    normalized = []
+    for name in names:
+        if name not in params:
+            continue
+        value = params.get(name)
+        # Пустой sort_by отличается от отсутствующего: сортировка по умолчанию не применяется
+        if value or name in EMPTY_SIGNIFICANT:
+            normalized.append((name, value))
+    return normalized
+
+
+def _params_digest(params):
+    return hashlib.md5(urlencode(normalize_params(params)).encode()).hexdigest()
+
+
+def make_key(prefix, params):
+    return f'catalog:{prefix}:v{get_catalog_version()}:{_params_digest(params)}'
+
+
+async def amake_key(prefix, params):
+    return f'catalog:{prefix}:v{await aget_catalog_version()}:{_params_digest(params)}'
+
+
+def get_lamp(pk):
+    """
+    Лампа из кэша по первичному ключу; при промахе - один запрос.
+    Запись удаляется при сохранении лампы и устаревает при смене версии каталога.
+    """
+    from .models import Lamp
+
+    key = LAMP_KEY.format(version=get_catalog_version(), pk=pk)
+    lamp = cache.get(key)
+    record('lamp', lamp is not None)
+    if lamp is None:
+        lamp = Lamp.objects.filter(pk=pk).first()
+        if lamp is not None:
+            cache.set(key, lamp, get_timeout())
+    return lamp
+
+
+async def aget_lamp(pk):
+    """Асинхронный вариант get_lamp() с той же записью кэша"""
+    from .models import Lamp
+
+    key = LAMP_KEY.format(version=await aget_catalog_version(), pk=pk)
+    lamp = await cache.aget(key)
+    await arecord('lamp', lamp is not None)
+    if lamp is None:
+        lamp = await Lamp.objects.filter(pk=pk).afirst()
+        if lamp is not None:
+            await cache.aset(key, lamp, get_timeout())
+    return lamp
+
+
+def forget_lamp(pk):
+    cache.delete(LAMP_KEY.format(version=get_catalog_version(), pk=pk))
+
+
+def record(name, hit):
+    """Счетчики попаданий и промахов хранятся в кэше и общие для всех процессов"""
+    key = METRICS_KEY.format(name=name, result='hits' if hit else 'misses')
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, None)
+
+
+async def arecord(name, hit):
+    key = METRICS_KEY.format(name=name, result='hits' if hit else 'misses')
+    if not await cache.aadd(key, 1, None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aadd(key, 1, None)
+
+
+def get_metrics(names=METRIC_NAMES):
+    metrics = {}
+    for name in names:
+        hits = cache.get(METRICS_KEY.format(name=name, result='hits'), 0)
+        misses = cache.get(METRICS_KEY.format(name=name, result='misses'), 0)
+        total = hits + misses
+        metrics[name] = {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else 0.0}
+    return metrics
+
+
+def reset_metrics(names=METRIC_NAMES):
+    cache.delete_many([
+        METRICS_KEY.format(name=name, result=result)
+        for name in names for result in ('hits', 'misses')
+    ])
@@ -0,0 +1,174 @@
+import csv
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from .filters import filter_lamps
+from .models import Lamp
+
+# Колонки экспорта: поле модели и заголовок
+EXPORT_COLUMNS = [
+    ('article', 'Артикул'),
+    ('brand', 'Марка'),
+    ('lamp_type', 'Тип'),
+    ('has_dimmer', 'Диммер'),
+    ('power_watts', 'Мощность, Вт'),
+    ('height_cm', 'Высота, см'),
+    ('color', 'Цвет'),
+    ('price', 'Цена за единицу'),
+    ('small_wholesale_price', 'Цена мелкого опта'),
+    ('small_wholesale_quantity', 'Мелкий опт от, шт.'),
+    ('large_wholesale_price', 'Цена крупного опта'),
+    ('large_wholesale_quantity', 'Крупный опт от, шт.'),
+    ('description', 'Описание'),
+]
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+DEFAULT_CHUNK_SIZE = 2000
+# Управляющие символы, недопустимые в XML
+XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def export_rows(params, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Строки экспорта с фильтрами каталога. Лампы читаются кортежами порциями по chunk_size,
+    без создания объектов модели, поэтому память не растет с размером каталога.
+    """
+    queryset = filter_lamps(Lamp.objects.all(), params, rank=False).order_by('id')
+    fields = [field for field, header in EXPORT_COLUMNS]
+    return queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'да' if value else 'нет'
+    return value
+
+
+class _Echo:
+    """Файлоподобный объект, возвращающий записанное вместо хранения"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    # BOM - чтобы Excel открыл UTF-8 с кириллицей без мастера импорта
+    yield '\ufeff' + writer.writerow([header for field, header in EXPORT_COLUMNS])
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+class _ZipStream:
+    """
+    Неперемещаемый поток для zipfile: записанные байты забираются генератором.
+    zipfile в этом случае пишет размеры после данных файла (data descriptor).
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return b''.join(chunks)
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Лампы" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        value = 'да' if value else 'нет'
+    if isinstance(value, (int, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(XML_ILLEGAL.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def iter_xlsx(rows, flush_rows=500):
+    """
+    Потоковая запись XLSX без сторонних библиотек: лист пишется построчно в zip,
+    сжатые данные отдаются каждые flush_rows строк. Строки хранятся как inline-строки,
+    поэтому таблица общих строк (и память под нее) не нужна.
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        yield stream.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _xlsx_row([header for field, header in EXPORT_COLUMNS])
+            ).encode())
+            for index, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(row).encode())
+                if index % flush_rows == 0:
+                    yield stream.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield stream.drain()
+
+
+def iter_export(export_format, rows):
+    """Содержимое файла экспорта порциями; CSV - строками, XLSX - байтами"""
+    if export_format == 'csv':
+        return iter_csv(rows)
+    if export_format == 'xlsx':
+        return iter_xlsx(rows)
+    raise ValueError(f'Неизвестный формат экспорта: {export_format}')
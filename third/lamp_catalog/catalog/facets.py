@@ -0,0 +1,145 @@
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, F, Value, When
+
+from . import cache as catalog_cache
+from .filters import FILTER_PARAMS, filter_lamps
+from .models import Lamp
+
+# Диапазоны мощности: (от, до) включительно, как фильтры min_power и max_power
+POWER_BUCKETS = [(None, 39), (40, 59), (60, 99), (100, 199), (200, None)]
+# Сколько марок и цветов показывать (самые частые)
+FACET_LIMIT = 30
+
+# Фасет и параметры фильтра, которые при его подсчете не применяются:
+# количество для варианта показывает, сколько ламп будет найдено, если его выбрать
+FACET_EXCLUDES = {
+    'lamp_type': {'lamp_type'},
+    'has_dimmer': {'has_dimmer'},
+    'brand': {'brand'},
+    'color': {'color'},
+    'power': {'min_power', 'max_power'},
+}
+
+
+def _power_bucket():
+    return Case(
+        *[
+            When(
+                **({'power_watts__gte': low} if low is not None else {}),
+                **({'power_watts__lte': high} if high is not None else {}),
+                then=Value(str(index)),
+            )
+            for index, (low, high) in enumerate(POWER_BUCKETS)
+        ],
+        output_field=CharField(),
+    )
+
+
+def _facet_values():
+    return {
+        'lamp_type': F('lamp_type'),
+        'has_dimmer': Case(When(has_dimmer=True, then=Value('1')), default=Value('0'), output_field=CharField()),
+        'brand': F('brand'),
+        'color': F('color'),
+        'power': _power_bucket(),
+    }
+
+
+def facet_queryset(params):
+    """
+    Один запрос (UNION ALL группировок) с количеством ламп для каждого варианта каждого фасета.
+    Каждая группировка считается по выборке с фильтрами, кроме фильтров самого фасета.
+    """
+    querysets = []
+    for name, value in _facet_values().items():
+        facet_params = {
+            param: params.get(param) for param in FILTER_PARAMS
+            if param not in FACET_EXCLUDES[name]
+        }
+        querysets.append(
+            filter_lamps(Lamp.objects.all(), facet_params, rank=False)
+            .order_by()
+            .annotate(facet=Value(name, output_field=CharField()), value=value)
+            .values('facet', 'value')
+            .annotate(count=Count('id'))
+            .values_list('facet', 'value', 'count')
+        )
+    return querysets[0].union(*querysets[1:], all=True)
+
+
+def _facet_params(params):
+    return {param: params.get(param) for param in FILTER_PARAMS}
+
+
+def _collect_counts(rows):
+    counts = {name: {} for name in FACET_EXCLUDES}
+    for facet, value, count in rows:
+        counts[facet][value] = count
+    return counts
+
+
+def get_facet_counts(params):
+    """
+    Количество ламп по вариантам фильтров: {фасет: {значение: количество}}.
+    Кэшируется по параметрам фильтров и версии каталога.
+    """
+    key = catalog_cache.make_key('facets', _facet_params(params))
+    counts = cache.get(key)
+    catalog_cache.record('facets', counts is not None)
+    if counts is None:
+        counts = _collect_counts(facet_queryset(params))
+        cache.set(key, counts, catalog_cache.get_timeout())
+    return counts
+
+
+async def aget_facet_counts(params):
+    """Асинхронный вариант get_facet_counts() с той же записью кэша"""
+    key = await catalog_cache.amake_key('facets', _facet_params(params))
+    counts = await cache.aget(key)
+    await catalog_cache.arecord('facets', counts is not None)
+    if counts is None:
+        counts = _collect_counts([row async for row in facet_queryset(params)])
+        await cache.aset(key, counts, catalog_cache.get_timeout())
+    return counts
+
+
+def _top(counts, current):
+    """Самые частые значения; выбранное значение показывается всегда"""
+    values = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:FACET_LIMIT]
+    if current and current not in dict(values):
+        values.append((current, counts.get(current, 0)))
+    return values
+
+
+def _power_label(low, high):
+    if low is None:
+        return f'до {high} Вт'
+    if high is None:
+        return f'от {low} Вт'
+    return f'{low}–{high} Вт'
+
+
+def build_facets(params, counts=None):
+    """
+    Варианты фильтров с количеством ламп для шаблона списка.
+    counts - уже загруженные get_facet_counts() или aget_facet_counts() счетчики.
+    """
+    if counts is None:
+        counts = get_facet_counts(params)
+    return {
+        'lamp_type': [
+            (value, label, counts['lamp_type'].get(value, 0)) for value, label in Lamp.TYPE_CHOICES
+        ],
+        'has_dimmer': counts['has_dimmer'].get('1', 0),
+        'brand': _top(counts['brand'], params.get('brand')),
+        'color': _top(counts['color'], params.get('color')),
+        'power': [
+            {
+                'min': '' if low is None else low,
+                'max': '' if high is None else high,
+                'label': _power_label(low, high),
+                'count': counts['power'].get(str(index), 0),
+            }
+            for index, (low, high) in enumerate(POWER_BUCKETS)
+        ],
+    }
@@ -0,0 +1,50 @@
+from .search import get_search_backend
+
+# Параметры фильтрации каталога (GET-параметры списка ламп, экспорта и API)
+FILTER_PARAMS = ['lamp_type', 'has_dimmer', 'min_power', 'max_power', 'brand', 'color', 'search']
+# Верхняя граница PositiveIntegerField: большие числа база не примет в сравнении
+MAX_POWER = 2147483647
+
+
+def parse_power(value):
+    """Граница мощности из параметра фильтра; ValueError, если это не целое число ватт"""
+    power = int(value)
+    if not 0 <= power <= MAX_POWER:
+        raise ValueError(value)
+    return power
+
+
+def filter_lamps(queryset, params, rank=True):
+    """
+    Применяет фильтры каталога к выборке ламп.
+    params - словарь или QueryDict с параметрами из FILTER_PARAMS; пустые значения и нечисловые
+    границы мощности игнорируются.
+    Поиск аннотирует выборку полем search_rank (см. catalog/search.py), если rank не False.
+    """
+    lamp_type = params.get('lamp_type')
+    has_dimmer = params.get('has_dimmer')
+    min_power = params.get('min_power')
+    max_power = params.get('max_power')
+    brand = params.get('brand')
+    color = params.get('color')
+    search_query = params.get('search')
+
+    if lamp_type:
+        queryset = queryset.filter(lamp_type=lamp_type)
+    if has_dimmer:
+        queryset = queryset.filter(has_dimmer=True)
+    # Неверные границы мощности на страницах каталога не применяются; API отвечает на них 400
+    for lookup, value in (('power_watts__gte', min_power), ('power_watts__lte', max_power)):
+        if value:
+            try:
+                queryset = queryset.filter(**{lookup: parse_power(value)})
+            except ValueError:
+                pass
+    if brand:
+        queryset = queryset.filter(brand=brand)
+    if color:
+        queryset = queryset.filter(color=color)
+
+    if search_query:
+        queryset = get_search_backend().search(queryset, search_query, rank=rank)
+    return queryset
@@ -1,7 +1,8 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import Lamp, UserProfile
+from .repricing import REPRICE_FIELDS, REPRICE_MODES, Repricing, select_lamps
 
 class UserRegistrationForm(UserCreationForm):
     email = forms.EmailField(required=True, widget=forms.EmailInput(attrs={'class': 'form-control'}))
@@ -26,4 +27,50 @@ class UserRegistrationForm(UserCreationForm):
         if commit:
             user.save()
             UserProfile.objects.create(user=user, role=self.cleaned_data['role'])
-        return user 
\ No newline at end of file
+        return user 
+
+class BulkRepriceForm(forms.Form):
+    # Выбор ламп
+    brand = forms.CharField(required=False, label='Марка', widget=forms.TextInput(attrs={'class': 'form-control'}))
+    lamp_type = forms.ChoiceField(
+        choices=[('', 'Все типы')] + Lamp.TYPE_CHOICES, required=False, label='Тип',
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    min_power = forms.IntegerField(
+        required=False, min_value=0, label='Мощность от, Вт', widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    max_power = forms.IntegerField(
+        required=False, min_value=0, label='Мощность до, Вт', widget=forms.NumberInput(attrs={'class': 'form-control'}),
+    )
+    # Изменение цен
+    price_fields = forms.MultipleChoiceField(
+        choices=REPRICE_FIELDS, initial=['price'], label='Цены', widget=forms.CheckboxSelectMultiple,
+    )
+    mode = forms.ChoiceField(choices=REPRICE_MODES, label='Изменение', widget=forms.Select(attrs={'class': 'form-select'}))
+    amount = forms.DecimalField(
+        max_digits=10, decimal_places=2, label='Величина',
+        help_text='Отрицательное значение уменьшает цену',
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        min_power = cleaned_data.get('min_power')
+        max_power = cleaned_data.get('max_power')
+        if min_power is not None and max_power is not None and min_power > max_power:
+            self.add_error('max_power', 'Максимальная мощность меньше минимальной')
+        amount = cleaned_data.get('amount')
+        if amount is not None:
+            if amount == 0:
+                self.add_error('amount', 'Укажите ненулевое изменение')
+            elif cleaned_data.get('mode') == 'percent' and amount <= -100:
+                self.add_error('amount', 'Цену нельзя уменьшить на 100% и более')
+        return cleaned_data
+
+    def get_repricing(self):
+        return Repricing(
+            select_lamps(self.cleaned_data),
+            self.cleaned_data['price_fields'],
+            self.cleaned_data['mode'],
+            self.cleaned_data['amount'],
+        )
@@ -0,0 +1,215 @@
+import csv
+import io
+import json
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .export import EXPORT_COLUMNS
+from .models import Lamp
+from .search import get_search_backend
+
+IMPORT_FORMATS = ['csv', 'jsonl']
+DEFAULT_BATCH_SIZE = 1000
+
+# Поля, которые можно загрузить; заголовки выгрузки тоже принимаются
+IMPORT_FIELDS = [name for name, header in EXPORT_COLUMNS]
+HEADER_ALIASES = {header.lower(): name for name, header in EXPORT_COLUMNS}
+# Без этих полей новую лампу создать нельзя; для существующей достаточно артикула
+REQUIRED_FIELDS = ['article', 'brand', 'power_watts', 'color', 'lamp_type', 'price']
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y', 'да', 'on'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n', 'нет', 'off', ''}
+TYPE_LABELS = {label.lower(): code for code, label in Lamp.TYPE_CHOICES}
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)  # (номер строки, артикул, сообщение)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def read_records(stream, import_format):
+    """
+    Читает файл построчно и возвращает пары (номер строки, словарь значений).
+    stream - текстовый поток; CSV должен содержать строку заголовков.
+    """
+    if import_format == 'jsonl':
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line, parse_float=Decimal)
+            except ValueError as e:
+                yield line_number, ValueError(f'Некорректный JSON: {e}')
+                continue
+            if not isinstance(record, dict):
+                yield line_number, ValueError('Ожидается JSON-объект')
+                continue
+            yield line_number, record
+        return
+
+    reader = csv.reader(stream)
+    try:
+        headers = next(reader)
+    except StopIteration:
+        return
+    if headers and headers[0].startswith('\ufeff'):
+        headers[0] = headers[0][1:]
+    names = [HEADER_ALIASES.get(header.strip().lower(), header.strip()) for header in headers]
+    for row in reader:
+        if not any(row):
+            continue
+        yield reader.line_num, dict(zip(names, row))
+
+
+def clean_record(record, is_new):
+    """
+    Проверяет и преобразует значения одной строки по правилам полей модели.
+    Возвращает (значения, ошибки). Пустая строка в необязательном поле означает "нет значения".
+    """
+    values = {}
+    errors = []
+    for name in IMPORT_FIELDS:
+        if name not in record:
+            continue
+        raw = record[name]
+        if isinstance(raw, str):
+            raw = raw.strip()
+        model_field = Lamp._meta.get_field(name)
+        try:
+            if name == 'has_dimmer':
+                if isinstance(raw, bool):
+                    value = raw
+                elif str(raw).lower() in TRUE_VALUES:
+                    value = True
+                elif str(raw).lower() in FALSE_VALUES:
+                    value = False
+                else:
+                    raise ValidationError('Ожидается да/нет')
+            else:
+                if name == 'lamp_type' and isinstance(raw, str):
+                    raw = TYPE_LABELS.get(raw.lower(), raw)
+                if raw == '' and model_field.null:
+                    raw = None
+                value = model_field.clean(raw, None)
+        except ValidationError as e:
+            errors.append(f'{name}: {"; ".join(e.messages)}')
+            continue
+        values[name] = value
+
+    if is_new:
+        missing = [name for name in REQUIRED_FIELDS if values.get(name) in (None, '')]
+        if missing:
+            errors.append(f'не заполнены обязательные поля: {", ".join(missing)}')
+    elif not values.get('article'):
+        errors.append('не указан артикул')
+    return values, errors
+
+
+class LampImporter:
+    """
+    Загрузка ламп порциями: каждая порция проверяется, затем одним запросом
+    вставляется или обновляется по артикулу (bulk_create с update_conflicts)
+    в отдельной транзакции. Строки только с частью колонок обновляют существующие
+    лампы через bulk_update. Ошибочные строки пропускаются и попадают в отчет.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, max_errors=None):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.search_backend = get_search_backend()
+
+    def run(self, stream, import_format='csv'):
+        result = ImportResult()
+        started = time.perf_counter()
+        batch = []
+        for line_number, record in read_records(stream, import_format):
+            result.rows += 1
+            if isinstance(record, Exception):
+                result.errors.append((line_number, '', str(record)))
+            else:
+                batch.append((line_number, record))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch, result)
+                batch = []
+            if self.max_errors is not None and len(result.errors) > self.max_errors:
+                break
+        if batch:
+            self.import_batch(batch, result)
+
+        # Страницы и карточки каталога в кэше устарели
+        bump_catalog_version()
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def import_batch(self, batch, result):
+        articles = {str(record.get('article', '')).strip() for line_number, record in batch}
+        existing = dict(Lamp.objects.filter(article__in=articles).values_list('article', 'id'))
+
+        # Повтор артикула внутри порции: значения объединяются, более поздние важнее
+        rows = {}
+        for line_number, record in batch:
+            article = str(record.get('article', '')).strip()
+            values, errors = clean_record(record, is_new=article not in existing)
+            if errors:
+                result.errors.append((line_number, article, '; '.join(errors)))
+            else:
+                rows.setdefault(values['article'], {}).update(values)
+        if not rows:
+            return
+
+        # Обновляются только колонки, присутствующие в строке; дата изменения - всегда.
+        # Строки с разным набором колонок (возможно в JSONL) загружаются отдельными запросами
+        groups = {}
+        for values in rows.values():
+            groups.setdefault(tuple(sorted(values)), []).append(values)
+        now = timezone.now()
+        with transaction.atomic():
+            for names, group in groups.items():
+                update_fields = [name for name in names if name != 'article'] + ['updated_at']
+                if set(REQUIRED_FIELDS) <= set(names):
+                    Lamp.objects.bulk_create(
+                        [Lamp(**values) for values in group],
+                        update_conflicts=True,
+                        unique_fields=['article'],
+                        update_fields=update_fields,
+                        batch_size=self.batch_size,
+                    )
+                else:
+                    # Неполные строки бывают только у существующих ламп; вставка без
+                    # обязательных колонок нарушила бы NOT NULL даже при конфликте артикула
+                    Lamp.objects.bulk_update(
+                        [Lamp(id=existing[values['article']], updated_at=now, **values) for values in group],
+                        update_fields,
+                        batch_size=self.batch_size,
+                    )
+            # Сигналы при пакетных операциях не отправляются - обновляем поисковый индекс явно
+            self.search_backend.index(
+                Lamp.objects.filter(article__in=rows.keys()).only('id', 'article', 'brand', 'description')
+            )
+
+        updated = len(existing.keys() & rows.keys())
+        result.updated += updated
+        result.created += len(rows) - updated
+
+
+def import_lamps(stream, import_format='csv', batch_size=DEFAULT_BATCH_SIZE, max_errors=None):
+    return LampImporter(batch_size=batch_size, max_errors=max_errors).run(stream, import_format)
+
+
+def open_upload(uploaded_file):
+    """Текстовый поток для загруженного файла; читается порциями, не целиком"""
+    return io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
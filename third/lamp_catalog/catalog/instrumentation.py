@@ -0,0 +1,240 @@
+"""
+Метрики запросов по представлениям: количество SQL-запросов и их время, время отрисовки
+шаблонов, размер ответа и длительность обработки.
+
+Статистика текущего запроса (RequestStats) живет в ContextVar: запросы к базе считает обертка
+record_query, которую signals.py ставит на каждое соединение, время шаблонов - бэкенд
+InstrumentedDjangoTemplates. RequestMetricsMiddleware складывает статистику в счетчики
+представления и пишет в журнал запросы сверх бюджета (CATALOG_QUERY_BUDGET,
+CATALOG_LATENCY_BUDGET, CATALOG_VIEW_BUDGETS) вместе с повторяющимся SQL - так N+1 видны
+без отладчика. Счетчики отдаются в формате Prometheus представлением metrics.
+
+Счетчики хранятся в памяти процесса: при нескольких воркерах каждый процесс опрашивается
+отдельно. Запросы, выполненные при отдаче потокового ответа, не учитываются.
+"""
+import logging
+import threading
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import cache as catalog_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_BUDGET = 30
+DEFAULT_LATENCY_BUDGET = 0.5
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+# Сколько повторяющихся запросов и символов SQL попадает в журнал
+LOGGED_DUPLICATES = 5
+LOGGED_SQL_LENGTH = 300
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.statements = Counter()
+        self.template_seconds = 0.0
+        self.template_queries = 0
+        self.rendering = False
+
+    def add_query(self, sql, seconds):
+        self.queries += 1
+        self.sql_seconds += seconds
+        self.statements[sql] += 1
+
+    def duplicates(self):
+        """Одинаковый SQL (с параметрами-заполнителями), выполненный больше одного раза"""
+        return [(count, sql) for sql, count in self.statements.most_common(LOGGED_DUPLICATES) if count > 1]
+
+
+_request_stats = ContextVar('catalog_request_stats', default=None)
+
+
+@contextmanager
+def collect_stats():
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add_query(sql, perf_counter() - start)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = _request_stats.get()
+        # Вложенная отрисовка (render_to_string из тега) уже входит во внешнюю
+        if stats is None or stats.rendering:
+            return super().render(context, request)
+        stats.rendering = True
+        start = perf_counter()
+        queries = stats.queries
+        try:
+            return super().render(context, request)
+        finally:
+            stats.rendering = False
+            stats.template_seconds += perf_counter() - start
+            stats.template_queries += stats.queries - queries
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Шаблоны Django с замером времени отрисовки и запросов, выполненных из шаблона"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_queries = 0
+        self.response_bytes = 0
+        self.errors = 0
+        self.over_budget = 0
+
+
+_views = {}
+_lock = threading.Lock()
+
+
+def get_budget(view):
+    budget = getattr(settings, 'CATALOG_VIEW_BUDGETS', {}).get(view, {})
+    return (
+        budget.get('queries', getattr(settings, 'CATALOG_QUERY_BUDGET', DEFAULT_QUERY_BUDGET)),
+        budget.get('seconds', getattr(settings, 'CATALOG_LATENCY_BUDGET', DEFAULT_LATENCY_BUDGET)),
+    )
+
+
+def check_budget(view, method, path, stats, duration):
+    """Пишет в журнал запрос сверх бюджета; возвращает True, если бюджет превышен"""
+    query_budget, latency_budget = get_budget(view)
+    if stats.queries <= query_budget and duration <= latency_budget:
+        return False
+    lines = [
+        f'{method} {path} ({view}): {stats.queries} запросов к базе (бюджет {query_budget}), '
+        f'{duration * 1000:.0f} мс (бюджет {latency_budget * 1000:.0f} мс), '
+        f'SQL {stats.sql_seconds * 1000:.0f} мс, шаблоны {stats.template_seconds * 1000:.0f} мс '
+        f'({stats.template_queries} запросов из шаблонов)'
+    ]
+    for count, sql in stats.duplicates():
+        lines.append(f'  {count} x {sql[:LOGGED_SQL_LENGTH]}')
+    logger.warning('\n'.join(lines))
+    return True
+
+
+def record_request(view, stats, status, duration, response_bytes, over_budget):
+    with _lock:
+        metrics = _views.get(view)
+        if metrics is None:
+            metrics = _views[view] = ViewMetrics()
+        metrics.duration.observe(duration)
+        metrics.queries.observe(stats.queries)
+        metrics.sql_seconds += stats.sql_seconds
+        metrics.template_seconds += stats.template_seconds
+        metrics.template_queries += stats.template_queries
+        metrics.response_bytes += response_bytes
+        metrics.errors += status >= 500
+        metrics.over_budget += over_budget
+
+
+def get_view_metrics():
+    with _lock:
+        return dict(_views)
+
+
+def reset_view_metrics():
+    with _lock:
+        _views.clear()
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _histogram_lines(name, view, histogram):
+    labels = f'view="{_label(view)}"'
+    for bound, count in histogram.cumulative():
+        yield f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+    yield f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}'
+    yield f'{name}_sum{{{labels}}} {histogram.sum}'
+    yield f'{name}_count{{{labels}}} {histogram.count}'
+
+
+def render_metrics():
+    """Метрики представлений и кэша каталога в текстовом формате Prometheus"""
+    views = sorted(get_view_metrics().items())
+    lines = []
+
+    def family(name, kind, help_text, rows):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(rows)
+
+    family('catalog_request_duration_seconds', 'histogram', 'Request processing time by view',
+           [line for view, m in views for line in _histogram_lines('catalog_request_duration_seconds', view, m.duration)])
+    family('catalog_request_queries', 'histogram', 'Database queries per request by view',
+           [line for view, m in views for line in _histogram_lines('catalog_request_queries', view, m.queries)])
+    counters = [
+        ('catalog_sql_seconds_total', 'Time spent in database queries', 'sql_seconds'),
+        ('catalog_template_seconds_total', 'Time spent rendering templates', 'template_seconds'),
+        ('catalog_template_queries_total', 'Database queries made while rendering templates', 'template_queries'),
+        ('catalog_response_bytes_total', 'Response body size', 'response_bytes'),
+        ('catalog_server_errors_total', 'Responses with status 5xx', 'errors'),
+        ('catalog_over_budget_total', 'Requests over the query or latency budget', 'over_budget'),
+    ]
+    for name, help_text, attribute in counters:
+        family(name, 'counter', help_text,
+               [f'{name}{{view="{_label(view)}"}} {getattr(m, attribute)}' for view, m in views])
+
+    cache_rows = []
+    for name, stats in catalog_cache.get_metrics().items():
+        cache_rows.append(f'catalog_cache_requests_total{{cache="{name}",result="hit"}} {stats["hits"]}')
+        cache_rows.append(f'catalog_cache_requests_total{{cache="{name}",result="miss"}} {stats["misses"]}')
+    family('catalog_cache_requests_total', 'counter', 'Catalog cache lookups', cache_rows)
+    return '\n'.join(lines) + '\n'
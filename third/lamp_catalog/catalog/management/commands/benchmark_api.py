@@ -0,0 +1,95 @@
+import json
+from time import perf_counter
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+from django.test import RequestFactory
+from django.urls import reverse
+
+from catalog.api import brotli
+from catalog.cache import bump_catalog_version
+from catalog.models import Lamp
+
+
+class Command(BaseCommand):
+    help = ('Измеряет пропускную способность JSON API каталога в одном процессе: '
+            'запросы передаются WSGI-приложению напрямую и проходят весь стек middleware, '
+            'без сетевого сервера')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Количество запросов в каждом сценарии')
+        parser.add_argument('--limit', type=int, default=20, help='Размер страницы')
+        parser.add_argument('--fields', default='', help='Поля ответа через запятую (по умолчанию - все, кроме описания)')
+        parser.add_argument('--host', default='localhost', help='Заголовок Host (должен входить в ALLOWED_HOSTS)')
+
+    def handle(self, *args, **options):
+        if not Lamp.objects.exists():
+            raise CommandError('В каталоге нет ламп')
+        self.factory = RequestFactory(SERVER_NAME=options['host'])
+        self.handler = WSGIHandler()
+        self.url = reverse('catalog:api_lamp_list')
+        params = {'limit': options['limit']}
+        if options['fields']:
+            params['fields'] = options['fields']
+        count = options['requests']
+
+        self.report_sizes(params)
+
+        # Обход страниц по курсорам без кэша: каждый ответ строится запросом к базе
+        bump_catalog_version()
+        self.run('Обход страниц (промахи кэша)', count, self.walk(params))
+
+        # Повтор одной страницы: тело ответа берется из кэша
+        self.run('Одна страница (кэш)', count, lambda: self.get(params))
+        self.run('Одна страница (кэш, gzip)', count, lambda: self.get(params, HTTP_ACCEPT_ENCODING='gzip'))
+
+        etag = self.get(params)[1]['ETag']
+        self.run('Условный запрос (304)', count, lambda: self.get(params, HTTP_IF_NONE_MATCH=etag))
+
+    def get(self, params, path=None, **headers):
+        """Запрос к WSGI-приложению, как от сервера приложений; возвращает (статус, заголовки, тело)"""
+        environ = self.factory.get(path or self.url, params, **headers).environ
+        started = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            started['status'] = status
+            started['headers'] = dict(response_headers)
+
+        response = self.handler(environ, start_response)
+        try:
+            body = b''.join(response)
+        finally:
+            response.close()
+        if not started['status'].startswith(('200', '304')):
+            raise CommandError(f'{started["status"]}: {body[:200]!r}')
+        return started['status'], started['headers'], body
+
+    def walk(self, params):
+        state = {'next': None}
+
+        def step():
+            if state['next']:
+                path, query = state['next'].split('?', 1)
+                status, headers, body = self.get(QueryDict(query), path)
+            else:
+                status, headers, body = self.get(params)
+            state['next'] = json.loads(body)['next']
+        return step
+
+    def run(self, label, count, request):
+        start = perf_counter()
+        for _ in range(count):
+            request()
+        elapsed = perf_counter() - start
+        self.stdout.write(
+            f'{label}: {count} запросов за {elapsed:.2f} с, '
+            f'{count / elapsed:.0f} запросов/с, {elapsed / count * 1000:.2f} мс на запрос'
+        )
+
+    def report_sizes(self, params):
+        sizes = [f'JSON {len(self.get(params)[2])} байт']
+        sizes.append(f'gzip {len(self.get(params, HTTP_ACCEPT_ENCODING="gzip")[2])} байт')
+        if brotli is not None:
+            sizes.append(f'brotli {len(self.get(params, HTTP_ACCEPT_ENCODING="br")[2])} байт')
+        self.stdout.write('Размер страницы: ' + ', '.join(sizes))
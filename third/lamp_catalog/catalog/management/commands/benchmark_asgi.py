@@ -0,0 +1,159 @@
+import asyncio
+import types
+from concurrent.futures import ThreadPoolExecutor
+from statistics import median
+from time import perf_counter, sleep
+from urllib.parse import urlsplit
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+from django.urls import include, path, reverse
+
+from catalog.models import Lamp
+from catalog.urls import get_urlpatterns
+from lamp_catalog import urls as project_urls
+
+
+def make_urlconf(async_views):
+    """Маршруты проекта с синхронными или асинхронными представлениями каталога"""
+    urlconf = types.ModuleType(f'benchmark_urls_{"async" if async_views else "sync"}')
+    urlconf.urlpatterns = [
+        path('', include((get_urlpatterns(async_views), 'catalog'))),
+        *[pattern for pattern in project_urls.urlpatterns if getattr(pattern, 'app_name', None) != 'catalog'],
+    ]
+    return urlconf
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест в одном процессе: WSGI (синхронные представления, пул потоков) '
+            'против ASGI (асинхронные представления, один цикл событий) при медленных клиентах. '
+            'Медленный клиент удерживает обработчик на --client-delay секунд, пока читает ответ')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', action='append',
+                            help='Адрес страницы (можно несколько); по умолчанию - API и список ламп')
+        parser.add_argument('--requests', type=int, default=1000, help='Количество запросов на сервер')
+        parser.add_argument('--concurrency', type=int, default=100, help='Одновременных клиентов')
+        parser.add_argument('--threads', type=int, default=8, help='Потоков WSGI-воркера (как gthread)')
+        parser.add_argument('--client-delay', type=float, default=0.05,
+                            help='Сколько секунд клиент читает ответ (0 - быстрые клиенты)')
+        parser.add_argument('--host', default='localhost', help='Заголовок Host (должен входить в ALLOWED_HOSTS)')
+
+    def handle(self, *args, **options):
+        if not Lamp.objects.exists():
+            raise CommandError('В каталоге нет ламп')
+        self.host = options['host']
+        urls = options['url'] or [reverse('catalog:api_lamp_list'), reverse('catalog:lamp_list')]
+        self.stdout.write(
+            f'{options["requests"]} запросов, {options["concurrency"]} клиентов, '
+            f'задержка клиента {options["client_delay"] * 1000:.0f} мс, потоков WSGI {options["threads"]}'
+        )
+        for url in urls:
+            self.stdout.write(f'{url}:')
+            with self.urlconf(async_views=False):
+                self.report('WSGI', self.run_wsgi(url, options))
+            with self.urlconf(async_views=True):
+                self.report('ASGI', asyncio.run(self.run_asgi(url, options)))
+
+    def urlconf(self, async_views):
+        # Кэши маршрутов сбрасываются сигналом setting_changed
+        return override_settings(ROOT_URLCONF=make_urlconf(async_views))
+
+    def report(self, label, result):
+        elapsed, latencies = result
+        latencies.sort()
+        self.stdout.write(
+            f'  {label}: {len(latencies) / elapsed:.0f} запросов/с, '
+            f'задержка p50 {median(latencies) * 1000:.1f} мс, '
+            f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} мс'
+        )
+
+    def run_wsgi(self, url, options):
+        handler = WSGIHandler()
+        environ = RequestFactory(SERVER_NAME=self.host).get(url).environ
+        delay = options['client_delay']
+
+        def request():
+            statuses = []
+            response = handler(dict(environ), lambda status, headers, exc_info=None: statuses.append(status))
+            try:
+                b''.join(response)
+                # Поток воркера занят, пока медленный клиент не дочитает ответ
+                if delay:
+                    sleep(delay)
+            finally:
+                response.close()
+            if not statuses[0].startswith('200'):
+                raise CommandError(f'{url}: {statuses[0]}')
+
+        request()
+        remaining = iter(range(options['requests']))
+        latencies = []
+
+        # Клиенты сверх числа потоков ждут в очереди, как в очереди соединений сервера
+        with ThreadPoolExecutor(max_workers=options['threads']) as workers:
+            def client():
+                for _ in remaining:
+                    queued = perf_counter()
+                    workers.submit(request).result()
+                    latencies.append(perf_counter() - queued)
+
+            start = perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as clients:
+                for future in [clients.submit(client) for _ in range(options['concurrency'])]:
+                    future.result()
+            return perf_counter() - start, latencies
+
+    async def run_asgi(self, url, options):
+        handler = ASGIHandler()
+        parts = urlsplit(url)
+        delay = options['client_delay']
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': parts.path, 'raw_path': parts.path.encode(),
+            'query_string': parts.query.encode(), 'root_path': '',
+            'headers': [(b'host', self.host.encode())],
+            'client': ('127.0.0.1', 50000), 'server': (self.host, 80),
+        }
+
+        async def request():
+            started = perf_counter()
+            finished = asyncio.Event()
+            messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+            statuses = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                await finished.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+                elif not message.get('more_body'):
+                    # Медленный клиент задерживает только свою сопрограмму
+                    if delay:
+                        await asyncio.sleep(delay)
+                    finished.set()
+
+            await handler(dict(scope), receive, send)
+            if statuses[0] != 200:
+                raise CommandError(f'{url}: {statuses[0]}')
+            return perf_counter() - started
+
+        await request()
+        remaining = options['requests']
+        latencies = []
+
+        async def client():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                latencies.append(await request())
+
+        start = perf_counter()
+        await asyncio.gather(*[client() for _ in range(options['concurrency'])])
+        return perf_counter() - start, latencies
@@ -0,0 +1,159 @@
+import os
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+
+from catalog.models import Cart, Lamp
+
+# Сравниваемые режимы базы: название и переменные DB_* поверх текущего окружения
+MODES = {
+    'sqlite': [
+        ('стандартный', {'DB_SQLITE_TUNED': '0'}),
+        ('WAL, IMMEDIATE', {'DB_SQLITE_TUNED': '1'}),
+    ],
+    'postgresql': [
+        ('постоянные соединения', {'DB_POOL': '0'}),
+        ('пул соединений', {'DB_POOL': '1'}),
+    ],
+}
+RESULT = re.compile(r'за (?P<seconds>[\d.]+) с: (?P<rate>\d+) операций/с, ошибок (?P<errors>\d+)')
+
+
+class Command(BaseCommand):
+    help = ('Измеряет пропускную способность параллельных записей в корзины в каждом режиме базы '
+            '(настройки DB_*, см. lamp_catalog/database.py) и выводит результаты рядом. Каждый режим '
+            'запускается отдельным процессом; на SQLite - на своей копии текущей базы. Каждая операция - '
+            'как запрос add_to_cart: соединение берется и освобождается по правилам CONN_MAX_AGE')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Параллельных потоков (пользователей)')
+        parser.add_argument('--operations', type=int, default=2000, help='Всего добавлений в корзину')
+        parser.add_argument('--prefix', default='benchcart', help='Префикс имен тестовых пользователей')
+        parser.add_argument('--keep', action='store_true', help='Не удалять тестовых пользователей и корзины')
+        parser.add_argument('--current', action='store_true',
+                            help='Измерить только текущие настройки DB_*, без сравнения режимов')
+
+    def handle(self, *args, **options):
+        if not Lamp.objects.exists():
+            raise CommandError('В каталоге нет ламп')
+        if options['current']:
+            self.measure(options)
+        else:
+            self.compare(options)
+
+    def compare(self, options):
+        if connection.vendor not in MODES:
+            raise CommandError(f'Нет режимов для сравнения на {connection.vendor}; используйте --current')
+        arguments = [
+            sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'benchmark_cart_writes', '--current',
+            '--threads', str(options['threads']), '--operations', str(options['operations']),
+            '--prefix', options['prefix'],
+        ]
+        if options['keep']:
+            arguments.append('--keep')
+        results = []
+        with tempfile.TemporaryDirectory() as directory:
+            for index, (name, overrides) in enumerate(MODES[connection.vendor]):
+                # Записи идут только на основную базу; реплики в сравнении не участвуют
+                env = {**os.environ, **overrides, 'DB_REPLICAS': ''}
+                if connection.vendor == 'sqlite':
+                    # Режим WAL сохраняется в файле, поэтому каждый режим - на свежей копии
+                    env['DB_NAME'] = self.copy_sqlite(Path(directory) / f'mode{index}.sqlite3')
+                process = subprocess.run(arguments, env=env, capture_output=True, text=True)
+                if process.returncode:
+                    raise CommandError(f'{name}: {process.stderr.strip()}')
+                self.stdout.write(f'{name}:')
+                for line in process.stdout.splitlines():
+                    self.stdout.write(f'  {line}')
+                match = RESULT.search(process.stdout)
+                if not match:
+                    raise CommandError(f'{name}: нет результата в выводе\n{process.stdout}')
+                results.append((name, match))
+
+        self.stdout.write(f'{"режим":<24} {"операций/с":>11} {"секунд":>8} {"ошибок":>7}')
+        for name, match in results:
+            self.stdout.write(
+                f'{name:<24} {match["rate"]:>11} {match["seconds"]:>8} {match["errors"]:>7}'
+            )
+
+    def copy_sqlite(self, path):
+        """Копия текущей базы через backup API; исходный файл не меняется"""
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+        return str(path)
+
+    def measure(self, options):
+        lamp_ids = list(Lamp.objects.values_list('id', flat=True)[:100])
+        self.describe_database()
+
+        users = [
+            User.objects.get_or_create(username=f'{options["prefix"]}{index}')[0]
+            for index in range(options['threads'])
+        ]
+        per_thread = max(options['operations'] // len(users), 1)
+        errors = []
+        close_old_connections()
+
+        def worker(user):
+            rng = random.Random(user.pk)
+            for _ in range(per_thread):
+                # Как в обработке запроса: соединение проверяется до и закрывается (или остается) после
+                close_old_connections()
+                try:
+                    Cart.objects.get_active(user).add_item(rng.choice(lamp_ids), 1)
+                except OperationalError as e:
+                    errors.append(str(e))
+                finally:
+                    close_old_connections()
+            connection.close()
+
+        threads = [threading.Thread(target=worker, args=(user,)) for user in users]
+        start = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - start
+
+        total = per_thread * len(users)
+        self.stdout.write(
+            f'{total} добавлений в {len(users)} потоков за {elapsed:.2f} с: '
+            f'{total / elapsed:.0f} операций/с, ошибок {len(errors)}'
+        )
+        for message in sorted(set(errors))[:5]:
+            self.stderr.write(f'  {message}')
+
+        if not options['keep']:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def describe_database(self):
+        settings_dict = connection.settings_dict
+        description = f'{connection.vendor}, CONN_MAX_AGE={settings_dict["CONN_MAX_AGE"]}'
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+                cursor.execute('PRAGMA synchronous')
+                synchronous = cursor.fetchone()[0]
+            description += (
+                f', journal_mode={journal_mode}, synchronous={synchronous}, '
+                f'transaction_mode={connection.transaction_mode or "DEFERRED"}'
+            )
+        elif 'pool' in settings_dict['OPTIONS']:
+            description += f', пул {settings_dict["OPTIONS"]["pool"]}'
+        self.stdout.write(f'База: {description}')
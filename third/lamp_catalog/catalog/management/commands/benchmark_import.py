@@ -0,0 +1,60 @@
+import csv
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from catalog.export import EXPORT_COLUMNS
+from catalog.importer import DEFAULT_BATCH_SIZE, import_lamps
+from catalog.models import Lamp
+
+TYPES = [code for code, label in Lamp.TYPE_CHOICES]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Измеряет скорость импорта на сгенерированном CSV: проход вставки и проход обновления. '
+            'По умолчанию все изменения откатываются')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--prefix', default='BENCH', help='Префикс артикулов тестовых ламп')
+        parser.add_argument('--keep', action='store_true', help='Не откатывать загруженные лампы')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1:
+            raise CommandError('Количество строк должно быть положительным')
+
+        with tempfile.TemporaryFile('w+', encoding='utf-8', newline='') as f:
+            self.write_rows(f, options['rows'], options['prefix'])
+            try:
+                with transaction.atomic():
+                    for title in ('Вставка', 'Обновление'):
+                        f.seek(0)
+                        result = import_lamps(f, 'csv', options['batch_size'])
+                        if result.errors:
+                            raise CommandError(f'Ошибки импорта: {result.errors[:5]}')
+                        self.stdout.write(
+                            f'{title}: {result.rows} строк за {result.seconds:.2f} с '
+                            f'({result.rows_per_second:.0f} строк/с), создано {result.created}, '
+                            f'обновлено {result.updated}'
+                        )
+                    if not options['keep']:
+                        raise Rollback
+            except Rollback:
+                self.stdout.write('Изменения откачены')
+
+    def write_rows(self, f, rows, prefix):
+        writer = csv.writer(f)
+        writer.writerow([header for field, header in EXPORT_COLUMNS])
+        for i in range(rows):
+            writer.writerow([
+                f'{prefix}{i:08d}', f'Brand {i % 50}', TYPES[i % len(TYPES)], 'да' if i % 2 else 'нет',
+                20 + i % 180, 30 + i % 120 if i % 3 else '', 'White',
+                f'{1000 + i % 9000}.00', f'{900 + i % 9000}.00', 10, f'{800 + i % 9000}.00', 100,
+                f'Тестовая лампа {i}',
+            ])
@@ -0,0 +1,67 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.bulk_pricing import PriceTable
+from catalog.models import Lamp
+
+DEFAULT_QUANTITIES = [1, 2, 5, 10, 25, 50, 100, 500]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пакетный расчет цен (PriceTable) с Lamp.get_price_tier '
+            'на всех лампах каталога и заданных количествах')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quantities', type=int, nargs='+', default=DEFAULT_QUANTITIES,
+                            help='Количества для каждого сценария расчета')
+        parser.add_argument('--repeat', type=int, default=3, help='Количество повторов, берется лучшее время')
+
+    def handle(self, *args, **options):
+        lamps = list(Lamp.objects.order_by('id'))
+        if not lamps:
+            raise CommandError('В каталоге нет ламп')
+        quantities = options['quantities']
+        pairs = [(lamp, quantity) for lamp in lamps for quantity in quantities]
+        lamp_ids = [lamp.id for lamp, quantity in pairs]
+        quantity_list = [quantity for lamp, quantity in pairs]
+
+        def per_object():
+            return [lamp.get_price_tier(quantity) for lamp, quantity in pairs]
+
+        table = PriceTable.load()
+
+        def vectorized():
+            return table.quote(lamp_ids, quantity_list)
+
+        expected = per_object()
+        quote = vectorized()
+        # Сравнение строк исключает расхождение даже в количестве знаков после запятой
+        actual = list(zip(quote.tiers(), quote.unit_prices()))
+        mismatches = [
+            (lamp.id, quantity, want, got)
+            for (lamp, quantity), want, got in zip(pairs, expected, actual)
+            if (want[0], str(want[1])) != (got[0], str(got[1]))
+        ]
+        if mismatches:
+            raise CommandError(f'Расхождения с get_price_tier: {mismatches[:10]}')
+
+        per_object_time = self.best_time(per_object, options['repeat'])
+        vectorized_time = self.best_time(vectorized, options['repeat'])
+        load_time = self.best_time(PriceTable.load, options['repeat'])
+
+        self.stdout.write(f'Ламп: {len(lamps)}, сценариев: {len(pairs)}')
+        self.stdout.write(f'Lamp.get_price_tier:  {per_object_time * 1000:.2f} мс')
+        self.stdout.write(f'PriceTable.quote:     {vectorized_time * 1000:.2f} мс')
+        self.stdout.write(f'PriceTable.load:      {load_time * 1000:.2f} мс')
+        if vectorized_time:
+            self.stdout.write(f'Ускорение расчета: x{per_object_time / vectorized_time:.1f}')
+        self.stdout.write(self.style.SUCCESS('Результаты совпадают'))
+
+    def best_time(self, func, repeat):
+        timings = []
+        for _ in range(max(repeat, 1)):
+            start = perf_counter()
+            func()
+            timings.append(perf_counter() - start)
+        return min(timings)
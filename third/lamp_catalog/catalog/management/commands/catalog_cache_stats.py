@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from catalog import cache as catalog_cache
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэша страниц каталога'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулить счетчики после вывода')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Версия каталога: {catalog_cache.get_catalog_version()}')
+        labels = {
+            'page': 'Отрисованные страницы',
+            'ids': 'Выборки id',
+            'lamp': 'Карточки ламп',
+            'facets': 'Счетчики фильтров',
+            'api': 'Ответы API',
+        }
+        for name, stats in catalog_cache.get_metrics().items():
+            self.stdout.write(
+                f'{labels[name]}: попаданий {stats["hits"]}, промахов {stats["misses"]}, '
+                f'доля попаданий {stats["hit_ratio"]:.1%}'
+            )
+        if options['reset']:
+            catalog_cache.reset_metrics()
+            self.stdout.write(self.style.SUCCESS('Счетчики обнулены'))
@@ -0,0 +1,117 @@
+import re
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from catalog.models import Lamp
+from catalog.pagination import KeysetPaginator
+from catalog.views import LampListView
+
+# Значения ключей сортировки для построения курсора "следующей страницы"
+SAMPLE_KEY_VALUES = {
+    'id': 1,
+    'brand': 'M',
+    'price': '1000.00',
+    'power_watts': 60,
+    'height_cm': 30,
+    'color': 'White',
+    'lamp_type': 'table',
+    'has_dimmer': True,
+    'created_at': '2025-01-01T00:00:00+00:00',
+    'search_rank': -1.0,
+}
+
+# Таблица просматривается целиком, без индекса: "SCAN catalog_lamp", до SQLite 3.36 -
+# "SCAN TABLE catalog_lamp". Обход по индексу ("... USING INDEX") и по псевдониму
+# подзапроса ("SCAN U0", "SCAN TABLE catalog_lamp AS U0") полным просмотром не считается
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+
+
+def is_full_scan(detail, tables):
+    """Строка плана EXPLAIN QUERY PLAN - полный просмотр одной из таблиц tables"""
+    match = FULL_SCAN.match(detail)
+    return bool(match) and match.group(1) in tables
+
+
+def query_shapes():
+    """Комбинации параметров, которые формирует форма фильтрации каталога"""
+    shapes = [{}]
+    for field in LampListView.sort_fields:
+        shapes.append({'sort_by': field})
+        shapes.append({'sort_by': field, 'sort_order': 'desc'})
+    shapes += [
+        {'lamp_type': 'table'},
+        {'lamp_type': 'table', 'sort_by': 'price'},
+        {'lamp_type': 'table', 'sort_by': 'price', 'sort_order': 'desc'},
+        {'has_dimmer': '1'},
+        {'min_power': '40', 'max_power': '100'},
+        {'has_dimmer': '1', 'min_power': '40', 'max_power': '100'},
+        {'search': 'lamp'},
+    ]
+    for field in LampListView.group_fields:
+        shapes.append({'group_by': field})
+    return shapes + [dict(shape, pagination='cursor') for shape in shapes]
+
+
+class Command(BaseCommand):
+    help = ('Воспроизводит запросы списка ламп с EXPLAIN QUERY PLAN '
+            'и завершается ошибкой, если таблица ламп просматривается без индекса')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Печатать планы всех запросов')
+
+    def handle(self, *args, **options):
+        connection = connections[router.db_for_read(Lamp)]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Проверка планов поддерживается только для SQLite')
+
+        tables = set(connection.introspection.table_names())
+        factory = RequestFactory()
+        failures = []
+        checked = 0
+        for params in query_shapes():
+            for query in self.replay(factory, connection, params):
+                plan = self.explain(connection, query)
+                checked += 1
+                # Просмотр подзапросов (например, ограниченного подсчета) допустим
+                scans = [detail for detail in plan if is_full_scan(detail, tables)]
+                if options['verbose_plans'] or scans:
+                    self.stdout.write(f'{params}\n  {query}')
+                    for detail in plan:
+                        self.stdout.write(f'    {detail}')
+                if scans:
+                    failures.append((params, query, scans))
+
+        if failures:
+            raise CommandError(
+                f'Полный просмотр таблицы в {len(failures)} из {checked} запросов: '
+                + '; '.join(f'{params}: {", ".join(scans)}' for params, query, scans in failures)
+            )
+        self.stdout.write(self.style.SUCCESS(f'Проверено запросов: {checked}, полных просмотров нет'))
+
+    def replay(self, factory, connection, params):
+        """Выполняет представление списка и возвращает выполненные им SQL-запросы"""
+        requests = [params]
+        if params.get('pagination') == 'cursor':
+            view = LampListView()
+            view.setup(factory.get('/', params))
+            paginator = KeysetPaginator(Lamp.objects.none(), view.get_ordering(), LampListView.paginate_by)
+            row = {field: SAMPLE_KEY_VALUES[field] for field, descending in paginator.keys}
+            requests.append(dict(params, cursor=paginator.encode_cursor('n', row)))
+
+        queries = []
+        for request_params in requests:
+            request = factory.get('/', request_params)
+            request.user = AnonymousUser()
+            with CaptureQueriesContext(connection) as captured:
+                LampListView.as_view(page_cache=False)(request).render()
+            queries += [query['sql'] for query in captured.captured_queries]
+        return queries
+
+    def explain(self, connection, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[3] for row in cursor.fetchall()]
@@ -0,0 +1,57 @@
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, export_rows, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Выгружает каталог ламп в CSV или XLSX с теми же фильтрами, что и список ламп'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Путь к файлу или "-" для вывода в stdout')
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), help='По умолчанию - по расширению файла, иначе csv')
+        parser.add_argument('--lamp-type')
+        parser.add_argument('--has-dimmer', action='store_true')
+        parser.add_argument('--min-power')
+        parser.add_argument('--max-power')
+        parser.add_argument('--brand')
+        parser.add_argument('--color')
+        parser.add_argument('--search')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        output = options['output']
+        export_format = options['format'] or ('xlsx' if output.endswith('.xlsx') else 'csv')
+        params = {
+            'lamp_type': options['lamp_type'],
+            'has_dimmer': options['has_dimmer'],
+            'min_power': options['min_power'],
+            'max_power': options['max_power'],
+            'brand': options['brand'],
+            'color': options['color'],
+            'search': options['search'],
+        }
+
+        rows = 0
+
+        def counted(iterator):
+            nonlocal rows
+            for row in iterator:
+                rows += 1
+                yield row
+
+        chunks = iter_export(export_format, counted(export_rows(params, options['chunk_size'])))
+        if output == '-':
+            if export_format != 'csv':
+                raise CommandError('В stdout можно выводить только CSV')
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        if export_format == 'csv':
+            with open(output, 'w', encoding='utf-8', newline='') as f:
+                f.writelines(chunks)
+        else:
+            with open(output, 'wb') as f:
+                f.writelines(chunks)
+        self.stderr.write(self.style.SUCCESS(f'Выгружено ламп: {rows} в {output}'))
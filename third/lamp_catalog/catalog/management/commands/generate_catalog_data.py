@@ -0,0 +1,72 @@
+import re
+from time import perf_counter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.models import Lamp
+from catalog.synthetic import (
+    DEFAULT_BATCH_SIZE, ROLES, generate_carts, generate_lamps, generate_orders, generate_users,
+)
+
+
+class Command(BaseCommand):
+    help = ('Создает синтетические данные пакетными вставками: лампы с оптовыми ценами, пользователей '
+            'всех ролей, корзины и заказы. Используется нагрузочным тестом load_test')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lamps', type=int, default=10000, help='Количество ламп')
+        parser.add_argument('--users-per-role', type=int, default=10, help='Пользователей каждой роли')
+        parser.add_argument('--cart-items', type=int, default=10,
+                            help='Позиций в корзине каждого гостя и менеджера (0 - без корзин)')
+        parser.add_argument('--orders', type=int, default=1000, help='Заказов, распределенных между менеджерами')
+        parser.add_argument('--order-items', type=int, default=5, help='Позиций в заказе')
+        parser.add_argument('--prefix', default='syn',
+                            help='Префикс артикулов (в верхнем регистре) и имен пользователей')
+        parser.add_argument('--password', default='password', help='Пароль пользователей')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--clear', action='store_true',
+                            help='Сначала удалить данные, созданные ранее с тем же префиксом')
+
+    def handle(self, *args, **options):
+        if options['lamps'] < 1:
+            raise CommandError('Количество ламп должно быть положительным')
+        prefix = options['prefix']
+        # Только записи с именами, которые создает генератор: настоящие артикулы
+        # и пользователи с тем же началом (например, SYN-100) не затрагиваются
+        lamps = Lamp.objects.filter(article__regex=rf'^{re.escape(prefix.upper())}\d{{8}}$')
+        users = User.objects.filter(username__regex=rf'^{re.escape(prefix)}_({"|".join(ROLES)})_\d+$')
+        if options['clear']:
+            # Заказы и корзины удаляются вместе с пользователями
+            users.delete()
+            lamps.delete()
+        elif lamps.exists() or users.exists():
+            raise CommandError(f'Данные с префиксом {prefix} уже есть; укажите --clear или другой --prefix')
+
+        batch_size = options['batch_size']
+        seed = options['seed']
+        lamp_ids = self.step(
+            'Лампы', generate_lamps, options['lamps'], prefix.upper(), batch_size, seed,
+        )
+        users_by_role = self.step(
+            'Пользователи', generate_users, options['users_per_role'], prefix, options['password'], ROLES,
+        )
+        shoppers = users_by_role['guest'] + users_by_role['sales_manager']
+        if options['cart_items'] and shoppers:
+            self.step('Корзины', generate_carts, shoppers, lamp_ids, options['cart_items'], batch_size, seed)
+        if options['orders'] and users_by_role['sales_manager']:
+            self.step(
+                'Заказы', generate_orders, users_by_role['sales_manager'], options['orders'], lamp_ids,
+                options['order_items'], batch_size, seed,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {len(lamp_ids)} ламп, {options["users_per_role"]} пользователей на роль '
+            f'({prefix}_<роль>_<номер>, пароль {options["password"]}), заказов {options["orders"]}'
+        ))
+
+    def step(self, title, function, *args):
+        start = perf_counter()
+        result = function(*args)
+        self.stdout.write(f'{title}: {perf_counter() - start:.2f} с')
+        return result
@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.importer import DEFAULT_BATCH_SIZE, IMPORT_FORMATS, import_lamps
+
+SHOWN_ERRORS = 50
+
+
+class Command(BaseCommand):
+    help = ('Загружает лампы из CSV или JSONL порциями: новые артикулы создаются, '
+            'существующие обновляются по переданным колонкам')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу или "-" для чтения из stdin')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='По умолчанию - по расширению файла, иначе csv')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--max-errors', type=int, help='Остановить загрузку, если ошибок больше')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        if options['batch_size'] < 1:
+            raise CommandError('Размер порции должен быть положительным')
+
+        if path == '-':
+            result = import_lamps(sys.stdin, import_format, options['batch_size'], options['max_errors'])
+        else:
+            try:
+                stream = open(path, encoding='utf-8-sig', newline='')
+            except OSError as e:
+                raise CommandError(f'Не удалось открыть файл: {e}')
+            with stream:
+                result = import_lamps(stream, import_format, options['batch_size'], options['max_errors'])
+
+        for line_number, article, message in result.errors[:SHOWN_ERRORS]:
+            self.stderr.write(f'Строка {line_number} ({article or "без артикула"}): {message}')
+        if len(result.errors) > SHOWN_ERRORS:
+            self.stderr.write(f'... и еще ошибок: {len(result.errors) - SHOWN_ERRORS}')
+
+        summary = (
+            f'Строк: {result.rows}, создано: {result.created}, обновлено: {result.updated}, '
+            f'ошибок: {len(result.errors)}, {result.seconds:.2f} с ({result.rows_per_second:.0f} строк/с)'
+        )
+        if result.errors:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,243 @@
+import math
+import random
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from time import perf_counter, sleep
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from catalog.models import Lamp
+from catalog.views import LampListView
+
+# Доли действий в сценарии по умолчанию
+DEFAULT_MIX = {
+    'browse': 30, 'filter': 20, 'search': 15, 'detail': 15, 'api': 5,
+    'add_to_cart': 8, 'cart': 5, 'checkout': 2,
+}
+TYPES = [code for code, label in Lamp.TYPE_CHOICES]
+SORT_FIELDS = ['brand', 'price', 'power_watts']
+PERCENTILES = (0.5, 0.95, 0.99)
+# Просмотр каталога - по первым страницам
+BROWSE_PAGES = 20
+
+
+def parse_mix(value):
+    """'browse=50,search=10' -> {'browse': 50, 'search': 10}"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX or not weight.strip().isdigit():
+            raise CommandError(f'Неверная доля действия: {part} (действия: {", ".join(DEFAULT_MIX)})')
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise CommandError('Сумма долей действий должна быть положительной')
+    return mix
+
+
+def percentile(values, fraction):
+    """Процентиль по ближайшему рангу; values отсортированы"""
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+class InProcessSession:
+    """Запросы к приложению в этом же процессе через тестовый клиент Django (без CSRF)"""
+
+    def __init__(self, user, host):
+        # Ошибки представлений считаются ответами 500, а не прерывают пользователя
+        self.client = Client(raise_request_exception=False, SERVER_NAME=host)
+        self.client.force_login(user)
+
+    def request(self, method, path, data=None):
+        if method == 'POST':
+            response = self.client.post(path, data or {})
+        else:
+            response = self.client.get(path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response.status_code
+
+    def close(self):
+        connection.close()
+
+
+class NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """Запросы к запущенному серверу: свои cookie, вход через форму, CSRF-токен из cookie"""
+
+    def __init__(self, user, password, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), NoRedirect)
+        self.request('GET', reverse('login'))
+        status = self.request('POST', reverse('login'), {'username': user.username, 'password': password})
+        if status != 302:
+            raise CommandError(f'Не удалось войти как {user.username} (ответ {status}); проверьте --password')
+
+    def csrf_token(self):
+        return next((cookie.value for cookie in self.cookies if cookie.name == 'csrftoken'), '')
+
+    def request(self, method, path, data=None):
+        body = None
+        headers = {}
+        if method == 'POST':
+            token = self.csrf_token()
+            body = urlencode(dict(data or {}, csrfmiddlewaretoken=token)).encode()
+            headers = {'X-CSRFToken': token, 'Content-Type': 'application/x-www-form-urlencoded'}
+        try:
+            with self.opener.open(Request(self.base_url + path, body, headers, method=method)) as response:
+                response.read()
+                return response.status
+        except HTTPError as e:
+            e.read()
+            return e.code
+
+    def close(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест по сценарию покупателей: просмотр и фильтры каталога, поиск, карточки, API, '
+            'добавление в корзину и оформление заказа. Виртуальные пользователи входят под пользователями '
+            'из generate_catalog_data; запросы идут в этом процессе или на сервер --base-url. '
+            'Выводит пропускную способность и процентили задержки по действиям')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Всего запросов')
+        parser.add_argument('--duration', type=float, default=0,
+                            help='Вместо --requests: длительность теста, секунд')
+        parser.add_argument('--concurrency', type=int, default=8, help='Виртуальных пользователей (потоков)')
+        parser.add_argument('--think-time', type=float, default=0, help='Пауза между запросами пользователя, с')
+        parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                            help='Доли действий, например browse=50,search=20,add_to_cart=10')
+        parser.add_argument('--base-url', help='Адрес запущенного сервера (например http://127.0.0.1:8000); '
+                                               'без него - в этом процессе')
+        parser.add_argument('--host', default='localhost',
+                            help='Заголовок Host в этом процессе (должен входить в ALLOWED_HOSTS)')
+        parser.add_argument('--prefix', default='syn', help='Префикс пользователей generate_catalog_data')
+        parser.add_argument('--password', default='password', help='Пароль пользователей')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.lamp_ids = list(Lamp.objects.values_list('id', flat=True))
+        if not self.lamp_ids:
+            raise CommandError('В каталоге нет ламп; выполните generate_catalog_data')
+        self.pages = min(math.ceil(len(self.lamp_ids) / LampListView.paginate_by), BROWSE_PAGES)
+        self.search_terms = list(Lamp.objects.order_by().values_list('brand', flat=True).distinct()[:100])
+        users = list(
+            User.objects.filter(username__startswith=f'{options["prefix"]}_',
+                                userprofile__role__in=['guest', 'sales_manager'])
+            .select_related('userprofile').order_by('id')
+        )
+        if not users:
+            raise CommandError(f'Нет пользователей {options["prefix"]}_*; выполните generate_catalog_data')
+
+        actions = [name for name, weight in options['mix'].items() if weight]
+        weights = [options['mix'][name] for name in actions]
+        remaining = iter(range(options['requests'])) if not options['duration'] else None
+        deadline = perf_counter() + options['duration'] if options['duration'] else None
+        results = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+        target = options['base_url'] or 'этот процесс'
+        self.stdout.write(
+            f'{target}: {options["concurrency"]} пользователей, '
+            + (f'{options["duration"]:.0f} с' if deadline else f'{options["requests"]} запросов')
+        )
+
+        def has_work():
+            if deadline:
+                return perf_counter() < deadline
+            return next(remaining, None) is not None
+
+        def virtual_user(index):
+            rng = random.Random(options['seed'] + index)
+            user = users[index % len(users)]
+            if options['base_url']:
+                session = HttpSession(user, options['password'], options['base_url'])
+            else:
+                session = InProcessSession(user, options['host'])
+            try:
+                while has_work():
+                    action = rng.choices(actions, weights)[0]
+                    if action == 'checkout' and user.userprofile.role != 'sales_manager':
+                        action = 'cart'
+                    method, path, data = self.make_request(action, rng)
+                    start = perf_counter()
+                    try:
+                        status = session.request(method, path, data)
+                    except OSError as e:
+                        status = str(e)
+                    elapsed = perf_counter() - start
+                    with lock:
+                        results[action].append(elapsed)
+                        if not isinstance(status, int) or status >= 400:
+                            errors[(action, status)] += 1
+                    if options['think_time']:
+                        sleep(options['think_time'])
+            finally:
+                session.close()
+
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for future in [pool.submit(virtual_user, index) for index in range(options['concurrency'])]:
+                future.result()
+        self.report(results, errors, perf_counter() - start)
+
+    def make_request(self, action, rng):
+        """Метод, путь и данные запроса для действия сценария"""
+        lamp_id = rng.choice(self.lamp_ids)
+        if action == 'browse':
+            return 'GET', reverse('catalog:lamp_list') + f'?page={rng.randint(1, self.pages)}', None
+        if action == 'filter':
+            params = {
+                'lamp_type': rng.choice(TYPES),
+                'min_power': rng.choice([0, 20, 40, 60]),
+                'sort_by': rng.choice(SORT_FIELDS),
+            }
+            if rng.random() < 0.5:
+                params['has_dimmer'] = 'true'
+            return 'GET', reverse('catalog:lamp_list') + '?' + urlencode(params), None
+        if action == 'search':
+            return 'GET', reverse('catalog:lamp_list') + '?' + urlencode({'search': rng.choice(self.search_terms)}), None
+        if action == 'detail':
+            return 'GET', reverse('catalog:lamp_detail', args=[lamp_id]), None
+        if action == 'api':
+            params = {'lamp_type': rng.choice(TYPES), 'limit': 20, 'fields': 'article,brand,price'}
+            return 'GET', reverse('catalog:api_lamp_list') + '?' + urlencode(params), None
+        if action == 'add_to_cart':
+            return 'POST', reverse('catalog:add_to_cart', args=[lamp_id]), {'quantity': rng.choice([1, 1, 2, 10])}
+        if action == 'cart':
+            return 'GET', reverse('catalog:cart_detail'), None
+        return 'POST', reverse('catalog:create_order'), None
+
+    def report(self, results, errors, elapsed):
+        self.stdout.write(f'{"действие":<12} {"запросов":>9} {"ошибок":>7} {"в секунду":>10} '
+                          f'{"p50, мс":>8} {"p95, мс":>8} {"p99, мс":>8} {"макс, мс":>9}')
+        rows = sorted(results.items())
+        rows.append(('всего', [latency for name, latencies in rows for latency in latencies]))
+        for name, latencies in rows:
+            if not latencies:
+                continue
+            latencies.sort()
+            failed = sum(count for (action, status), count in errors.items() if name in (action, 'всего'))
+            p50, p95, p99 = (percentile(latencies, fraction) * 1000 for fraction in PERCENTILES)
+            self.stdout.write(
+                f'{name:<12} {len(latencies):>9} {failed:>7} {len(latencies) / elapsed:>10.1f} '
+                f'{p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {latencies[-1] * 1000:>9.1f}'
+            )
+        for (action, status), count in sorted(errors.items(), key=str)[:10]:
+            self.stderr.write(f'  {action}: {status} x {count}')
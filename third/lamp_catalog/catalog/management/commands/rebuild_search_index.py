@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from catalog.cache import bump_catalog_version
+from catalog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает поисковый индекс каталога ламп'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        count = backend.rebuild()
+        # Результаты поиска могли измениться - закэшированные страницы каталога устарели
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Поисковый индекс перестроен ({type(backend).__name__}): {count} ламп'
+        ))
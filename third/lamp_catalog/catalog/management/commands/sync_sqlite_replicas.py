@@ -0,0 +1,41 @@
+import sqlite3
+from time import perf_counter, sleep
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик (DB_REPLICAS) через backup API - '
+            'локальная замена репликации для проверки catalog.routers.ReplicaRouter. '
+            'С --interval копирует периодически, имитируя отставание реплик')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Повторять каждые N секунд до прерывания (0 - один раз)')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict
+        replicas = [connections[alias].settings_dict for alias in settings.CATALOG_READ_REPLICAS]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Команда только для SQLite; реплики PostgreSQL настраиваются средствами сервера')
+        if not replicas:
+            raise CommandError('Реплики не настроены, задайте DB_REPLICAS')
+
+        while True:
+            start = perf_counter()
+            source = sqlite3.connect(primary['NAME'])
+            try:
+                for replica in replicas:
+                    target = sqlite3.connect(replica['NAME'])
+                    try:
+                        source.backup(target)
+                    finally:
+                        target.close()
+            finally:
+                source.close()
+            self.stdout.write(f'Скопировано в {len(replicas)} реплик за {perf_counter() - start:.2f} с')
+            if not options['interval']:
+                break
+            sleep(options['interval'])
@@ -0,0 +1,76 @@
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from .instrumentation import check_budget, collect_stats, record_request
+from .roles import get_user_role
+
+
+class RoleMiddleware:
+    """
+    Добавляет request.role - роль текущего пользователя (пустая строка для анонимного).
+    Роль загружается лениво при первом обращении, см. catalog.roles.get_user_role.
+    Должен стоять после AuthenticationMiddleware.
+    Поддерживает ASGI без перехода в поток: асинхронные представления загружают роль
+    заранее через catalog.roles.aget_user_role.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.set_role(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.set_role(request)
+        return await self.get_response(request)
+
+    def set_role(self, request):
+        request.role = SimpleLazyObject(lambda: get_user_role(request.user))
+
+
+class RequestMetricsMiddleware:
+    """
+    Считает запросы к базе, время SQL и шаблонов, размер ответа и длительность запроса
+    по представлениям (см. catalog.instrumentation). Ставится в начало списка, чтобы
+    учитывать и запросы других middleware (сессии, пользователь).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = perf_counter()
+        with collect_stats() as stats:
+            response = self.get_response(request)
+        self.record(request, response, stats, perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = perf_counter()
+        with collect_stats() as stats:
+            response = await self.get_response(request)
+        self.record(request, response, stats, perf_counter() - start)
+        return response
+
+    def record(self, request, response, stats, duration):
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        over_budget = check_budget(view, request.method, request.path, stats, duration)
+        # Размер потокового ответа заранее неизвестен
+        size = 0 if response.streaming else len(response.content)
+        record_request(view, stats, response.status_code, duration, size, over_budget)
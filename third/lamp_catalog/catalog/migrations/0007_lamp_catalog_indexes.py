@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_lamp_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lamp',
+            index=models.Index(fields=['brand', 'id'], name='lamp_brand_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lamp',
+            index=models.Index(fields=['price', 'id'], name='lamp_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lamp',
+            index=models.Index(fields=['power_watts', 'id'], name='lamp_power_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lamp',
+            index=models.Index(fields=['height_cm', 'id'], name='lamp_height_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lamp',
+            index=models.Index(fields=['color', 'id'], name='lamp_color_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lamp',
+            index=models.Index(fields=['lamp_type', 'id'], name='lamp_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lamp',
+            index=models.Index(fields=['created_at', 'id'], name='lamp_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lamp',
+            index=models.Index(fields=['lamp_type', 'brand', 'id'], name='lamp_type_brand_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lamp',
+            index=models.Index(fields=['lamp_type', 'price', 'id'], name='lamp_type_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lamp',
+            index=models.Index(fields=['has_dimmer', 'power_watts'], name='lamp_dimmer_power_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-18 19:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_lamp_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='discount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Скидка'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Сумма'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Сумма со скидкой'),
+        ),
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('article', models.CharField(max_length=50, verbose_name='Артикул')),
+                ('brand', models.CharField(max_length=100, verbose_name='Марка')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Количество')),
+                ('price_tier', models.CharField(choices=[('retail', 'Розница'), ('small_wholesale', 'Мелкий опт'), ('large_wholesale', 'Крупный опт')], max_length=20, verbose_name='Уровень цены')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена за единицу')),
+                ('line_total', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Сумма')),
+                ('lamp', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='catalog.lamp')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='catalog.order')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
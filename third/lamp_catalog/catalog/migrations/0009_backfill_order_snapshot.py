@@ -0,0 +1,69 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations
+
+# Копия правил расчета на момент миграции: исторические модели не имеют методов
+DISCOUNT_TIERS = [
+    (Decimal('100000'), Decimal('0.9')),
+    (Decimal('50000'), Decimal('0.95')),
+]
+
+
+def price_tier(lamp, quantity):
+    if lamp.large_wholesale_price and lamp.large_wholesale_quantity and quantity >= lamp.large_wholesale_quantity:
+        return 'large_wholesale', lamp.large_wholesale_price
+    if lamp.small_wholesale_price and lamp.small_wholesale_quantity and quantity >= lamp.small_wholesale_quantity:
+        return 'small_wholesale', lamp.small_wholesale_price
+    return 'retail', lamp.price
+
+
+def money(value):
+    return value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def backfill_order_snapshot(apps, schema_editor):
+    """Фиксирует позиции и суммы уже созданных заказов по текущим ценам"""
+    Order = apps.get_model('catalog', 'Order')
+    CartItem = apps.get_model('catalog', 'CartItem')
+    OrderItem = apps.get_model('catalog', 'OrderItem')
+    db = schema_editor.connection.alias
+
+    for order in Order.objects.using(db).filter(cart__isnull=False, items__isnull=True).iterator():
+        items = []
+        subtotal = Decimal('0')
+        for cart_item in CartItem.objects.using(db).filter(cart_id=order.cart_id).select_related('lamp').order_by('id'):
+            tier, unit_price = price_tier(cart_item.lamp, cart_item.quantity)
+            line_total = unit_price * cart_item.quantity
+            subtotal += line_total
+            items.append(OrderItem(
+                order=order,
+                lamp=cart_item.lamp,
+                article=cart_item.lamp.article,
+                brand=cart_item.lamp.brand,
+                quantity=cart_item.quantity,
+                price_tier=tier,
+                unit_price=unit_price,
+                line_total=line_total,
+            ))
+        OrderItem.objects.using(db).bulk_create(items)
+
+        total = subtotal
+        for threshold, factor in DISCOUNT_TIERS:
+            if subtotal >= threshold:
+                total = subtotal * factor
+                break
+        order.subtotal = money(subtotal)
+        order.total = money(total)
+        order.discount = order.subtotal - order.total
+        order.save(update_fields=['subtotal', 'discount', 'total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_order_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_order_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 19:31
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_items(apps, schema_editor):
+    """Одинаковые лампы в одной корзине сводятся в одну позицию с суммой количеств"""
+    CartItem = apps.get_model('catalog', 'CartItem')
+    db = schema_editor.connection.alias
+    duplicates = (
+        CartItem.objects.using(db)
+        .values('cart_id', 'lamp_id')
+        .annotate(items=Count('id'), keep_id=Min('id'), total=Sum('quantity'))
+        .filter(items__gt=1)
+    )
+    for duplicate in duplicates:
+        CartItem.objects.using(db).filter(id=duplicate['keep_id']).update(quantity=duplicate['total'])
+        CartItem.objects.using(db).filter(
+            cart_id=duplicate['cart_id'], lamp_id=duplicate['lamp_id'],
+        ).exclude(id=duplicate['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_backfill_order_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'lamp'), name='cart_item_unique_lamp'),
+        ),
+    ]
@@ -1,7 +1,13 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
+from django.db import IntegrityError, router, transaction
+from django.db.models import F, Sum, Value, OuterRef, Subquery, DecimalField
+from django.db.models.functions import Coalesce
 from decimal import Decimal
+from .pricing import (
+    apply_discount, quantize_money, summarize_cart, unit_price_expression, discounted_total_expression,
+)
 
 
 class LampType(models.Model):
@@ -32,34 +38,59 @@ class Lamp(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def get_price_for_quantity(self, quantity=1):
+    PRICE_TIER_CHOICES = [
+        ('retail', 'Розница'),
+        ('small_wholesale', 'Мелкий опт'),
+        ('large_wholesale', 'Крупный опт'),
+    ]
+
+    def get_price_tier(self, quantity=1):
+        """Returns the price tier and the unit price applied to the given quantity."""
         if self.large_wholesale_price and self.large_wholesale_quantity and quantity >= self.large_wholesale_quantity:
-            return self.large_wholesale_price
+            return 'large_wholesale', self.large_wholesale_price
         elif self.small_wholesale_price and self.small_wholesale_quantity and quantity >= self.small_wholesale_quantity:
-            return self.small_wholesale_price
-        return self.price
+            return 'small_wholesale', self.small_wholesale_price
+        return 'retail', self.price
+
+    def get_price_for_quantity(self, quantity=1):
+        return self.get_price_tier(quantity)[1]
 
     def __str__(self):
         return f"{self.brand} - {self.article}"
 
-    def get_current_group_display(self):
+    @classmethod
+    def get_group_display(cls, group_by, value):
         """
-        Returns the display value for the current grouping field.
-        This method is used in the template to display the group header.
+        Returns the display value of a grouping field value.
+        This method is used to display group headers in the catalog.
         """
-        if hasattr(self, '_current_group'):
-            if self._current_group == 'lamp_type':
-                return self.get_lamp_type_display()
-            elif self._current_group == 'has_dimmer':
-                return 'С диммером' if self.has_dimmer else 'Без диммера'
-            elif self._current_group == 'color':
-                return self.color
+        if group_by == 'lamp_type':
+            return dict(cls.TYPE_CHOICES).get(value, value)
+        elif group_by == 'has_dimmer':
+            return 'С диммером' if value else 'Без диммера'
+        elif group_by == 'color':
+            return value
         return ''
 
     class Meta:
         verbose_name = 'Лампа'
         verbose_name_plural = 'Лампы'
         ordering = ['-created_at']
+        indexes = [
+            # Сортировки каталога; id - уникальный ключ курсорной пагинации
+            models.Index(fields=['brand', 'id'], name='lamp_brand_idx'),
+            models.Index(fields=['price', 'id'], name='lamp_price_idx'),
+            models.Index(fields=['power_watts', 'id'], name='lamp_power_idx'),
+            models.Index(fields=['height_cm', 'id'], name='lamp_height_idx'),
+            models.Index(fields=['color', 'id'], name='lamp_color_idx'),
+            models.Index(fields=['lamp_type', 'id'], name='lamp_type_idx'),
+            models.Index(fields=['created_at', 'id'], name='lamp_created_idx'),
+            # Фильтр по типу с самыми частыми сортировками
+            models.Index(fields=['lamp_type', 'brand', 'id'], name='lamp_type_brand_idx'),
+            models.Index(fields=['lamp_type', 'price', 'id'], name='lamp_type_price_idx'),
+            # Фильтр по диммеру вместе с диапазоном мощности
+            models.Index(fields=['has_dimmer', 'power_watts'], name='lamp_dimmer_power_idx'),
+        ]
 
 class UserProfile(models.Model):
     ROLE_CHOICES = [
@@ -75,30 +106,137 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.get_role_display()}"
 
+class CartQuerySet(models.QuerySet):
+    def active(self):
+        """Корзины, по которым еще не оформлен заказ"""
+        return self.filter(order__isnull=True)
+
+    def _active_for_user(self, user):
+        # С основной базы: по отставшей реплике была бы создана вторая корзина
+        return self.active().filter(user=user).order_by('-id').using(router.db_for_write(self.model))
+
+    def get_active(self, user):
+        """Возвращает текущую корзину пользователя, создавая ее при необходимости"""
+        cart = self._active_for_user(user).first()
+        return cart or self.create(user=user)
+
+    async def aget_active(self, user):
+        cart = await self._active_for_user(user).afirst()
+        return cart or await self.acreate(user=user)
+
 class Cart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CartQuerySet.as_manager()
     
     def get_total_price(self):
-        return sum(item.get_total_price() for item in self.items.all())
+        return sum(item.get_total_price() for item in self.items.select_related('lamp'))
     
     def get_total_price_with_discount(self):
-        total = self.get_total_price()
-        if total >= Decimal('100000'):  # 10% discount for orders over 100,000
-            return total * Decimal('0.9')
-        elif total >= Decimal('50000'):  # 5% discount for orders over 50,000
-            return total * Decimal('0.95')
-        return total
+        return apply_discount(self.get_total_price())
+
+    def add_item(self, lamp_id, quantity):
+        """
+        Увеличивает количество лампы в корзине одним UPDATE с F(), без чтения строки.
+        Если позиции еще нет, она создается; одновременная вставка той же лампы
+        упирается в уникальность (cart, lamp) и повторяется как увеличение.
+        """
+        items = CartItem.objects.filter(cart=self, lamp_id=lamp_id)
+        with transaction.atomic():
+            if items.update(quantity=F('quantity') + quantity):
+                return
+            try:
+                with transaction.atomic():
+                    CartItem.objects.create(cart=self, lamp_id=lamp_id, quantity=quantity)
+            except IntegrityError:
+                items.update(quantity=F('quantity') + quantity)
+
+    def set_quantities(self, quantities):
+        """
+        Устанавливает количества сразу для многих ламп: {lamp_id: количество}, 0 удаляет позицию.
+        Все изменения применяются в одной транзакции двумя запросами: вставка с обновлением
+        при конфликте по (cart, lamp) и удаление.
+        """
+        upserts = [
+            CartItem(cart=self, lamp_id=lamp_id, quantity=quantity)
+            for lamp_id, quantity in quantities.items() if quantity > 0
+        ]
+        removed = [lamp_id for lamp_id, quantity in quantities.items() if quantity <= 0]
+        with transaction.atomic():
+            if upserts:
+                CartItem.objects.bulk_create(
+                    upserts,
+                    update_conflicts=True,
+                    unique_fields=['cart', 'lamp'],
+                    update_fields=['quantity'],
+                )
+            if removed:
+                CartItem.objects.filter(cart=self, lamp_id__in=removed).delete()
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, related_name='items', on_delete=models.CASCADE)
     lamp = models.ForeignKey(Lamp, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'lamp'], name='cart_item_unique_lamp'),
+        ]
     
     def get_total_price(self):
         return self.lamp.get_price_for_quantity(self.quantity) * self.quantity
 
+class OrderQuerySet(models.QuerySet):
+    def create_from_cart(self, cart, sales_manager):
+        """
+        Создает заказ со снимком позиций корзины: уровень цены, цена, количество
+        и сумма строки сохраняются один раз и не зависят от последующих изменений цен.
+        """
+        summary = summarize_cart(cart)
+        with transaction.atomic(using=self.db):
+            order = self.create(
+                cart=cart,
+                sales_manager=sales_manager,
+                subtotal=quantize_money(summary.subtotal),
+                total=quantize_money(summary.total_with_discount),
+                discount=quantize_money(summary.subtotal) - quantize_money(summary.total_with_discount),
+            )
+            OrderItem.objects.using(self.db).bulk_create([
+                OrderItem(
+                    order=order,
+                    lamp=line.lamp,
+                    article=line.lamp.article,
+                    brand=line.lamp.brand,
+                    quantity=line.quantity,
+                    price_tier=line.tier,
+                    unit_price=line.unit_price,
+                    line_total=line.total,
+                )
+                for line in summary.lines
+            ])
+        return order
+
+    def with_cart_totals(self):
+        """
+        Аннотирует заказы суммой (cart_subtotal) и суммой со скидкой (cart_total),
+        вычисленными в SQL по позициям корзины заказа по текущим ценам ламп.
+        Для отчетов рядом с сохраненными subtotal и total: расхождение показывает,
+        насколько изменились цены после оформления заказа.
+        """
+        line_totals = (
+            CartItem.objects.filter(cart=OuterRef('cart'))
+            .values('cart')
+            .annotate(total=Sum(unit_price_expression() * F('quantity')))
+            .values('total')
+        )
+        output_field = DecimalField(max_digits=14, decimal_places=2)
+        return self.annotate(
+            cart_subtotal=Coalesce(Subquery(line_totals, output_field=output_field),
+                                   Value(Decimal('0'), output_field=output_field)),
+        ).annotate(cart_total=discounted_total_expression('cart_subtotal'))
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Ожидает обработки'),
@@ -113,6 +251,29 @@ class Order(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Суммы фиксируются при создании заказа
+    subtotal = models.DecimalField(decimal_places=2, max_digits=14, default=0, verbose_name='Сумма')
+    discount = models.DecimalField(decimal_places=2, max_digits=14, default=0, verbose_name='Скидка')
+    total = models.DecimalField(decimal_places=2, max_digits=14, default=0, verbose_name='Сумма со скидкой')
+
+    objects = OrderQuerySet.as_manager()
 
     def get_total_price(self):
-        return self.cart.get_total_price_with_discount() if self.cart else 0
+        return self.total
+
+    @property
+    def has_discount(self):
+        return self.discount != 0
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
+    lamp = models.ForeignKey(Lamp, on_delete=models.SET_NULL, null=True, blank=True)
+    article = models.CharField(max_length=50, verbose_name='Артикул')
+    brand = models.CharField(max_length=100, verbose_name='Марка')
+    quantity = models.PositiveIntegerField(verbose_name='Количество')
+    price_tier = models.CharField(max_length=20, choices=Lamp.PRICE_TIER_CHOICES, verbose_name='Уровень цены')
+    unit_price = models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Цена за единицу')
+    line_total = models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Сумма')
+
+    class Meta:
+        ordering = ['id']
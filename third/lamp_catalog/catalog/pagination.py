@@ -0,0 +1,219 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+
+CURSOR_SALT = 'catalog.pagination.cursor'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _serialize(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class KeysetPage:
+    """
+    Страница курсорной пагинации.
+    Повторяет интерфейс django.core.paginator.Page, насколько это возможно без номера страницы.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous, next_cursor, previous_cursor,
+                 preceding_key=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        # Ключ строки, стоящей непосредственно перед страницей, если он известен
+        self.preceding_key = preceding_key
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    """
+    Курсорная (keyset) пагинация: вместо OFFSET страница выбирается условием
+    по значениям ключей сортировки последней показанной строки, поэтому
+    стоимость любой страницы одинакова и не требует COUNT(*).
+
+    ordering - список полей в формате order_by ('brand', '-price').
+    К нему всегда добавляется id как уникальный ключ. NULL считается
+    меньше любого значения, независимо от СУБД.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.keys = []
+        for name in ordering:
+            descending = name.startswith('-')
+            field = name.lstrip('-')
+            if field == 'pk':
+                field = 'id'
+            self.keys.append((field, descending))
+            if field == 'id':
+                break
+        else:
+            last_descending = self.keys[-1][1] if self.keys else False
+            self.keys.append(('id', last_descending))
+        self.signature = [('-' if descending else '') + field for field, descending in self.keys]
+
+    def _is_nullable(self, field):
+        try:
+            return self.queryset.model._meta.get_field(field).null
+        except FieldDoesNotExist:
+            # Аннотации (например, ранг поиска) считаем непустыми
+            return False
+
+    def _order_by(self, reverse):
+        expressions = []
+        for field, descending in self.keys:
+            if descending != reverse:
+                expressions.append(F(field).desc(nulls_last=True))
+            else:
+                expressions.append(F(field).asc(nulls_first=True))
+        return expressions
+
+    def _follows(self, field, value, descending):
+        """Условие "строго после value" для одного ключа в заданном направлении."""
+        nullable = self._is_nullable(field)
+        if not descending:
+            if value is None:
+                return Q(**{f'{field}__isnull': False})
+            return Q(**{f'{field}__gt': value})
+        if value is None:
+            return None
+        condition = Q(**{f'{field}__lt': value})
+        if nullable:
+            condition |= Q(**{f'{field}__isnull': True})
+        return condition
+
+    def _after(self, values, reverse):
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(self.keys, values):
+            follows = self._follows(field, value, descending != reverse)
+            if follows is not None:
+                condition |= equal & follows
+            if value is None:
+                equal &= Q(**{f'{field}__isnull': True})
+            else:
+                equal &= Q(**{field: value})
+
+        # Избыточная граница по первому ключу позволяет СУБД искать по индексу диапазоном,
+        # а не просматривать индекс с начала
+        field, descending = self.keys[0]
+        value = values[0]
+        if value is not None:
+            if descending == reverse:
+                condition &= Q(**{f'{field}__gte': value})
+            elif not self._is_nullable(field):
+                condition &= Q(**{f'{field}__lte': value})
+        return condition
+
+    def row_key(self, row):
+        if isinstance(row, dict):
+            return [_serialize(row[field]) for field, descending in self.keys]
+        return [_serialize(getattr(row, field)) for field, descending in self.keys]
+
+    def encode_cursor(self, direction, row):
+        return signing.dumps(
+            {'o': self.signature, 'd': direction, 'v': self.row_key(row)},
+            salt=CURSOR_SALT,
+        )
+
+    def decode_cursor(self, cursor):
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+        except signing.BadSignature:
+            raise InvalidCursor('Неверный курсор')
+        if data.get('o') != self.signature or data.get('d') not in ('n', 'p') \
+                or len(data.get('v', [])) != len(self.keys):
+            raise InvalidCursor('Курсор не соответствует текущей сортировке')
+        return data['d'], data['v']
+
+    def _page_queryset(self, cursor):
+        direction, values = self.decode_cursor(cursor) if cursor else ('n', None)
+        reverse = direction == 'p'
+
+        queryset = self.queryset.order_by(*self._order_by(reverse))
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse))
+
+        # Одна лишняя строка показывает, есть ли данные дальше
+        return queryset[:self.per_page + 1], reverse, values
+
+    def _make_page(self, rows, reverse, values):
+        has_more = len(rows) > self.per_page
+        extra = rows[self.per_page:]
+        rows = rows[:self.per_page]
+
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+            preceding_key = self.row_key(extra[0]) if extra else None
+        else:
+            has_next, has_previous = has_more, values is not None
+            preceding_key = values
+
+        return KeysetPage(
+            rows,
+            self,
+            has_next=has_next and bool(rows),
+            has_previous=has_previous and bool(rows),
+            next_cursor=self.encode_cursor('n', rows[-1]) if has_next and rows else None,
+            previous_cursor=self.encode_cursor('p', rows[0]) if has_previous and rows else None,
+            preceding_key=preceding_key,
+        )
+
+    def page(self, cursor=None):
+        queryset, reverse, values = self._page_queryset(cursor)
+        return self._make_page(list(queryset), reverse, values)
+
+    async def apage(self, cursor=None):
+        """Асинхронный вариант page() для асинхронных представлений"""
+        queryset, reverse, values = self._page_queryset(cursor)
+        return self._make_page([row async for row in queryset], reverse, values)
+
+    def _count_queryset(self, limit):
+        # values('pk') убирает аннотации (например, ранг поиска) из подсчета:
+        # коррелированный подзапрос вычислялся бы для каждой из limit строк
+        return self.queryset.order_by().values('pk')[:limit + 1]
+
+    def approximate_count(self, limit):
+        """
+        Приблизительное количество строк: считает не больше limit строк,
+        поэтому стоимость ограничена. Возвращает (количество, точное ли оно).
+        """
+        count = self._count_queryset(limit).count()
+        return min(count, limit), count <= limit
+
+    async def aapproximate_count(self, limit):
+        count = await self._count_queryset(limit).acount()
+        return min(count, limit), count <= limit
@@ -0,0 +1,136 @@
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_HALF_UP
+from django.db.models import Case, When, Q, F, Value, DecimalField
+
+# Скидки на весь заказ: (минимальная сумма, множитель), от большей суммы к меньшей
+DISCOUNT_TIERS = [
+    (Decimal('100000'), Decimal('0.9')),  # 10% discount for orders over 100,000
+    (Decimal('50000'), Decimal('0.95')),  # 5% discount for orders over 50,000
+]
+
+
+def apply_discount(total):
+    for threshold, factor in DISCOUNT_TIERS:
+        if total >= threshold:
+            return total * factor
+    return total
+
+
+def quantize_money(value):
+    return Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def unit_price_expression(lamp='lamp', quantity='quantity'):
+    """
+    SQL-выражение цены за единицу с учетом оптовых цен.
+    Повторяет Lamp.get_price_for_quantity: уровень применяется, если заданы
+    ненулевые цена и порог и количество не меньше порога.
+    """
+    def tier(price_field, quantity_field):
+        return (
+            Q(**{f'{lamp}__{price_field}__isnull': False})
+            & ~Q(**{f'{lamp}__{price_field}': 0})
+            & Q(**{f'{lamp}__{quantity_field}__gt': 0})
+            & Q(**{f'{lamp}__{quantity_field}__lte': F(quantity)})
+        )
+    return Case(
+        When(tier('large_wholesale_price', 'large_wholesale_quantity'),
+             then=F(f'{lamp}__large_wholesale_price')),
+        When(tier('small_wholesale_price', 'small_wholesale_quantity'),
+             then=F(f'{lamp}__small_wholesale_price')),
+        default=F(f'{lamp}__price'),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+
+
+def discounted_total_expression(subtotal):
+    """SQL-выражение суммы со скидкой, аналог apply_discount для аннотации subtotal"""
+    output_field = DecimalField(max_digits=14, decimal_places=2)
+    return Case(
+        *[When(**{f'{subtotal}__gte': threshold},
+               then=F(subtotal) * Value(factor, output_field=output_field))
+          for threshold, factor in DISCOUNT_TIERS],
+        default=F(subtotal),
+        output_field=output_field,
+    )
+
+
+@dataclass
+class CartLine:
+    item: object
+    lamp: object
+    quantity: int
+    unit_price: Decimal
+    total: Decimal
+    tier: str = 'retail'
+
+
+@dataclass
+class CartSummary:
+    lines: list = field(default_factory=list)
+    subtotal: Decimal = Decimal('0')
+    total_with_discount: Decimal = Decimal('0')
+
+    @property
+    def is_empty(self):
+        return not self.lines
+
+    @property
+    def discount(self):
+        return self.subtotal - self.total_with_discount
+
+    @property
+    def has_discount(self):
+        return self.total_with_discount != self.subtotal
+
+    def as_dict(self):
+        """Представление для JSON-ответов; суммы передаются строками без потери точности"""
+        return {
+            'items': [
+                {
+                    'id': line.item.id,
+                    'lamp': line.lamp.id,
+                    'article': line.lamp.article,
+                    'quantity': line.quantity,
+                    'price_tier': line.tier,
+                    'unit_price': str(line.unit_price),
+                    'total': str(line.total),
+                }
+                for line in self.lines
+            ],
+            'subtotal': str(quantize_money(self.subtotal)),
+            'discount': str(quantize_money(self.discount)),
+            'total_with_discount': str(quantize_money(self.total_with_discount)),
+        }
+
+
+def cart_items(cart):
+    return cart.items.select_related('lamp').order_by('id')
+
+
+def summarize_items(items):
+    lines = []
+    subtotal = Decimal('0')
+    for item in items:
+        tier, unit_price = item.lamp.get_price_tier(item.quantity)
+        total = unit_price * item.quantity
+        lines.append(CartLine(item, item.lamp, item.quantity, unit_price, total, tier))
+        subtotal += total
+    return CartSummary(lines, subtotal, apply_discount(subtotal))
+
+
+def summarize_cart(cart):
+    """
+    Рассчитывает корзину за один проход: позиции загружаются одним запросом вместе с лампами,
+    цены строк, сумма и скидка вычисляются один раз и передаются в шаблон готовыми.
+    """
+    if cart is None:
+        return CartSummary()
+    return summarize_items(cart_items(cart))
+
+
+async def asummarize_cart(cart):
+    """Асинхронный вариант summarize_cart(): позиции загружаются асинхронной итерацией"""
+    if cart is None:
+        return CartSummary()
+    return summarize_items([item async for item in cart_items(cart)])
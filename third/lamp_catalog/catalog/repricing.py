@@ -0,0 +1,118 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .filters import filter_lamps
+from .models import Lamp
+from .pricing import quantize_money
+
+# Цены, которые можно менять массово
+REPRICE_FIELDS = [
+    ('price', 'Цена за единицу'),
+    ('small_wholesale_price', 'Цена мелкого опта'),
+    ('large_wholesale_price', 'Цена крупного опта'),
+]
+REPRICE_MODES = [
+    ('percent', 'Процент'),
+    ('absolute', 'Сумма, ₽'),
+]
+PREVIEW_ROWS = 50
+# Цена после изменения должна помещаться в поле (max_digits=10, decimal_places=2)
+MAX_PRICE = Decimal('99999999.99')
+
+
+class RepricingError(Exception):
+    pass
+
+
+def select_lamps(params):
+    """Лампы для изменения цен: фильтры каталога, марка - без учета регистра"""
+    brand = params.get('brand')
+    queryset = filter_lamps(Lamp.objects.all(), dict(params, brand=None), rank=False)
+    if brand:
+        queryset = queryset.filter(brand__iexact=brand)
+    return queryset
+
+
+class Repricing:
+    """
+    Массовое изменение цен выбранных ламп на процент или сумму.
+    Новые цены вычисляются в базе одним выражением: предпросмотр и применение
+    используют одно и то же выражение, поэтому показанные цены совпадают с записанными.
+    Пустые оптовые цены остаются пустыми.
+    """
+
+    def __init__(self, queryset, fields, mode, amount):
+        self.queryset = queryset
+        self.fields = list(fields)
+        self.mode = mode
+        self.amount = Decimal(amount)
+
+    def new_price(self, field):
+        output_field = DecimalField(max_digits=10, decimal_places=2)
+        if self.mode == 'percent':
+            factor = (Decimal(100) + self.amount) / Decimal(100)
+            value = F(field) * Value(factor, output_field=DecimalField())
+        else:
+            value = F(field) + Value(self.amount, output_field=DecimalField())
+        return Round(value, 2, output_field=output_field)
+
+    def annotated(self):
+        return self.queryset.annotate(**{f'new_{field}': self.new_price(field) for field in self.fields})
+
+    def summary(self):
+        """Количество ламп, изменяемых цен, недопустимых результатов и суммы цен до и после"""
+        aggregates = {'lamps': Count('id')}
+        invalid = Q()
+        for field in self.fields:
+            new_field = f'new_{field}'
+            aggregates[f'{field}_changed'] = Count('id', filter=Q(**{f'{field}__isnull': False}))
+            aggregates[f'{field}_sum'] = Sum(field)
+            aggregates[f'{new_field}_sum'] = Sum(new_field)
+            invalid |= Q(**{f'{new_field}__lte': 0}) | Q(**{f'{new_field}__gt': MAX_PRICE})
+        aggregates['invalid'] = Count('id', filter=invalid)
+        summary = self.annotated().order_by().aggregate(**aggregates)
+        for name, value in summary.items():
+            if name.endswith('_sum') and value is not None:
+                summary[name] = quantize_money(value)
+        return summary
+
+    def preview(self, limit=PREVIEW_ROWS):
+        """Первые limit ламп с текущими и новыми ценами"""
+        new_fields = [f'new_{field}' for field in self.fields]
+        rows = list(self.annotated().order_by('id').values('id', 'article', 'brand', *self.fields, *new_fields)[:limit])
+        # Результат выражения приходит из SQLite без масштаба (270 вместо 270.00)
+        for row in rows:
+            for name in new_fields:
+                if row[name] is not None:
+                    row[name] = quantize_money(row[name])
+        return rows
+
+    def apply(self, expected_count=None):
+        """
+        Записывает новые цены одним UPDATE в транзакции и инвалидирует кэш каталога.
+        expected_count - количество ламп из предпросмотра: если выборка с тех пор
+        изменилась, цены не меняются. Возвращает количество обновленных ламп.
+        """
+        with transaction.atomic():
+            summary = self.summary()
+            if expected_count is not None and summary['lamps'] != expected_count:
+                raise RepricingError(
+                    f'Выборка изменилась после предпросмотра: {summary["lamps"]} ламп вместо {expected_count}'
+                )
+            if summary['invalid']:
+                raise RepricingError(
+                    f'У {summary["invalid"]} ламп цена стала бы неположительной или слишком большой'
+                )
+            updated = self.queryset.order_by().update(
+                updated_at=timezone.now(),
+                **{field: self.new_price(field) for field in self.fields},
+            )
+            # Сигналы при update() не отправляются; поисковый индекс цены не содержит
+            bump_catalog_version()
+            transaction.on_commit(bump_catalog_version)
+        return updated
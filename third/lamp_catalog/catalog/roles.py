@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import UserProfile
+
+ROLE_KEY = 'catalog:role:{user_id}'
+# Роль анонимного пользователя и пользователя без профиля; проверки ролей для них не проходят
+NO_ROLE = ''
+# Сколько секунд роль хранится в кэше. Изменение профиля сбрасывает ее сразу, а срок
+# ограничивает ошибку, если сброс не дошел (например, до кэша другого процесса)
+DEFAULT_ROLE_TIMEOUT = 60
+
+
+def get_role_timeout():
+    return getattr(settings, 'CATALOG_ROLE_CACHE_TIMEOUT', DEFAULT_ROLE_TIMEOUT)
+
+
+def get_user_role(user):
+    """
+    Роль пользователя: один раз за запрос (значение запоминается на объекте пользователя),
+    между запросами - из общего кэша, который сбрасывается при изменении UserProfile.
+    """
+    if user is None or not user.is_authenticated:
+        return NO_ROLE
+    try:
+        return user._catalog_role
+    except AttributeError:
+        pass
+
+    key = ROLE_KEY.format(user_id=user.pk)
+    role = cache.get(key)
+    if role is None:
+        role = UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).first() or NO_ROLE
+        cache.set(key, role, get_role_timeout())
+    user._catalog_role = role
+    return role
+
+
+async def aget_user_role(user):
+    """Асинхронный вариант get_user_role(); после него request.role не обращается к базе"""
+    if user is None or not user.is_authenticated:
+        return NO_ROLE
+    try:
+        return user._catalog_role
+    except AttributeError:
+        pass
+
+    key = ROLE_KEY.format(user_id=user.pk)
+    role = await cache.aget(key)
+    if role is None:
+        role = await UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).afirst() or NO_ROLE
+        await cache.aset(key, role, get_role_timeout())
+    user._catalog_role = role
+    return role
+
+
+def forget_user_role(user_id):
+    cache.delete(ROLE_KEY.format(user_id=user_id))
@@ -0,0 +1,136 @@
+"""
+Чтение каталога с реплик.
+
+ReplicaRouter отправляет чтения содержимого каталога (лампы и их типы - REPLICA_MODELS)
+на случайную реплику из settings.CATALOG_READ_REPLICAS, а все записи - на основную базу
+'default'. Профили (роли), корзины и заказы всегда читаются с основной базы: устаревшая
+роль с отставшей реплики попала бы в общий кэш ролей, а корзина - породила бы дубликат.
+Реплики используются только внутри запроса, обернутого ReplicaPinMiddleware:
+управляющие команды и фоновые задачи читают с основной базы.
+
+Чтение своих записей. Запрос с небезопасным методом (POST и т.п.) целиком идет на основную
+базу. Запрос, который что-то записал (INSERT/UPDATE/DELETE на основной базе - это отслеживает
+обертка record_write над соединением), с этого момента читает с основной базы и ставит cookie,
+по которой следующие CATALOG_PIN_SECONDS секунд все чтения пользователя тоже идут на основную
+базу - корзина и заказы сразу видят только что добавленное. Окно должно быть больше
+типичного отставания реплик. Внутри транзакции на основной базе чтения тоже идут на нее.
+
+Кэш страниц каталога сбрасывается при коммите изменения, поэтому запрос другого пользователя
+к отставшей реплике может закэшировать устаревшую страницу до истечения CATALOG_CACHE_TIMEOUT.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'catalog_primary_until'
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    """Состояние маршрутизации текущего запроса"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# Изменяемый объект, а не флаг: sync_to_async выполняет код в копии контекста,
+# и запись, сделанная там, должна быть видна асинхронному middleware
+_routing_state = ContextVar('catalog_routing_state', default=None)
+
+
+@contextmanager
+def request_routing(pinned=False):
+    """Разрешает чтение с реплик внутри блока; pinned - сразу читать с основной базы"""
+    state = RoutingState(pinned)
+    token = _routing_state.set(state)
+    try:
+        yield state
+    finally:
+        _routing_state.reset(token)
+
+
+def record_write(execute, sql, params, many, context):
+    """Обертка выполнения запросов основной базы: после записи запрос читает с нее же"""
+    state = _routing_state.get()
+    if state is not None and not state.wrote and sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        state.wrote = state.pinned = True
+    return execute(sql, params, many, context)
+
+
+# Редко изменяемое содержимое каталога, которое можно читать с отстающей реплики
+REPLICA_MODELS = {'catalog.lamp', 'catalog.lamptype'}
+
+
+def is_catalog_model(model):
+    return model._meta.app_label == 'catalog'
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not is_catalog_model(model):
+            return None
+        if model._meta.label_lower not in REPLICA_MODELS:
+            return DEFAULT_DB_ALIAS
+        state = _routing_state.get()
+        replicas = settings.CATALOG_READ_REPLICAS
+        if state is None or state.pinned or not replicas or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Явно 'default': иначе объект, прочитанный с реплики, сохранился бы на нее
+        return DEFAULT_DB_ALIAS if is_catalog_model(model) else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.CATALOG_READ_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaPinMiddleware:
+    """
+    Включает чтение с реплик для запроса и закрепляет пользователя за основной базой
+    на CATALOG_PIN_SECONDS после записи (см. ReplicaRouter). Ставится в начало списка.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_routing(self.is_pinned(request)) as state:
+            response = self.get_response(request)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        with request_routing(self.is_pinned(request)) as state:
+            response = await self.get_response(request)
+        return self.pin(response, state)
+
+    def is_pinned(self, request):
+        if request.method not in SAFE_METHODS:
+            return True
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0)) > time()
+        except ValueError:
+            return False
+
+    def pin(self, response, state):
+        if state.wrote:
+            seconds = settings.CATALOG_PIN_SECONDS
+            response.set_cookie(PIN_COOKIE, f'{time() + seconds:.0f}', max_age=seconds,
+                                httponly=True, samesite='Lax')
+        return response
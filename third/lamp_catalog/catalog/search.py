@@ -0,0 +1,153 @@
+import re
+import sqlite3
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Q, Value, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Lamp
+
+DEFAULT_SEARCH_BACKEND = 'catalog.search.DatabaseSearchBackend'
+
+
+def get_search_backend():
+    """Возвращает поисковый бэкенд, указанный в settings.CATALOG_SEARCH_BACKEND"""
+    backend_class = import_string(getattr(settings, 'CATALOG_SEARCH_BACKEND', DEFAULT_SEARCH_BACKEND))
+    return backend_class()
+
+
+class BaseSearchBackend:
+    """
+    Интерфейс поискового бэкенда каталога.
+    search() фильтрует выборку ламп и аннотирует ее полем search_rank
+    (чем меньше значение, тем релевантнее лампа). С rank=False выборка только
+    фильтруется - для списков, которые не сортируются по релевантности.
+    """
+
+    def search(self, queryset, query, rank=True):
+        raise NotImplementedError
+
+    def index(self, lamps):
+        """Добавляет или обновляет лампы в индексе"""
+        raise NotImplementedError
+
+    def remove(self, lamp_ids):
+        """Удаляет лампы из индекса"""
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Полностью перестраивает индекс, возвращает количество проиндексированных ламп"""
+        raise NotImplementedError
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Поиск подстрокой без индекса. Работает на любой СУБД."""
+
+    def search(self, queryset, query, rank=True):
+        queryset = queryset.filter(
+            Q(article__icontains=query) |
+            Q(brand__icontains=query) |
+            Q(description__icontains=query)
+        )
+        if not rank:
+            return queryset
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def index(self, lamps):
+        pass
+
+    def remove(self, lamp_ids):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    Полнотекстовый поиск на SQLite FTS5.
+    Индекс хранится в виртуальной таблице catalog_lamp_fts, rowid которой совпадает с id лампы.
+    Ранжирование - bm25 с весами колонок: артикул важнее марки, марка важнее описания.
+    """
+
+    table = 'catalog_lamp_fts'
+    weights = (10.0, 5.0, 1.0)
+    batch_size = 500
+
+    def get_connection(self):
+        return connections[router.db_for_write(Lamp)]
+
+    def build_match(self, query):
+        """
+        Превращает пользовательский запрос в выражение FTS5.
+        Все слова обязательны; по артикулу слово ищется как префикс.
+        """
+        terms = []
+        for token in re.findall(r'\w+', query.lower()):
+            terms.append(f'("{token}" OR article : "{token}"*)')
+        return ' AND '.join(terms)
+
+    def search(self, queryset, query, rank=True):
+        match = self.build_match(query)
+        if not match:
+            if not rank:
+                return queryset.none()
+            return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+        lamp_table = Lamp._meta.db_table
+        weights = ', '.join(str(weight) for weight in self.weights)
+        queryset = queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match])
+        )
+        # Ранг без сортировки по нему не нужен
+        if not rank:
+            return queryset
+        # Ранги всех найденных строк считаются одним проходом MATCH и материализуются,
+        # а для каждой лампы берутся по rowid. Подзапрос MATCH на каждую строку (и CTE без
+        # MATERIALIZED, которую SQLite подставляет в него же) на 100 тыс. ламп стоит секунды
+        materialized = 'MATERIALIZED' if sqlite3.sqlite_version_info >= (3, 35) else ''
+        return queryset.annotate(search_rank=RawSQL(
+            f'WITH ranks AS {materialized} ('
+            f'SELECT rowid AS id, bm25({self.table}, {weights}) AS rank FROM {self.table} '
+            f'WHERE {self.table} MATCH %s'
+            f') SELECT rank FROM ranks WHERE ranks.id = {lamp_table}.id',
+            [match],
+            output_field=FloatField(),
+        ))
+
+    def index(self, lamps):
+        rows = [(lamp.id, lamp.article, lamp.brand, lamp.description) for lamp in lamps]
+        with self.get_connection().cursor() as cursor:
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                placeholders = ', '.join(['%s'] * len(batch))
+                cursor.execute(
+                    f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})',
+                    [row[0] for row in batch],
+                )
+                cursor.executemany(
+                    f'INSERT INTO {self.table} (rowid, article, brand, description) VALUES (%s, %s, %s, %s)',
+                    batch,
+                )
+
+    def remove(self, lamp_ids):
+        lamp_ids = list(lamp_ids)
+        with self.get_connection().cursor() as cursor:
+            for start in range(0, len(lamp_ids), self.batch_size):
+                batch = lamp_ids[start:start + self.batch_size]
+                placeholders = ', '.join(['%s'] * len(batch))
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', batch)
+
+    def rebuild(self):
+        lamp_table = Lamp._meta.db_table
+        connection = self.get_connection()
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, article, brand, description) '
+                f'SELECT id, article, brand, description FROM {lamp_table}'
+            )
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+            cursor.execute(f'SELECT COUNT(*) FROM {self.table}')
+            return cursor.fetchone()[0]
@@ -0,0 +1,56 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.backends.signals import connection_created
+
+from .cache import bump_catalog_version, forget_lamp
+from .instrumentation import record_query
+from .models import Lamp, UserProfile
+from .roles import forget_user_role
+from .routers import record_write
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=Lamp)
+def index_lamp(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Lamp)
+def unindex_lamp(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(post_save, sender=Lamp)
+@receiver(post_delete, sender=Lamp)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    # Сразу - чтобы изменение было видно в этом же запросе, и после фиксации транзакции -
+    # чтобы параллельный запрос не успел закэшировать данные до коммита
+    pk = instance.pk
+    forget_lamp(pk)
+    bump_catalog_version()
+    transaction.on_commit(lambda: forget_lamp(pk))
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_user_role(sender, instance, **kwargs):
+    forget_user_role(instance.user_id)
+    transaction.on_commit(lambda: forget_user_role(instance.user_id))
+
+
+@receiver(connection_created)
+def track_primary_writes(sender, connection, **kwargs):
+    # В начало списка: execute_wrapper() снимает с конца только свою обертку.
+    # Сигнал приходит при каждом переподключении, а список обертка переживает
+    if connection.alias == DEFAULT_DB_ALIAS and record_write not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_write)
+
+
+@receiver(connection_created)
+def instrument_queries(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
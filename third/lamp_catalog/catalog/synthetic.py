@@ -0,0 +1,135 @@
+"""
+Синтетические данные для тестов производительности: лампы с оптовыми ценами, пользователи
+всех ролей, корзины и заказы. Все создается пакетными вставками без сигналов сохранения,
+поэтому поисковый индекс заполняется явно, а кэш каталога сбрасывается в конце.
+"""
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .cache import bump_catalog_version
+from .models import Lamp, UserProfile, Cart, CartItem, Order, OrderItem
+from .pricing import quantize_money, summarize_items
+from .search import get_search_backend
+
+DEFAULT_BATCH_SIZE = 1000
+TYPES = [code for code, label in Lamp.TYPE_CHOICES]
+ROLES = [code for code, label in UserProfile.ROLE_CHOICES]
+STATUSES = [code for code, label in Order.STATUS_CHOICES]
+COLORS = ['White', 'Black', 'Brass', 'Chrome', 'Bronze', 'Green', 'Red', 'Blue']
+BRANDS = 50
+# Количества в позициях: чаще розница, иногда мелкий и крупный опт
+QUANTITIES = (1, 1, 1, 2, 3, 5, 10, 20, 100)
+
+
+def make_lamp(index, prefix, rng):
+    price = rng.randint(500, 20000)
+    lamp = Lamp(
+        article=f'{prefix}{index:08d}',
+        brand=f'Brand {index % BRANDS}',
+        lamp_type=TYPES[index % len(TYPES)],
+        has_dimmer=rng.random() < 0.4,
+        power_watts=rng.randint(5, 200),
+        height_cm=rng.randint(20, 180) if rng.random() < 0.8 else None,
+        color=rng.choice(COLORS),
+        price=price,
+        description=f'Лампа {index}: {rng.choice(COLORS).lower()} абажур, цоколь E{rng.choice([14, 27])}',
+    )
+    if rng.random() < 0.7:
+        lamp.small_wholesale_price = price * 9 // 10
+        lamp.small_wholesale_quantity = 10
+        lamp.large_wholesale_price = price * 8 // 10
+        lamp.large_wholesale_quantity = 100
+    return lamp
+
+
+@transaction.atomic
+def generate_lamps(count, prefix='SYN', batch_size=DEFAULT_BATCH_SIZE, seed=0):
+    """Создает count ламп с артикулами prefix00000000...; возвращает их id"""
+    rng = random.Random(seed)
+    backend = get_search_backend()
+    ids = []
+    for start in range(0, count, batch_size):
+        lamps = [make_lamp(index, prefix, rng) for index in range(start, min(start + batch_size, count))]
+        Lamp.objects.bulk_create(lamps)
+        backend.index(lamps)
+        ids.extend(lamp.id for lamp in lamps)
+    bump_catalog_version()
+    return ids
+
+
+@transaction.atomic
+def generate_users(per_role, prefix='synuser', password='password', roles=ROLES):
+    """Создает per_role пользователей каждой роли; возвращает {роль: [пользователи]}"""
+    password_hash = make_password(password)
+    users = {
+        role: [User(username=f'{prefix}_{role}_{index}', password=password_hash) for index in range(per_role)]
+        for role in roles
+    }
+    User.objects.bulk_create([user for role_users in users.values() for user in role_users])
+    UserProfile.objects.bulk_create([
+        UserProfile(user=user, role=role) for role, role_users in users.items() for user in role_users
+    ])
+    return users
+
+
+@transaction.atomic
+def generate_carts(users, lamp_ids, items_per_cart, batch_size=DEFAULT_BATCH_SIZE, seed=0):
+    """Активная корзина с items_per_cart разными лампами для каждого пользователя"""
+    rng = random.Random(seed)
+    carts = Cart.objects.bulk_create([Cart(user=user) for user in users])
+    CartItem.objects.bulk_create(
+        [
+            CartItem(cart=cart, lamp_id=lamp_id, quantity=rng.choice(QUANTITIES))
+            for cart in carts
+            for lamp_id in rng.sample(lamp_ids, min(items_per_cart, len(lamp_ids)))
+        ],
+        batch_size=batch_size,
+    )
+    return carts
+
+
+@transaction.atomic
+def generate_orders(sales_managers, count, lamp_ids, items_per_order=5,
+                    batch_size=DEFAULT_BATCH_SIZE, seed=0):
+    """
+    count оформленных заказов, распределенных между менеджерами. Позиции и суммы
+    рассчитываются так же, как в Order.objects.create_from_cart.
+    """
+    rng = random.Random(seed)
+    lamps = list(Lamp.objects.filter(id__in=rng.sample(lamp_ids, min(1000, len(lamp_ids)))))
+    for start in range(0, count, batch_size):
+        summaries = []
+        orders = []
+        for index in range(start, min(start + batch_size, count)):
+            summary = summarize_items([
+                CartItem(lamp=lamp, quantity=rng.choice(QUANTITIES))
+                for lamp in rng.sample(lamps, min(items_per_order, len(lamps)))
+            ])
+            subtotal = quantize_money(summary.subtotal)
+            total = quantize_money(summary.total_with_discount)
+            summaries.append(summary)
+            orders.append(Order(
+                sales_manager=sales_managers[index % len(sales_managers)],
+                status=rng.choice(STATUSES),
+                subtotal=subtotal,
+                total=total,
+                discount=subtotal - total,
+            ))
+        Order.objects.bulk_create(orders)
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                lamp=line.lamp,
+                article=line.lamp.article,
+                brand=line.lamp.brand,
+                quantity=line.quantity,
+                price_tier=line.tier,
+                unit_price=line.unit_price,
+                line_total=line.total,
+            )
+            for order, summary in zip(orders, summaries)
+            for line in summary.lines
+        ])
@@ -0,0 +1,108 @@
+import gzip
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from ..models import Lamp
+from decimal import Decimal
+
+
+class LampApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(25):
+            Lamp.objects.create(
+                article=f'API{i:03d}',
+                brand=f'Brand {i % 4}',
+                has_dimmer=i % 2 == 0,
+                power_watts=20 + i,
+                color='White',
+                lamp_type='table' if i < 15 else 'floor',
+                description='Длинное описание лампы',
+                price=Decimal('100.50') + i,
+            )
+        self.client = Client()
+        self.url = reverse('catalog:api_lamp_list')
+
+    def get_json(self, params=None, **headers):
+        response = self.client.get(self.url, params or {}, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response, json.loads(response.content)
+
+    def test_fields_and_cursor_pagination(self):
+        params = {'fields': 'article,price', 'limit': 10, 'sort_by': 'price', 'sort_order': 'desc'}
+        with self.assertNumQueries(1):
+            response, data = self.get_json(params)
+        self.assertEqual(response['X-Catalog-Cache'], 'miss')
+        self.assertEqual(data['results'][0], {'id': Lamp.objects.get(article='API024').id,
+                                              'article': 'API024', 'price': '124.50'})
+        self.assertIsNone(data['previous'])
+
+        articles = []
+        while True:
+            articles += [row['article'] for row in data['results']]
+            if not data['next']:
+                break
+            data = json.loads(self.client.get(data['next']).content)
+        self.assertEqual(articles, [f'API{i:03d}' for i in range(24, -1, -1)])
+
+        # Повторный запрос - из кэша, без обращений к базе
+        with self.assertNumQueries(0):
+            response, data = self.get_json(params)
+        self.assertEqual(response['X-Catalog-Cache'], 'hit')
+
+    def test_reuses_list_filters_and_default_fields(self):
+        response, data = self.get_json({'lamp_type': 'floor', 'min_power': '40', 'limit': 100})
+        self.assertEqual(
+            [row['article'] for row in data['results']],
+            list(Lamp.objects.filter(lamp_type='floor', power_watts__gte=40)
+                 .order_by('brand', 'id').values_list('article', flat=True)),
+        )
+        self.assertNotIn('description', data['results'][0])
+        self.assertEqual(data['results'][0]['lamp_type'], 'floor')
+
+    def test_invalid_parameters(self):
+        for params in [{'fields': 'article,password'}, {'limit': '0'}, {'limit': 'all'}, {'cursor': 'broken'},
+                       {'min_power': 'abc'}, {'max_power': '1.5'}, {'min_power': '-5'},
+                       {'max_power': '9' * 30}, {'has_dimmer': 'false'}, {'has_dimmer': 'maybe'}]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn('error', json.loads(response.content))
+
+    def test_boolean_filter(self):
+        response, data = self.get_json({'has_dimmer': 'true', 'limit': 100})
+        self.assertEqual(len(data['results']), 13)
+        self.assertTrue(all(row['has_dimmer'] for row in data['results']))
+
+    def test_catalog_page_ignores_invalid_power(self):
+        response = self.client.get(reverse('catalog:lamp_list'), {'min_power': 'abc', 'max_power': '1.5'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_compression_and_conditional_requests(self):
+        plain, data = self.get_json({'limit': 20})
+        response = self.client.get(self.url, {'limit': 20}, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(json.loads(gzip.decompress(response.content)), data)
+
+        response = self.client.get(self.url, {'limit': 20}, HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        # После изменения лампы ответ строится заново
+        lamp = Lamp.objects.get(article='API000')
+        lamp.price = Decimal('1.00')
+        lamp.save()
+        response = self.client.get(self.url, {'limit': 20}, HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Catalog-Cache'], 'miss')
+
+    def test_detail(self):
+        lamp = Lamp.objects.get(article='API003')
+        response = self.client.get(reverse('catalog:api_lamp_detail', args=[lamp.id]),
+                                   {'fields': 'article,description'})
+        self.assertEqual(json.loads(response.content),
+                         {'id': lamp.id, 'article': 'API003', 'description': 'Длинное описание лампы'})
+        response = self.client.get(reverse('catalog:api_lamp_detail', args=[lamp.id + 1000]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,123 @@
+import asyncio
+import json
+from contextlib import ExitStack
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+from ..models import Lamp, Cart, CartItem, UserProfile
+from ..urls import get_urlpatterns
+from lamp_catalog import urls as project_urls
+from decimal import Decimal
+
+# Маршруты как под ASGI: каталог, корзина и API - асинхронные представления
+urlpatterns = [
+    path('', include((get_urlpatterns(async_views=True), 'catalog'))),
+    *[pattern for pattern in project_urls.urlpatterns if getattr(pattern, 'app_name', None) != 'catalog'],
+]
+
+
+def forbid_in_event_loop(method):
+    """Синхронный метод кэша, который падает при вызове из цикла событий (а не из потока)"""
+    def wrapper(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return method(*args, **kwargs)
+        raise AssertionError(f'Синхронный cache.{method.__name__}() в цикле событий')
+    return wrapper
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(15):
+            Lamp.objects.create(
+                article=f'AS{i:03d}',
+                brand=f'Brand {i % 3}',
+                has_dimmer=i % 2 == 0,
+                power_watts=40 + i,
+                color='White' if i % 2 else 'Black',
+                lamp_type='table' if i < 10 else 'floor',
+                price=Decimal('200.00') + i,
+            )
+        self.user = User.objects.create_user(username='manager', password='secret')
+        UserProfile.objects.create(user=self.user, role='sales_manager')
+
+    async def test_lamp_list(self):
+        url = reverse('catalog:lamp_list')
+        response = await self.async_client.get(url, {'lamp_type': 'floor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Catalog-Cache'], 'miss')
+        self.assertEqual([lamp.article for lamp in response.context['lamps']],
+                         ['AS012', 'AS010', 'AS013', 'AS011', 'AS014'])
+        self.assertContains(response, 'Напольная (5)')
+
+        response = await self.async_client.get(url, {'lamp_type': 'floor'})
+        self.assertEqual(response['X-Catalog-Cache'], 'hit')
+        self.assertContains(response, 'AS014')
+
+        # Курсорная пагинация с группировкой и приблизительным количеством
+        response = await self.async_client.get(url, {'pagination': 'cursor', 'group_by': 'color'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['lamp_count'], 15)
+        self.assertEqual([group['count'] for group in response.context['lamp_groups']], [8, 7])
+        response = await self.async_client.get(url, {'pagination': 'cursor', 'cursor': 'broken'})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_lamp_detail_and_cart_for_logged_in_user(self):
+        await self.async_client.aforce_login(self.user)
+        lamp = await Lamp.objects.aget(article='AS003')
+        response = await self.async_client.get(reverse('catalog:lamp_detail', args=[lamp.id]))
+        self.assertContains(response, 'AS003')
+        response = await self.async_client.get(
+            reverse('catalog:lamp_detail', args=[lamp.id]), headers={'If-None-Match': response['ETag']},
+        )
+        self.assertEqual(response.status_code, 304)
+
+        cart = await Cart.objects.aget_active(self.user)
+        await CartItem.objects.acreate(cart=cart, lamp=lamp, quantity=2)
+        response = await self.async_client.get(reverse('catalog:cart_detail'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['summary'].subtotal, Decimal('406.00'))
+        self.assertContains(response, 'manager')
+
+    async def test_cart_requires_login(self):
+        response = await self.async_client.get(reverse('catalog:cart_detail'))
+        self.assertEqual(response.status_code, 302)
+
+    async def test_api(self):
+        url = reverse('catalog:api_lamp_list')
+        response = await self.async_client.get(url, {'fields': 'article', 'limit': 10, 'sort_by': 'price'})
+        data = json.loads(response.content)
+        articles = [row['article'] for row in data['results']]
+        response = await self.async_client.get(data['next'])
+        articles += [row['article'] for row in json.loads(response.content)['results']]
+        self.assertEqual(articles, [f'AS{i:03d}' for i in range(15)])
+
+        lamp = await Lamp.objects.aget(article='AS007')
+        response = await self.async_client.get(reverse('catalog:api_lamp_detail', args=[lamp.id]),
+                                               {'fields': 'price'})
+        self.assertEqual(json.loads(response.content), {'id': lamp.id, 'price': '207.00'})
+
+    async def test_cache_is_not_blocking_event_loop(self):
+        # С общим кэшем (Redis, Memcached) синхронный вызов остановил бы все запросы процесса
+        await self.async_client.aforce_login(self.user)
+        lamp = await Lamp.objects.aget(article='AS003')
+        urls = [
+            reverse('catalog:lamp_list') + '?lamp_type=floor',
+            reverse('catalog:lamp_list') + '?pagination=cursor&group_by=color',
+            reverse('catalog:lamp_detail', args=[lamp.id]),
+            reverse('catalog:api_lamp_list') + '?fields=article',
+        ]
+        with ExitStack() as stack:
+            for name in ('get', 'set', 'add', 'incr'):
+                stack.enter_context(mock.patch.object(cache, name, forbid_in_event_loop(getattr(cache, name))))
+            for _ in range(2):
+                for url in urls:
+                    response = await self.async_client.get(url)
+                    self.assertEqual(response.status_code, 200, url)
+        self.assertEqual(response['X-Catalog-Cache'], 'hit')
@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from ..bulk_pricing import PriceTable, quote_prices
+from ..models import Lamp
+from decimal import Decimal
+
+
+class BulkPricingTests(TestCase):
+    def setUp(self):
+        tiers = [
+            # Полная сетка уровней
+            (Decimal('1000.00'), Decimal('900.00'), 5, Decimal('800.00'), 10),
+            # Оптовых цен нет
+            (Decimal('333.33'), None, None, None, None),
+            # Уровни заданы частично или нулями - не действуют
+            (Decimal('333.33'), Decimal('300.00'), None, Decimal('0.00'), 2),
+            (Decimal('50.50'), Decimal('45.45'), 0, Decimal('40.40'), None),
+            # Крупный опт с меньшим порогом, чем мелкий
+            (Decimal('10.01'), Decimal('9.99'), 20, Decimal('8.88'), 3),
+            (Decimal('0.00'), Decimal('0.01'), 1, None, None),
+            (Decimal('99999999.99'), Decimal('12345678.90'), 7, Decimal('1.00'), 1000),
+        ]
+        self.lamps = [
+            Lamp.objects.create(
+                article=f'BP{i:03d}', brand='Test Brand', power_watts=60, color='White', lamp_type='table',
+                price=price,
+                small_wholesale_price=small_price, small_wholesale_quantity=small_quantity,
+                large_wholesale_price=large_price, large_wholesale_quantity=large_quantity,
+            )
+            for i, (price, small_price, small_quantity, large_price, large_quantity) in enumerate(tiers)
+        ]
+        self.quantities = [0, 1, 2, 3, 4, 5, 6, 9, 10, 11, 19, 20, 21, 999, 1000, 5000]
+
+    def test_matches_get_price_tier_exactly(self):
+        # Цены перечитываются из базы, как в корзине
+        lamps = list(Lamp.objects.order_by('-id'))
+        pairs = [(lamp, quantity) for lamp in lamps for quantity in self.quantities]
+        quote = PriceTable.load().quote([lamp.id for lamp, q in pairs], [q for lamp, q in pairs])
+
+        for (lamp, quantity), tier, unit_price, line_total in zip(
+                pairs, quote.tiers(), quote.unit_prices(), quote.line_totals()):
+            expected_tier, expected_price = lamp.get_price_tier(quantity)
+            self.assertEqual(tier, expected_tier)
+            self.assertEqual(str(unit_price), str(expected_price))
+            self.assertEqual(str(line_total), str(expected_price * quantity))
+        self.assertEqual(quote.total(), sum(lamp.get_price_for_quantity(q) * q for lamp, q in pairs))
+
+    def test_quote_prices_for_selected_lamps(self):
+        lamp = self.lamps[0]
+        quote = quote_prices([lamp.id, lamp.id, self.lamps[1].id], [1, 5, 10])
+        self.assertEqual(quote.tiers(), ['retail', 'small_wholesale', 'retail'])
+        self.assertEqual(quote.line_totals(), [Decimal('1000.00'), Decimal('4500.00'), Decimal('3333.30')])
+
+    def test_unknown_lamp(self):
+        with self.assertRaises(Lamp.DoesNotExist):
+            PriceTable.load().quote([self.lamps[0].id, 10 ** 6], [1, 1])
+        with self.assertRaises(Lamp.DoesNotExist):
+            PriceTable.load(Lamp.objects.none()).quote([self.lamps[0].id], [1])
+        with self.assertRaises(ValueError):
+            PriceTable.load().quote([self.lamps[0].id], [1, 2])
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_pricing', quantities=[1, 10], repeat=1, stdout=out)
+        self.assertIn('Результаты совпадают', out.getvalue())
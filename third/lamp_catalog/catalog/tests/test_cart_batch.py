@@ -0,0 +1,100 @@
+import json
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import Lamp, Cart, CartItem, UserProfile
+from decimal import Decimal
+
+
+class BatchCartUpdateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='manager', password='manager123')
+        UserProfile.objects.create(user=self.user, role='sales_manager')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.lamps = [
+            Lamp.objects.create(
+                article=f'BC{i:03d}', brand='Test Brand', power_watts=60, color='White', lamp_type='table',
+                price=Decimal('1000.00'),
+                small_wholesale_price=Decimal('900.00'), small_wholesale_quantity=5,
+            )
+            for i in range(120)
+        ]
+        self.cart = Cart.objects.get_active(self.user)
+
+    def post(self, items):
+        return self.client.post(
+            reverse('catalog:update_cart'),
+            data=json.dumps({'items': items}),
+            content_type='application/json',
+        )
+
+    def test_sets_quantities_and_returns_totals(self):
+        self.cart.add_item(self.lamps[0].id, 1)
+        self.cart.add_item(self.lamps[1].id, 1)
+        response = self.post([
+            {'lamp': self.lamps[0].id, 'quantity': 5},
+            {'article': 'BC001', 'quantity': 0},
+            {'article': 'BC002', 'quantity': 2},
+        ])
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            [(item['article'], item['quantity'], item['price_tier'], item['total']) for item in data['items']],
+            [('BC000', 5, 'small_wholesale', '4500.00'), ('BC002', 2, 'retail', '2000.00')],
+        )
+        self.assertEqual(data['subtotal'], '6500.00')
+        self.assertEqual(data['total_with_discount'], '6500.00')
+        self.assertEqual(
+            dict(self.cart.items.values_list('lamp__article', 'quantity')),
+            {'BC000': 5, 'BC002': 2},
+        )
+
+    def test_hundred_lines_in_constant_queries(self):
+        items = [{'lamp': lamp.id, 'quantity': 10} for lamp in self.lamps[:100]]
+        with self.assertNumQueries(self.queries_for(items[:3])):
+            response = self.post(items)
+        self.assertEqual(response.json()['subtotal'], '900000.00')
+        self.assertEqual(response.json()['total_with_discount'], '810000.00')
+        self.assertEqual(self.cart.items.count(), 100)
+
+    def queries_for(self, items):
+        with CaptureQueriesContext(connection) as captured:
+            self.post(items)
+        CartItem.objects.all().delete()
+        return len(captured)
+
+    def test_invalid_changes_are_not_applied(self):
+        self.cart.add_item(self.lamps[0].id, 1)
+        response = self.post([
+            {'lamp': self.lamps[0].id, 'quantity': 7},
+            {'article': 'MISSING', 'quantity': 1},
+            {'lamp': self.lamps[1].id, 'quantity': -1},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()['errors']), 2)
+        self.assertEqual(self.cart.items.get().quantity, 1)
+
+    def test_out_of_range_values_are_rejected(self):
+        self.cart.add_item(self.lamps[0].id, 1)
+        for item in [
+            {'lamp': True, 'quantity': 1},
+            {'lamp': 2 ** 63, 'quantity': 1},
+            {'lamp': 0, 'quantity': 1},
+            {'lamp': self.lamps[0].id, 'quantity': True},
+            {'lamp': self.lamps[0].id, 'quantity': 2 ** 31},
+            {'lamp': self.lamps[0].id, 'quantity': 2 ** 63},
+        ]:
+            response = self.post([item])
+            self.assertEqual(response.status_code, 400, item)
+            self.assertEqual(len(response.json()['errors']), 1, item)
+        self.assertEqual(self.cart.items.get().quantity, 1)
+
+    def test_malformed_body(self):
+        response = self.client.post(reverse('catalog:update_cart'), data='not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.client.get(reverse('catalog:update_cart')).status_code, 405)
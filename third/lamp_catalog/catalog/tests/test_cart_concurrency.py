@@ -0,0 +1,141 @@
+import threading
+from time import sleep
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import Lamp, Cart, CartItem, UserProfile
+from decimal import Decimal
+
+
+def create_lamp(article):
+    return Lamp.objects.create(
+        article=article, brand='Test Brand', power_watts=60, color='White', lamp_type='table',
+        price=Decimal('100.00'),
+    )
+
+
+class CartMutationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='client', password='client123')
+        UserProfile.objects.create(user=self.user, role='guest')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.lamp = create_lamp('CC001')
+
+    def test_add_increments_existing_item(self):
+        url = reverse('catalog:add_to_cart', args=[self.lamp.id])
+        self.client.post(url, {'quantity': 2})
+        self.client.post(url, {'quantity': 3})
+        self.assertEqual(list(CartItem.objects.values_list('lamp_id', 'quantity')), [(self.lamp.id, 5)])
+
+    def test_add_rejects_non_positive_quantity(self):
+        self.client.post(reverse('catalog:add_to_cart', args=[self.lamp.id]), {'quantity': 0})
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_invalid_quantity_redirects_with_error(self):
+        url = reverse('catalog:add_to_cart', args=[self.lamp.id])
+        for quantity in ['abc', '1.5', '', str(2 ** 31), str(2 ** 63)]:
+            response = self.client.post(url, {'quantity': quantity}, follow=True)
+            self.assertRedirects(response, reverse('catalog:lamp_detail', args=[self.lamp.id]))
+            self.assertContains(response, 'Количество должно быть целым числом')
+        self.assertFalse(CartItem.objects.exists())
+
+        cart = Cart.objects.get_active(self.user)
+        cart.add_item(self.lamp.id, 2)
+        item = cart.items.get()
+        url = reverse('catalog:update_cart_item', args=[item.id])
+        for quantity in ['abc', '-1', str(2 ** 31)]:
+            response = self.client.post(url, {'quantity': quantity}, follow=True)
+            self.assertRedirects(response, reverse('catalog:cart_detail'))
+            self.assertContains(response, 'Количество должно быть целым числом')
+        self.assertEqual(CartItem.objects.get(id=item.id).quantity, 2)
+
+    def test_increment_is_single_update(self):
+        cart = Cart.objects.get_active(self.user)
+        cart.add_item(self.lamp.id, 1)
+        with CaptureQueriesContext(connection) as captured:
+            cart.add_item(self.lamp.id, 1)
+        statements = [query['sql'] for query in captured if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('UPDATE'))
+
+    def test_duplicate_items_are_rejected(self):
+        cart = Cart.objects.get_active(self.user)
+        CartItem.objects.create(cart=cart, lamp=self.lamp, quantity=1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CartItem.objects.create(cart=cart, lamp=self.lamp, quantity=1)
+
+    def test_update_and_remove_only_own_items(self):
+        cart = Cart.objects.get_active(self.user)
+        cart.add_item(self.lamp.id, 1)
+        item = cart.items.get()
+
+        other = User.objects.create_user(username='other', password='other123')
+        UserProfile.objects.create(user=other, role='guest')
+        self.client.force_login(other)
+        self.assertEqual(self.client.post(reverse('catalog:update_cart_item', args=[item.id]), {'quantity': 4}).status_code, 404)
+        self.assertEqual(self.client.post(reverse('catalog:remove_from_cart', args=[item.id])).status_code, 404)
+
+        self.client.force_login(self.user)
+        self.client.post(reverse('catalog:update_cart_item', args=[item.id]), {'quantity': 4})
+        self.assertEqual(CartItem.objects.get(id=item.id).quantity, 4)
+        self.client.post(reverse('catalog:update_cart_item', args=[item.id]), {'quantity': 0})
+        self.assertFalse(CartItem.objects.filter(id=item.id).exists())
+
+
+class CartConcurrencyTests(TransactionTestCase):
+    threads = 8
+    adds_per_thread = 25
+    max_attempts = 500
+    retry_delay = 0.001
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='client', password='client123')
+        self.cart = Cart.objects.create(user=self.user)
+        self.lamps = [create_lamp(f'CC{i:03d}') for i in range(2)]
+
+    def run_concurrently(self, worker):
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def run():
+            try:
+                barrier.wait()
+                for i in range(self.adds_per_thread):
+                    worker(i)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def add_with_retry(self, lamp_id):
+        # SQLite не ждет освобождения блокировки в общей памяти тестовой базы -
+        # повторяем, как повторил бы пользователь; потерянных увеличений быть не должно.
+        # Число попыток ограничено, чтобы навсегда заблокированная база роняла тест, а не вешала его
+        for attempt in range(self.max_attempts):
+            try:
+                self.cart.add_item(lamp_id, 1)
+                return
+            except OperationalError as error:
+                last_error = error
+                sleep(self.retry_delay)
+        self.fail(f'Не удалось добавить лампу за {self.max_attempts} попыток: {last_error}')
+
+    def test_no_lost_updates(self):
+        # Все потоки одновременно добавляют одни и те же лампы, начиная с пустой корзины
+        self.run_concurrently(lambda i: self.add_with_retry(self.lamps[i % 2].id))
+
+        total = self.threads * self.adds_per_thread
+        quantities = dict(CartItem.objects.filter(cart=self.cart).values_list('lamp_id', 'quantity'))
+        self.assertEqual(sum(quantities.values()), total)
+        self.assertEqual(len(quantities), 2)
@@ -0,0 +1,96 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from .. import cache as catalog_cache
+from ..models import Lamp, UserProfile
+from ..views import LampListView
+from decimal import Decimal
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(15):
+            Lamp.objects.create(
+                article=f'CA{i:03d}',
+                brand=f'Brand {i % 3}',
+                power_watts=40 + i,
+                color='White',
+                lamp_type='table' if i % 2 else 'floor',
+                price=Decimal('100.00') + i,
+            )
+        self.client = Client()
+        catalog_cache.reset_metrics()
+
+    def get(self, params=None):
+        return self.client.get(reverse('catalog:lamp_list'), params or {})
+
+    def test_repeated_page_is_served_from_cache(self):
+        params = {'lamp_type': 'table', 'sort_by': 'price', 'page': 1}
+        first = self.get(params)
+        self.assertEqual(first['X-Catalog-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            second = self.get(params)
+        self.assertEqual(second['X-Catalog-Cache'], 'hit')
+        self.assertContains(second, 'CA001')
+        self.assertEqual(second.content, first.content)
+
+    def test_equivalent_parameters_share_entry(self):
+        self.get({'sort_by': 'price', 'lamp_type': 'table'})
+        response = self.get({'lamp_type': 'table', 'min_power': '', 'sort_by': 'price', 'utm_source': 'mail'})
+        self.assertEqual(response['X-Catalog-Cache'], 'hit')
+        # Пустая сортировка означает другой порядок и не совпадает с отсутствующей
+        self.assertEqual(self.get({'lamp_type': 'table', 'sort_by': ''})['X-Catalog-Cache'], 'miss')
+
+    def test_lamp_save_invalidates(self):
+        self.get({'sort_by': 'brand'})
+        lamp = Lamp.objects.get(article='CA000')
+        lamp.brand = 'AAA Renamed'
+        lamp.save()
+        response = self.get({'sort_by': 'brand'})
+        self.assertEqual(response['X-Catalog-Cache'], 'miss')
+        self.assertContains(response, 'AAA Renamed')
+
+    def test_merchandiser_edit_invalidates(self):
+        merchandiser = User.objects.create_user(username='merch', password='merch123')
+        UserProfile.objects.create(user=merchandiser, role='merchandiser')
+        lamp = Lamp.objects.get(article='CA003')
+        self.get({'sort_by': 'brand'})
+
+        self.client.force_login(merchandiser)
+        self.client.post(reverse('catalog:edit_lamp_description', args=[lamp.pk]), {'description': 'Новое'})
+        self.assertEqual(self.get({'sort_by': 'brand'})['X-Catalog-Cache'], 'miss')
+
+        lamp.delete()
+        response = self.get({'sort_by': 'brand'})
+        self.assertEqual(response['X-Catalog-Cache'], 'miss')
+        self.assertNotContains(response, 'CA003')
+
+    def test_id_list_is_reused_when_fragment_is_missing(self):
+        params = {'sort_by': 'power_watts', 'page': 2}
+        self.get(params)
+        view_key = f'{LampListView.paginate_by}:{LampListView.count_limit}'
+        cache.delete(catalog_cache.make_key(f'page:{view_key}', params))
+        # Страница собирается по закэшированным id одним запросом, без подсчета
+        with self.assertNumQueries(1):
+            response = self.get(params)
+        self.assertEqual([lamp.article for lamp in response.context['lamps']],
+                         [f'CA{i:03d}' for i in range(10, 15)])
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
+
+    def test_metrics(self):
+        self.get()
+        self.get()
+        self.get({'page': 2})
+        metrics = catalog_cache.get_metrics()
+        self.assertEqual(metrics['page'], {'hits': 1, 'misses': 2, 'hit_ratio': 1 / 3})
+        self.assertEqual(metrics['ids']['misses'], 2)
+
+        out = StringIO()
+        call_command('catalog_cache_stats', reset=True, stdout=out)
+        self.assertIn('попаданий 1, промахов 2', out.getvalue())
+        self.assertEqual(catalog_cache.get_metrics()['page']['misses'], 0)
@@ -0,0 +1,68 @@
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, TestCase, override_settings
+from lamp_catalog.database import database_config, search_backend
+from ..search import DatabaseSearchBackend, SQLiteFTSBackend, get_search_backend
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    def test_tuned_sqlite(self):
+        config = database_config({'DB_SQLITE_TUNED': '1'}, '/srv/catalog')
+        self.assertEqual(config['ENGINE'], 'django.db.backends.sqlite3')
+        self.assertEqual(str(config['NAME']), '/srv/catalog/db.sqlite3')
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertEqual(config['OPTIONS']['timeout'], 20)
+        self.assertIn('PRAGMA journal_mode=WAL;', config['OPTIONS']['init_command'])
+        self.assertIn('PRAGMA synchronous=NORMAL;', config['OPTIONS']['init_command'])
+
+    def test_plain_sqlite_by_default(self):
+        # WAL не включается без явного DB_SQLITE_TUNED=1: он меняет файл базы
+        self.assertNotIn('OPTIONS', database_config({}, '.'))
+        config = database_config({'DB_SQLITE_TUNED': '0', 'DB_NAME': '/tmp/x.sqlite3', 'DB_CONN_MAX_AGE': '0'}, '.')
+        self.assertEqual(config['NAME'], '/tmp/x.sqlite3')
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertNotIn('OPTIONS', config)
+
+    def test_postgresql_persistent_and_pooled(self):
+        env = {'DB_ENGINE': 'postgresql', 'DB_HOST': 'db', 'DB_NAME': 'catalog', 'DB_USER': 'app'}
+        config = database_config(env, '.')
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((config['HOST'], config['PORT'], config['USER']), ('db', '5432', 'app'))
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+
+        config = database_config(dict(env, DB_POOL='1', DB_POOL_MAX_SIZE='20'), '.')
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20})
+
+    def test_search_backend_follows_engine(self):
+        # Таблица catalog_lamp_fts создается только на SQLite, на PostgreSQL поиск идет подстрокой
+        config = database_config({'DB_ENGINE': 'postgresql', 'DB_POOL': '1'}, '.')
+        with override_settings(CATALOG_SEARCH_BACKEND=search_backend(config)):
+            self.assertIsInstance(get_search_backend(), DatabaseSearchBackend)
+        with override_settings(CATALOG_SEARCH_BACKEND=search_backend(database_config({}, '.'))):
+            self.assertIsInstance(get_search_backend(), SQLiteFTSBackend)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ImproperlyConfigured):
+            database_config({'DB_ENGINE': 'oracle'}, '.')
+
+
+class ConnectionSettingsTests(TestCase):
+    def test_pragmas_applied_on_connect(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config = database_config({'DB_SQLITE_TUNED': '1', 'DB_NAME': f'{directory}/tuned.sqlite3'}, '.')
+            tuned = ConnectionHandler({DEFAULT_DB_ALIAS: config})[DEFAULT_DB_ALIAS]
+            try:
+                with tuned.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA synchronous')
+                    self.assertEqual(cursor.fetchone()[0], 1)
+                self.assertEqual(tuned.transaction_mode, 'IMMEDIATE')
+            finally:
+                tuned.close()
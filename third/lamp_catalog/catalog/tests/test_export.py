@@ -0,0 +1,88 @@
+import csv
+import io
+import os
+import tempfile
+import zipfile
+from xml.etree import ElementTree
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from ..export import EXPORT_COLUMNS
+from ..models import Lamp, UserProfile
+from decimal import Decimal
+
+SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+
+def read_xlsx(content):
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        root = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+    rows = []
+    for row in root.iter(f'{SHEET_NS}row'):
+        rows.append([''.join(cell.itertext()) for cell in row.iter(f'{SHEET_NS}c')])
+    return rows
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.merchandiser = User.objects.create_user(username='merch', password='merch123')
+        UserProfile.objects.create(user=self.merchandiser, role='merchandiser')
+        self.client = Client()
+        self.client.force_login(self.merchandiser)
+        for i in range(6):
+            Lamp.objects.create(
+                article=f'EX{i:03d}',
+                brand='Brand & "Co"' if i == 0 else f'Brand {i}',
+                has_dimmer=i % 2 == 0,
+                power_watts=40 + i * 10,
+                color='White',
+                lamp_type='table' if i < 4 else 'floor',
+                price=Decimal('100.50') + i,
+                small_wholesale_price=Decimal('90.00') if i == 1 else None,
+                small_wholesale_quantity=5 if i == 1 else None,
+                description='Строка 1\nСтрока 2' if i == 2 else '',
+            )
+
+    def export(self, **params):
+        response = self.client.get(reverse('catalog:export_lamps'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_with_filters(self):
+        response, content = self.export(format='csv', lamp_type='table', min_power='50')
+        self.assertIn('lamps.csv', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual(rows[0], [header for field, header in EXPORT_COLUMNS])
+        self.assertEqual([row[0] for row in rows[1:]], ['EX001', 'EX002', 'EX003'])
+        self.assertEqual(rows[1][7:10], ['101.50', '90.00', '5'])
+        self.assertEqual(rows[2][-1], 'Строка 1\nСтрока 2')
+
+    def test_xlsx(self):
+        response, content = self.export(format='xlsx', has_dimmer='1')
+        rows = read_xlsx(content)
+        self.assertEqual(rows[0][0], 'Артикул')
+        self.assertEqual([row[0] for row in rows[1:]], ['EX000', 'EX002', 'EX004'])
+        self.assertEqual(rows[1][1], 'Brand & "Co"')
+        self.assertEqual(rows[1][3], 'да')
+
+    def test_access_and_format(self):
+        self.assertEqual(self.client.get(reverse('catalog:export_lamps'), {'format': 'pdf'}).status_code, 400)
+        guest = User.objects.create_user(username='guest', password='guest123')
+        UserProfile.objects.create(user=guest, role='guest')
+        self.client.force_login(guest)
+        self.assertEqual(self.client.get(reverse('catalog:export_lamps')).status_code, 302)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'lamps.xlsx')
+            call_command('export_lamps', path, lamp_type='floor', chunk_size=1, stderr=io.StringIO())
+            with open(path, 'rb') as f:
+                rows = read_xlsx(f.read())
+        self.assertEqual([row[0] for row in rows[1:]], ['EX004', 'EX005'])
+
+        out = io.StringIO()
+        call_command('export_lamps', '-', search='EX003', stdout=out)
+        self.assertEqual(out.getvalue().count('EX00'), 1)
@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from ..facets import build_facets, get_facet_counts
+from ..models import Lamp
+from decimal import Decimal
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(12):
+            Lamp.objects.create(
+                article=f'FC{i:03d}',
+                brand='Alpha' if i < 8 else 'Beta',
+                has_dimmer=i % 3 == 0,
+                power_watts=[25, 45, 75, 150, 250][i % 5],
+                color='White' if i % 2 else 'Black',
+                lamp_type='table' if i < 6 else 'floor',
+                price=Decimal('100.00') + i,
+            )
+        self.client = Client()
+
+    def test_counts_for_unfiltered_catalog(self):
+        with self.assertNumQueries(1):
+            counts = get_facet_counts({})
+        self.assertEqual(counts['lamp_type'], {'table': 6, 'floor': 6})
+        self.assertEqual(counts['has_dimmer'], {'1': 4, '0': 8})
+        self.assertEqual(counts['brand'], {'Alpha': 8, 'Beta': 4})
+        self.assertEqual(counts['color'], {'White': 6, 'Black': 6})
+        self.assertEqual(counts['power'], {'0': 3, '1': 3, '2': 2, '3': 2, '4': 2})
+
+        with self.assertNumQueries(0):
+            get_facet_counts({})
+
+    def test_facet_ignores_only_its_own_filter(self):
+        counts = get_facet_counts({'lamp_type': 'table', 'has_dimmer': '1', 'min_power': '40'})
+        # Типы считаются без фильтра по типу, но с диммером и мощностью
+        self.assertEqual(counts['lamp_type'], {
+            'table': Lamp.objects.filter(lamp_type='table', has_dimmer=True, power_watts__gte=40).count(),
+            'floor': Lamp.objects.filter(lamp_type='floor', has_dimmer=True, power_watts__gte=40).count(),
+        })
+        self.assertEqual(sum(counts['brand'].values()),
+                         Lamp.objects.filter(lamp_type='table', has_dimmer=True, power_watts__gte=40).count())
+        # Диапазоны мощности считаются без фильтра по мощности
+        self.assertEqual(sum(counts['power'].values()),
+                         Lamp.objects.filter(lamp_type='table', has_dimmer=True).count())
+
+    def test_counts_follow_catalog_changes(self):
+        self.assertEqual(get_facet_counts({})['brand']['Beta'], 4)
+        Lamp.objects.filter(article='FC000').first().delete()
+        Lamp.objects.create(
+            article='FC100', brand='Beta', power_watts=60, color='Red', lamp_type='wall', price=Decimal('10.00'),
+        )
+        counts = get_facet_counts({})
+        self.assertEqual(counts['brand'], {'Alpha': 7, 'Beta': 5})
+        self.assertEqual(counts['lamp_type']['wall'], 1)
+
+    def test_rendered_next_to_options(self):
+        response = self.client.get(reverse('catalog:lamp_list'), {'brand': 'Beta'})
+        self.assertEqual(len(response.context['lamps']), 4)
+        self.assertContains(response, 'Напольная (4)')
+        self.assertContains(response, 'Beta (4)')
+        self.assertContains(response, 'Alpha (8)')
+        self.assertContains(response, 'brand=Beta&min_power=100&max_power=199')
+
+        facets = build_facets({'color': 'Green'})
+        self.assertIn(('Green', 0), facets['color'])
+        self.assertEqual(facets['power'][0]['label'], 'до 39 Вт')
@@ -0,0 +1,63 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from ..models import Lamp
+from decimal import Decimal
+
+
+class GroupingTests(TestCase):
+    def setUp(self):
+        # 7 белых, 6 черных и 5 красных ламп
+        colors = ['White'] * 7 + ['Black'] * 6 + ['Red'] * 5
+        for i, color in enumerate(colors):
+            Lamp.objects.create(
+                article=f'GRP{i:03d}',
+                brand=f'Brand {i:02d}',
+                has_dimmer=i % 3 == 0,
+                power_watts=60,
+                color=color,
+                lamp_type='table' if i % 2 else 'floor',
+                price=Decimal('100.00') + i,
+            )
+        self.client = Client()
+
+    def get_groups(self, **params):
+        response = self.client.get(reverse('catalog:lamp_list'), dict(params, group_by='color'))
+        return response, [
+            (group['label'], group['count'], group['continued'], len(group['lamps']))
+            for group in response.context['lamp_groups']
+        ]
+
+    def test_groups_on_first_page(self):
+        response, groups = self.get_groups()
+        self.assertEqual(groups, [('Black', 6, False, 6), ('Red', 5, False, 4)])
+        self.assertContains(response, 'Black')
+
+    def test_group_continued_on_next_page(self):
+        response, groups = self.get_groups(page=2)
+        self.assertEqual(groups, [('Red', 5, True, 1), ('White', 7, False, 7)])
+        self.assertContains(response, '(продолжение)')
+
+    def test_sorting_inside_groups(self):
+        response, groups = self.get_groups(sort_by='price', sort_order='desc')
+        lamps = response.context['lamp_groups'][0]['lamps']
+        self.assertEqual([lamp.price for lamp in lamps], sorted((lamp.price for lamp in lamps), reverse=True))
+
+    def test_group_continued_with_cursor_pagination(self):
+        response, groups = self.get_groups(pagination='cursor')
+        cursor = response.context['page_obj'].next_cursor
+        response, groups = self.get_groups(pagination='cursor', cursor=cursor)
+        self.assertEqual(groups, [('Red', 5, True, 1), ('White', 7, False, 7)])
+
+        cursor = response.context['page_obj'].previous_cursor
+        response, groups = self.get_groups(pagination='cursor', cursor=cursor)
+        self.assertEqual(groups, [('Black', 6, False, 6), ('Red', 5, False, 4)])
+
+    def test_boolean_group_labels(self):
+        response = self.client.get(reverse('catalog:lamp_list'), {'group_by': 'has_dimmer', 'page': 2})
+        groups = [(group['label'], group['count']) for group in response.context['lamp_groups']]
+        self.assertEqual(groups, [('Без диммера', 12), ('С диммером', 6)])
+
+    def test_only_current_page_is_fetched(self):
+        # Подсчет для пагинации, строки страницы, счетчики групп и счетчики фильтров
+        with self.assertNumQueries(4):
+            self.client.get(reverse('catalog:lamp_list'), {'group_by': 'lamp_type', 'page': 2})
@@ -0,0 +1,128 @@
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from ..cache import get_catalog_version
+from ..export import export_rows, iter_csv
+from ..importer import import_lamps
+from ..models import Lamp, UserProfile
+from ..search import get_search_backend
+from decimal import Decimal
+
+HEADER = 'Артикул,Марка,Тип,Диммер,"Мощность, Вт",Цвет,Цена за единицу\n'
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.lamp = Lamp.objects.create(
+            article='IM001', brand='Old Brand', power_watts=40, color='White', lamp_type='table',
+            price=Decimal('100.00'), description='Старое описание',
+        )
+
+    def test_csv_creates_and_updates(self):
+        content = HEADER + (
+            'IM001,New Brand,Настольная,да,60,Black,150.50\n'
+            'IM002,Second,floor,нет,100,White,2000\n'
+        )
+        version = get_catalog_version()
+        result = import_lamps(io.StringIO(content), 'csv', batch_size=1)
+        self.assertEqual((result.rows, result.created, result.updated, result.errors), (2, 1, 1, []))
+
+        self.lamp.refresh_from_db()
+        self.assertEqual(self.lamp.brand, 'New Brand')
+        self.assertTrue(self.lamp.has_dimmer)
+        self.assertEqual(self.lamp.price, Decimal('150.50'))
+        # Колонки, которых нет в файле, не меняются
+        self.assertEqual(self.lamp.description, 'Старое описание')
+        self.assertEqual(Lamp.objects.get(article='IM002').lamp_type, 'floor')
+        self.assertNotEqual(get_catalog_version(), version)
+        self.assertEqual(get_search_backend().search(Lamp.objects.all(), 'Second').count(), 1)
+
+    def test_row_errors_do_not_stop_import(self):
+        content = HEADER + (
+            'IM010,Good,table,нет,60,White,100\n'
+            'IM011,Bad power,table,нет,много,White,100\n'
+            'IM012,No price,table,нет,60,White,\n'
+            'IM001,Updated,table,нет,40,White,100\n'
+        )
+        result = import_lamps(io.StringIO(content), 'csv')
+        self.assertEqual((result.created, result.updated), (1, 1))
+        self.assertEqual([(line, article) for line, article, message in result.errors], [(3, 'IM011'), (4, 'IM012')])
+        self.assertIn('power_watts', result.errors[0][2])
+        self.assertIn('price', result.errors[1][2])
+        self.assertFalse(Lamp.objects.filter(article__in=['IM011', 'IM012']).exists())
+
+    def test_jsonl_partial_columns(self):
+        lines = [
+            {'article': 'IM001', 'price': 120.25},
+            {'article': 'IM001', 'description': 'Новое описание'},
+            {'article': 'IM003', 'brand': 'Json', 'power_watts': 25, 'color': 'Red',
+             'lamp_type': 'wall', 'price': '300', 'has_dimmer': True},
+            'не объект',
+        ]
+        content = '\n'.join(json.dumps(line, ensure_ascii=False) for line in lines) + '\n{broken\n'
+        result = import_lamps(io.StringIO(content), 'jsonl')
+        self.assertEqual((result.rows, result.created, result.updated), (5, 1, 1))
+        self.assertEqual([line for line, article, message in result.errors], [4, 5])
+
+        # Строки с одним артикулом в порции объединяются, более поздние значения важнее
+        self.lamp.refresh_from_db()
+        self.assertEqual(self.lamp.price, Decimal('120.25'))
+        self.assertEqual(self.lamp.description, 'Новое описание')
+        self.assertTrue(Lamp.objects.get(article='IM003').has_dimmer)
+
+    def test_export_round_trip(self):
+        Lamp.objects.filter(pk=self.lamp.pk).update(
+            small_wholesale_price=Decimal('90.00'), small_wholesale_quantity=10, description='Строка 1\nСтрока 2',
+        )
+        content = ''.join(iter_csv(export_rows({})))
+        Lamp.objects.all().delete()
+        result = import_lamps(io.StringIO(content.lstrip('\ufeff')), 'csv')
+        self.assertEqual((result.created, result.errors), (1, []))
+        lamp = Lamp.objects.get(article='IM001')
+        self.assertEqual(lamp.small_wholesale_quantity, 10)
+        self.assertIsNone(lamp.height_cm)
+        self.assertEqual(lamp.description, 'Строка 1\nСтрока 2')
+
+    def test_upload_view(self):
+        merchandiser = User.objects.create_user(username='merch', password='merch123')
+        UserProfile.objects.create(user=merchandiser, role='merchandiser')
+        client = Client()
+        client.force_login(merchandiser)
+        url = reverse('catalog:import_lamps')
+        self.assertEqual(client.get(url).status_code, 200)
+
+        upload = SimpleUploadedFile('lamps.csv', ('\ufeff' + HEADER + 'IM020,Upload,table,да,60,White,10\n').encode())
+        response = client.post(url, {'file': upload})
+        self.assertContains(response, 'создано: 1')
+        self.assertTrue(Lamp.objects.filter(article='IM020').exists())
+
+        guest = User.objects.create_user(username='guest', password='guest123')
+        UserProfile.objects.create(user=guest, role='guest')
+        client.force_login(guest)
+        self.assertEqual(client.get(url).status_code, 302)
+
+    def test_commands(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'lamps.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('{"article": "IM001", "color": "Green"}\n{"article": "IM404"}\n')
+            out, err = io.StringIO(), io.StringIO()
+            call_command('import_lamps', path, stdout=out, stderr=err)
+        self.assertIn('обновлено: 1', out.getvalue())
+        self.assertIn('Строка 2 (IM404)', err.getvalue())
+        self.assertEqual(Lamp.objects.get(article='IM001').color, 'Green')
+
+        out = io.StringIO()
+        call_command('benchmark_import', rows=50, batch_size=20, stdout=out)
+        self.assertIn('создано 50', out.getvalue())
+        self.assertIn('обновлено 50', out.getvalue())
+        self.assertFalse(Lamp.objects.filter(article__startswith='BENCH').exists())
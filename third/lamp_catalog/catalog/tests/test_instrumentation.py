@@ -0,0 +1,74 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.template import engines
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import Lamp, Cart, CartItem
+from ..instrumentation import collect_stats, get_view_metrics, reset_view_metrics
+from decimal import Decimal
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_view_metrics()
+        self.lamps = [
+            Lamp.objects.create(article=f'IM{i}', brand=f'Brand {i}', power_watts=40, color='White',
+                                lamp_type='table', price=Decimal('100.00'))
+            for i in range(3)
+        ]
+        self.user = User.objects.create_user(username='buyer', password='secret')
+        self.cart = Cart.objects.create(user=self.user)
+        for lamp in self.lamps:
+            CartItem.objects.create(cart=self.cart, lamp=lamp, quantity=1)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_view_metrics(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('catalog:cart_detail'))
+        self.assertEqual(response.status_code, 200)
+
+        metrics = get_view_metrics()['catalog:cart_detail']
+        self.assertEqual(metrics.queries.count, 1)
+        self.assertEqual(metrics.queries.sum, len(captured))
+        self.assertGreater(metrics.template_seconds, 0)
+        self.assertGreater(metrics.sql_seconds, 0)
+        self.assertEqual(metrics.response_bytes, len(response.content))
+        self.assertEqual(metrics.over_budget, 0)
+
+    def test_budget_log_shows_duplicate_sql(self):
+        with override_settings(CATALOG_VIEW_BUDGETS={'catalog:cart_detail': {'queries': 1}}):
+            with self.assertLogs('catalog.instrumentation', 'WARNING') as logs:
+                self.client.get(reverse('catalog:cart_detail'))
+        self.assertIn('GET /cart/ (catalog:cart_detail)', logs.output[0])
+        self.assertIn('(бюджет 1)', logs.output[0])
+        self.assertEqual(get_view_metrics()['catalog:cart_detail'].over_budget, 1)
+
+    def test_template_queries_and_duplicates(self):
+        # N+1 в шаблоне: лампа каждой позиции загружается отдельным запросом
+        template = engines['django'].from_string('{% for item in items %}{{ item.lamp.article }}{% endfor %}')
+        with collect_stats() as stats:
+            self.assertEqual(template.render({'items': self.cart.items.order_by('id')}), 'IM0IM1IM2')
+        self.assertEqual(stats.template_queries, 4)
+        self.assertGreater(stats.template_seconds, 0)
+        [(count, sql)] = stats.duplicates()
+        self.assertEqual(count, 3)
+        self.assertIn('catalog_lamp', sql)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('catalog:lamp_list'))
+        self.client.get(reverse('catalog:lamp_list'))
+        response = self.client.get(reverse('catalog:metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('# TYPE catalog_request_duration_seconds histogram', text)
+        self.assertIn('catalog_request_duration_seconds_count{view="catalog:lamp_list"} 2', text)
+        self.assertIn('catalog_request_queries_bucket{view="catalog:lamp_list",le="+Inf"} 2', text)
+        self.assertIn('catalog_cache_requests_total{cache="page",result="hit"} 1', text)
+
+        response = self.client.get(reverse('catalog:metrics'), REMOTE_ADDR='10.0.0.5')
+        self.assertEqual(response.status_code, 404)
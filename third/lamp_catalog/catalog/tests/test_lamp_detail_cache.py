@@ -0,0 +1,88 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from ..models import Lamp, UserProfile
+from decimal import Decimal
+
+
+class LampDetailConditionalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.lamp = Lamp.objects.create(
+            article='DT001', brand='Detail Brand', power_watts=60, color='White', lamp_type='table',
+            price=Decimal('1000.00'),
+        )
+        self.url = reverse('catalog:lamp_detail', args=[self.lamp.pk])
+        self.client = Client()
+
+    def test_etag_and_not_modified(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_save_changes_etag_and_content(self):
+        etag = self.client.get(self.url)['ETag']
+        self.lamp.price = Decimal('1234.00')
+        self.lamp.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, '1234.00')
+
+    def test_repeat_render_uses_cached_lamp(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Detail Brand')
+
+    def test_etag_depends_on_user(self):
+        anonymous_etag = self.client.get(self.url)['ETag']
+        user = User.objects.create_user(username='client', password='client123')
+        UserProfile.objects.create(user=user, role='guest')
+        self.client.force_login(user)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=anonymous_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_etag_changes_after_login(self):
+        user = User.objects.create_user(username='buyer', password='buyer123')
+        UserProfile.objects.create(user=user, role='guest')
+        credentials = {'username': 'buyer', 'password': 'buyer123'}
+        self.client.post(reverse('login'), credentials)
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Повторный вход меняет CSRF-секрет: сохраненная страница с формами больше не годится
+        self.client.post(reverse('logout'))
+        self.client.post(reverse('login'), credentials)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_pending_message_forces_full_page(self):
+        user = User.objects.create_user(username='client', password='client123')
+        UserProfile.objects.create(user=user, role='guest')
+        self.client.force_login(user)
+        etag = self.client.get(self.url)['ETag']
+
+        self.client.post(reverse('catalog:add_to_cart', args=[self.lamp.pk]), {'quantity': 1})
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Товар добавлен в корзину')
+
+    def test_missing_lamp(self):
+        self.assertEqual(self.client.get(reverse('catalog:lamp_detail', args=[999])).status_code, 404)
@@ -0,0 +1,81 @@
+import io
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, LiveServerTestCase
+from ..filters import filter_lamps
+from ..models import Lamp, UserProfile, Cart, Order, OrderItem
+
+
+def generate(**options):
+    options = {'lamps': 60, 'users_per_role': 2, 'cart_items': 3, 'orders': 10, 'order_items': 4, **options}
+    call_command('generate_catalog_data', stdout=io.StringIO(), **options)
+
+
+class GenerateCatalogDataTests(TestCase):
+    def test_generates_every_kind_of_data(self):
+        generate()
+        self.assertEqual(Lamp.objects.filter(article__startswith='SYN').count(), 60)
+        self.assertTrue(Lamp.objects.filter(small_wholesale_price__isnull=False, large_wholesale_quantity=100).exists())
+        for role, label in UserProfile.ROLE_CHOICES:
+            self.assertEqual(UserProfile.objects.filter(role=role, user__username__startswith='syn_').count(), 2)
+        self.assertTrue(User.objects.get(username='syn_guest_0').check_password('password'))
+
+        # Активные корзины у гостей и менеджеров, заказы - у менеджеров
+        self.assertEqual(Cart.objects.active().count(), 4)
+        self.assertEqual(Cart.objects.get(user__username='syn_guest_1').items.count(), 3)
+        self.assertEqual(Order.objects.filter(sales_manager__userprofile__role='sales_manager').count(), 10)
+        self.assertEqual(OrderItem.objects.count(), 40)
+        order = Order.objects.first()
+        self.assertEqual(order.subtotal, sum(item.line_total for item in order.items.all()))
+
+        # Лампы попадают в поисковый индекс, хотя создаются без сигналов
+        found = filter_lamps(Lamp.objects.all(), {'search': 'SYN00000042'})
+        self.assertEqual([lamp.article for lamp in found], ['SYN00000042'])
+
+    def test_existing_data_requires_clear(self):
+        generate(lamps=5, orders=0)
+        with self.assertRaises(CommandError):
+            generate(lamps=5, orders=0)
+        generate(lamps=7, orders=0, clear=True)
+        self.assertEqual(Lamp.objects.filter(article__startswith='SYN').count(), 7)
+        self.assertEqual(User.objects.filter(username__startswith='syn_').count(), 8)
+
+    def test_clear_keeps_real_data_with_same_prefix(self):
+        real_lamp = Lamp.objects.create(
+            article='SYN-REAL', brand='Real Brand', power_watts=60, color='White', lamp_type='table', price=100,
+        )
+        real_user = User.objects.create_user(username='syn_team')
+        generate(lamps=5, orders=0)
+        generate(lamps=5, orders=0, clear=True)
+        self.assertTrue(Lamp.objects.filter(id=real_lamp.id).exists())
+        self.assertTrue(User.objects.filter(id=real_user.id).exists())
+        self.assertEqual(Lamp.objects.filter(article__startswith='SYN0').count(), 5)
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    def setUp(self):
+        generate(users_per_role=1, orders=5)
+
+    def run_load_test(self, **options):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('load_test', concurrency=1, stdout=out, stderr=err, **options)
+        total = next(line for line in out.getvalue().splitlines() if line.startswith('всего')).split()
+        return total, out.getvalue(), err.getvalue()
+
+    def test_in_process(self):
+        total, out, err = self.run_load_test(requests=40, host='testserver', mix={'browse': 1, 'add_to_cart': 1})
+        self.assertEqual(total[1:3], ['40', '0'], err)
+        self.assertIn('add_to_cart', out)
+        self.assertNotIn('search', out)
+
+    def test_over_http(self):
+        orders = Order.objects.count()
+        total, out, err = self.run_load_test(
+            requests=30, base_url=self.live_server_url, mix={'search': 1, 'add_to_cart': 2, 'checkout': 1},
+        )
+        self.assertEqual(total[1:3], ['30', '0'], err)
+        # Первый виртуальный пользователь - менеджер: вход через форму, POST с CSRF-токеном
+        self.assertIn('checkout', out)
+        self.assertGreater(Order.objects.count(), orders)
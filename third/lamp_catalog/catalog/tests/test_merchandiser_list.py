@@ -0,0 +1,91 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..management.commands.check_query_plans import FULL_SCAN
+from ..models import Lamp, UserProfile
+from ..views import MERCHANDISER_PER_PAGE, MERCHANDISER_SORT_FIELDS
+from decimal import Decimal
+
+
+class MerchandiserProductListTests(TestCase):
+    def setUp(self):
+        self.merchandiser = User.objects.create_user(username='merch', password='merch123')
+        UserProfile.objects.create(user=self.merchandiser, role='merchandiser')
+        self.client = Client()
+        self.client.force_login(self.merchandiser)
+        self.url = reverse('catalog:merchandiser_product_list')
+        for i in range(MERCHANDISER_PER_PAGE + 15):
+            Lamp.objects.create(
+                article=f'ML{i:03d}',
+                brand=f'Brand {i % 7}',
+                power_watts=40 + i,
+                color='White',
+                lamp_type='table' if i % 3 else 'floor',
+                has_dimmer=i % 2 == 0,
+                price=Decimal('100.00') + i % 10,
+                description='Длинное описание ' * 50,
+            )
+
+    def walk(self, params):
+        """Проходит все страницы по курсорам и возвращает артикулы по порядку"""
+        articles = []
+        response = self.client.get(self.url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            articles += [lamp.article for lamp in page]
+            if not page.has_next():
+                return articles
+            response = self.client.get(self.url, dict(params, cursor=page.next_cursor))
+
+    def test_pages_cover_catalog_in_order(self):
+        expected = list(Lamp.objects.order_by('brand', 'id').values_list('article', flat=True))
+        self.assertEqual(self.walk({'sort_by': 'brand'}), expected)
+
+        expected = list(Lamp.objects.order_by('-price', '-id').values_list('article', flat=True))
+        self.assertEqual(self.walk({'sort_by': 'price', 'sort_order': 'desc'}), expected)
+
+        # По умолчанию - новые товары сверху
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context['lamps']), MERCHANDISER_PER_PAGE)
+        self.assertEqual(response.context['lamps'][0].article, f'ML{MERCHANDISER_PER_PAGE + 14:03d}')
+
+    def test_filters_and_search(self):
+        articles = self.walk({'lamp_type': 'floor', 'has_dimmer': '1'})
+        self.assertEqual(set(articles), set(
+            Lamp.objects.filter(lamp_type='floor', has_dimmer=True).values_list('article', flat=True)
+        ))
+        response = self.client.get(self.url, {'search': 'ML007'})
+        self.assertEqual([lamp.article for lamp in response.context['lamps']], ['ML007'])
+        self.assertContains(response, 'format=csv&search=ML007')
+
+    def test_description_is_not_loaded(self):
+        response = self.client.get(self.url)
+        self.assertIn('description', response.context['lamps'][0].get_deferred_fields())
+        self.assertNotContains(response, 'Длинное описание')
+
+    def test_queries_use_indexes(self):
+        tables = set(connection.introspection.table_names())
+        for field in MERCHANDISER_SORT_FIELDS:
+            for order in ('asc', 'desc'):
+                first = self.client.get(self.url, {'sort_by': field, 'sort_order': order})
+                params = {'sort_by': field, 'sort_order': order, 'cursor': first.context['page_obj'].next_cursor}
+                with CaptureQueriesContext(connection) as captured:
+                    self.client.get(self.url, params)
+                for query in captured:
+                    if 'catalog_lamp' not in query['sql']:
+                        continue
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+                        plan = [row[3] for row in cursor.fetchall()]
+                    # Просмотр подзапроса ограниченного подсчета допустим
+                    scans = [
+                        detail for detail in plan
+                        if (match := FULL_SCAN.match(detail)) and match.group(1) in tables
+                    ]
+                    self.assertFalse(scans, (params, plan))
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'broken'}).status_code, 404)
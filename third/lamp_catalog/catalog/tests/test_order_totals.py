@@ -0,0 +1,133 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import Lamp, Cart, CartItem, Order, UserProfile
+from ..pricing import quantize_money
+from decimal import Decimal
+
+
+class OrderSnapshotTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='admin123')
+        UserProfile.objects.create(user=self.admin, role='admin')
+        self.client = Client()
+        self.client.force_login(self.admin)
+        # Роль кэшируется после первого запроса - прогреваем, чтобы сравнивать одинаковые условия
+        self.client.get(reverse('catalog:about'))
+
+        self.lamp = Lamp.objects.create(
+            article='OT001', brand='Test Brand', power_watts=60, color='White', lamp_type='table',
+            price=Decimal('1000.00'),
+            small_wholesale_price=Decimal('900.00'), small_wholesale_quantity=5,
+            large_wholesale_price=Decimal('800.00'), large_wholesale_quantity=10,
+        )
+        # Оптовые уровни заданы не полностью - действует розничная цена
+        self.partial = Lamp.objects.create(
+            article='OT002', brand='Test Brand', power_watts=60, color='White', lamp_type='table',
+            price=Decimal('333.33'),
+            small_wholesale_price=Decimal('300.00'), small_wholesale_quantity=None,
+            large_wholesale_price=Decimal('0.00'), large_wholesale_quantity=2,
+        )
+
+    def create_order(self, *lines):
+        manager = User.objects.create_user(username=f'manager{Order.objects.count()}')
+        cart = Cart.objects.create(user=manager)
+        for lamp, quantity in lines:
+            CartItem.objects.create(cart=cart, lamp=lamp, quantity=quantity)
+        return Order.objects.create_from_cart(cart, manager)
+
+    def test_stored_totals_match_cart(self):
+        for lines in [
+            [(self.lamp, 1)],
+            [(self.lamp, 5), (self.partial, 3)],
+            [(self.lamp, 70)],
+            [(self.lamp, 130), (self.partial, 7)],
+        ]:
+            order = self.create_order(*lines)
+            # Суммы заказа хранятся с точностью до копейки
+            self.assertEqual(order.subtotal, quantize_money(order.cart.get_total_price()))
+            self.assertEqual(order.total, quantize_money(order.cart.get_total_price_with_discount()))
+            self.assertEqual(order.discount, order.subtotal - order.total)
+
+        order = self.create_order((self.lamp, 130), (self.partial, 7))
+        items = list(order.items.all())
+        self.assertEqual([item.price_tier for item in items], ['large_wholesale', 'retail'])
+        self.assertEqual([item.line_total for item in items], [Decimal('104000.00'), Decimal('2333.31')])
+        self.assertEqual(order.total, Decimal('95699.98'))
+
+    def test_price_change_does_not_affect_order(self):
+        order = self.create_order((self.lamp, 5))
+        Lamp.objects.filter(id=self.lamp.id).update(small_wholesale_price=Decimal('500.00'))
+        self.lamp.delete()
+
+        response = self.client.get(reverse('catalog:order_detail', args=[order.id]))
+        self.assertContains(response, 'OT001')
+        self.assertContains(response, 'Мелкий опт')
+        self.assertContains(response, '4500.00 ₽')
+        self.assertEqual(Order.objects.get(id=order.id).total, Decimal('4500.00'))
+
+    def test_checkout_starts_new_cart(self):
+        manager = User.objects.create_user(username='manager', password='manager123')
+        UserProfile.objects.create(user=manager, role='sales_manager')
+        self.client.force_login(manager)
+        self.client.post(reverse('catalog:add_to_cart', args=[self.lamp.id]), {'quantity': 2})
+        response = self.client.post(reverse('catalog:create_order'))
+        order = Order.objects.get(sales_manager=manager)
+        self.assertRedirects(response, reverse('catalog:order_detail', args=[order.id]))
+        self.assertEqual(order.total, Decimal('2000.00'))
+        self.assertEqual(Cart.objects.filter(user=manager).count(), 2)
+
+        # Следующая покупка попадает в новую корзину, а не в оформленный заказ
+        self.client.post(reverse('catalog:add_to_cart', args=[self.partial.id]))
+        self.assertEqual(order.cart.items.count(), 1)
+        response = self.client.get(reverse('catalog:cart_detail'))
+        self.assertEqual([line.lamp for line in response.context['summary'].lines], [self.partial])
+
+    def test_cart_totals_annotation_matches_python(self):
+        orders = [
+            self.create_order((self.lamp, 1)),
+            self.create_order((self.lamp, 5), (self.partial, 3)),
+            self.create_order((self.lamp, 70)),
+            self.create_order((self.lamp, 130), (self.partial, 7)),
+        ]
+        empty = Order.objects.create(cart=None, sales_manager=self.admin)
+        annotated = {order.id: order for order in Order.objects.with_cart_totals()}
+        for order in orders:
+            self.assertEqual(annotated[order.id].cart_subtotal, order.cart.get_total_price())
+            self.assertEqual(annotated[order.id].cart_total, order.cart.get_total_price_with_discount())
+            self.assertEqual(annotated[order.id].total, order.total)
+        self.assertEqual(annotated[empty.id].cart_total, 0)
+
+        # Аннотация считает по текущим ценам, сохраненные суммы не меняются
+        Lamp.objects.filter(id=self.lamp.id).update(price=Decimal('2000.00'))
+        annotated = Order.objects.with_cart_totals().get(id=orders[0].id)
+        self.assertEqual(annotated.cart_subtotal, Decimal('2000.00'))
+        self.assertEqual(annotated.subtotal, Decimal('1000.00'))
+
+    def test_checkout_uses_newest_of_duplicate_active_carts(self):
+        manager = User.objects.create_user(username='manager', password='manager123')
+        UserProfile.objects.create(user=manager, role='sales_manager')
+        Cart.objects.create(user=manager)
+        newest = Cart.objects.create(user=manager)
+        CartItem.objects.create(cart=newest, lamp=self.lamp, quantity=1)
+        self.client.force_login(manager)
+
+        response = self.client.post(reverse('catalog:create_order'))
+        order = Order.objects.get(sales_manager=manager)
+        self.assertRedirects(response, reverse('catalog:order_detail', args=[order.id]))
+        self.assertEqual(order.cart, newest)
+
+    def test_order_list_query_count_is_constant(self):
+        for i in range(3):
+            self.create_order((self.lamp, i + 1))
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(reverse('catalog:order_list'))
+        for i in range(30):
+            self.create_order((self.lamp, i + 1), (self.partial, 2))
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(reverse('catalog:order_list'))
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(len(response.context['orders']), 20)
+        self.assertContains(response, 'Страница 1 из 2')
@@ -0,0 +1,114 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, Client
+from django.urls import reverse
+from ..models import Lamp
+from ..views import LampListView
+from decimal import Decimal
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        # 25 ламп: бренды повторяются, у части ламп нет высоты
+        for i in range(25):
+            Lamp.objects.create(
+                article=f'CUR{i:03d}',
+                brand=f'Brand {i % 4}',
+                has_dimmer=i % 2 == 0,
+                power_watts=40 + i % 5 * 10,
+                height_cm=None if i % 3 == 0 else 20 + i % 7,
+                color='White',
+                lamp_type='table',
+                price=Decimal('100.00') + i % 6,
+            )
+        self.client = Client()
+
+    def walk(self, params):
+        """Проходит все страницы вперед по курсорам и возвращает лампы и ответы"""
+        params = dict(params, pagination='cursor')
+        response = self.client.get(reverse('catalog:lamp_list'), params)
+        lamps, responses = list(response.context['lamps']), [response]
+        while response.context['page_obj'].has_next():
+            params['cursor'] = response.context['page_obj'].next_cursor
+            response = self.client.get(reverse('catalog:lamp_list'), params)
+            lamps.extend(response.context['lamps'])
+            responses.append(response)
+        return lamps, responses
+
+    def assertWalkMatches(self, params, ordering):
+        lamps, responses = self.walk(params)
+        expected = list(Lamp.objects.order_by(*ordering))
+        self.assertEqual(lamps, expected)
+        self.assertEqual(len(responses), 3)
+
+    def test_forward_by_brand(self):
+        self.assertWalkMatches({'sort_by': 'brand'}, ['brand', 'id'])
+
+    def test_forward_by_price_descending(self):
+        self.assertWalkMatches({'sort_by': 'price', 'sort_order': 'desc'}, ['-price', '-id'])
+
+    def test_nullable_height_both_directions(self):
+        self.assertWalkMatches(
+            {'sort_by': 'height_cm'},
+            [F('height_cm').asc(nulls_first=True), 'id'],
+        )
+        self.assertWalkMatches(
+            {'sort_by': 'height_cm', 'sort_order': 'desc'},
+            [F('height_cm').desc(nulls_last=True), '-id'],
+        )
+
+    def test_previous_cursor_returns_previous_page(self):
+        lamps, responses = self.walk({'sort_by': 'color'})
+        last_page = responses[-1].context['page_obj']
+        response = self.client.get(reverse('catalog:lamp_list'), {
+            'sort_by': 'color',
+            'pagination': 'cursor',
+            'cursor': last_page.previous_cursor,
+        })
+        self.assertEqual(list(response.context['lamps']), lamps[10:20])
+        self.assertTrue(response.context['page_obj'].has_previous())
+        self.assertTrue(response.context['page_obj'].has_next())
+
+    def test_cursor_from_other_sort_is_rejected(self):
+        lamps, responses = self.walk({'sort_by': 'brand'})
+        response = self.client.get(reverse('catalog:lamp_list'), {
+            'sort_by': 'price',
+            'pagination': 'cursor',
+            'cursor': responses[0].context['page_obj'].next_cursor,
+        })
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_is_rejected(self):
+        response = self.client.get(reverse('catalog:lamp_list'), {
+            'pagination': 'cursor',
+            'cursor': 'garbage',
+        })
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_page_query_count_does_not_depend_on_depth(self):
+        lamps, responses = self.walk({'sort_by': 'brand'})
+        params = {'sort_by': 'brand', 'pagination': 'cursor',
+                  'cursor': responses[1].context['page_obj'].next_cursor}
+        # Страница, ограниченный подсчет и счетчики фильтров - без OFFSET и полного COUNT(*)
+        cache.clear()
+        with self.assertNumQueries(3):
+            self.client.get(reverse('catalog:lamp_list'), params)
+
+    def test_approximate_count(self):
+        response = self.client.get(reverse('catalog:lamp_list'), {'pagination': 'cursor'})
+        self.assertEqual(response.context['lamp_count'], 25)
+        self.assertTrue(response.context['lamp_count_exact'])
+
+        with mock.patch.object(LampListView, 'count_limit', 20):
+            response = self.client.get(reverse('catalog:lamp_list'), {'pagination': 'cursor'})
+        self.assertEqual(response.context['lamp_count'], 20)
+        self.assertFalse(response.context['lamp_count_exact'])
+        self.assertContains(response, 'Найдено: более 20')
+
+    def test_offset_pagination_is_default(self):
+        response = self.client.get(reverse('catalog:lamp_list'), {'sort_by': 'brand', 'page': 2})
+        self.assertFalse(response.context['cursor_pagination'])
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertContains(response, 'sort_by=brand')
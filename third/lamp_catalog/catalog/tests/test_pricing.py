@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import Lamp, Cart, CartItem, Order, UserProfile
+from ..pricing import summarize_cart, apply_discount
+from decimal import Decimal
+
+
+class CartSummaryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='manager', password='manager123')
+        UserProfile.objects.create(user=self.user, role='sales_manager')
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.cart = Cart.objects.create(user=self.user)
+        # Роль кэшируется после первого запроса - прогреваем, чтобы сравнивать одинаковые условия
+        self.client.get(reverse('catalog:about'))
+
+    def add_lamps(self, count, quantity=1):
+        for i in range(count):
+            lamp = Lamp.objects.create(
+                article=f'PR{Lamp.objects.count():03d}',
+                brand='Test Brand',
+                power_watts=60,
+                color='White',
+                lamp_type='table',
+                price=Decimal('1000.00'),
+                small_wholesale_price=Decimal('900.00'),
+                small_wholesale_quantity=5,
+                large_wholesale_price=Decimal('800.00'),
+                large_wholesale_quantity=10,
+            )
+            CartItem.objects.create(cart=self.cart, lamp=lamp, quantity=quantity)
+
+    def test_summary_matches_model_methods(self):
+        self.add_lamps(2, quantity=5)
+        self.add_lamps(1, quantity=10)
+        summary = summarize_cart(self.cart)
+        self.assertEqual([line.unit_price for line in summary.lines],
+                         [Decimal('900.00'), Decimal('900.00'), Decimal('800.00')])
+        self.assertEqual(summary.subtotal, Decimal('17000.00'))
+        self.assertEqual(summary.subtotal, self.cart.get_total_price())
+        self.assertEqual(summary.total_with_discount, self.cart.get_total_price_with_discount())
+        self.assertFalse(summary.has_discount)
+
+    def test_discount(self):
+        self.add_lamps(1, quantity=100)
+        summary = summarize_cart(self.cart)
+        self.assertEqual(summary.subtotal, Decimal('80000.00'))
+        self.assertEqual(summary.total_with_discount, Decimal('76000.00'))
+        self.assertEqual(summary.discount, Decimal('4000.00'))
+        self.assertTrue(summary.has_discount)
+        self.assertEqual(apply_discount(Decimal('100000')), Decimal('90000'))
+
+    def test_empty_cart(self):
+        self.assertTrue(summarize_cart(self.cart).is_empty)
+        self.assertTrue(summarize_cart(None).is_empty)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(captured)
+
+    def test_cart_page_query_count_is_constant(self):
+        self.add_lamps(3)
+        small = self.count_queries(reverse('catalog:cart_detail'))
+        self.add_lamps(60, quantity=7)
+        self.assertEqual(self.count_queries(reverse('catalog:cart_detail')), small)
+        self.assertContains(self.client.get(reverse('catalog:cart_detail')), '900.00 ₽')
+
+    def test_order_page_query_count_is_constant(self):
+        self.add_lamps(3)
+        small_order = Order.objects.create_from_cart(self.cart, self.user)
+        self.cart = Cart.objects.create(user=self.user)
+        self.add_lamps(60)
+        large_order = Order.objects.create_from_cart(self.cart, self.user)
+        small = self.count_queries(reverse('catalog:order_detail', args=[small_order.id]))
+        self.assertEqual(self.count_queries(reverse('catalog:order_detail', args=[large_order.id])), small)
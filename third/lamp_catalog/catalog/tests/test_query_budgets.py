@@ -0,0 +1,192 @@
+"""
+Бюджеты запросов к базе и времени ответа для каждого адреса catalog/urls.py на объемных данных.
+
+Количество запросов сценария не должно превышать значения из query_budgets.txt (файл хранится
+в репозитории, поэтому его изменение видно в диффе). Время холодного запроса (кэш очищен)
+зависит от машины, поэтому сравнивается с бюджетом сценария, умноженным на
+CATALOG_PERF_TIME_FACTOR, только с CATALOG_PERF_CHECK_TIME=1. Объем данных задается
+переменными окружения; по умолчанию он небольшой, чтобы набор тестов оставался быстрым:
+
+    CATALOG_PERF_LAMPS=100000 CATALOG_PERF_ORDERS=5000 CATALOG_PERF_CHECK_TIME=1 \
+        python manage.py test catalog.tests.test_query_budgets
+
+CATALOG_PERF_REPORT=путь - записать отчет (статус, запросы, запросы из шаблонов, время) для
+сравнения между коммитами; CATALOG_UPDATE_QUERY_BUDGETS=1 - переписать query_budgets.txt
+фактическими значениями.
+"""
+import json
+import os
+from collections import namedtuple
+from pathlib import Path
+from time import perf_counter
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from ..instrumentation import get_view_metrics, reset_view_metrics
+from ..synthetic import generate_carts, generate_lamps, generate_orders, generate_users
+from ..urls import get_urlpatterns
+
+BUDGETS_FILE = Path(__file__).with_name('query_budgets.txt')
+LAMPS = int(os.environ.get('CATALOG_PERF_LAMPS', 2000))
+CART_ITEMS = int(os.environ.get('CATALOG_PERF_CART_ITEMS', 200))
+ORDERS = int(os.environ.get('CATALOG_PERF_ORDERS', 1000))
+ORDER_ITEMS = int(os.environ.get('CATALOG_PERF_ORDER_ITEMS', 50))
+CHECK_TIME = os.environ.get('CATALOG_PERF_CHECK_TIME') == '1'
+TIME_FACTOR = float(os.environ.get('CATALOG_PERF_TIME_FACTOR', 1))
+# Бюджет времени по умолчанию, секунд; рассчитан на 100 тыс. ламп
+DEFAULT_SECONDS = 0.5
+
+Scenario = namedtuple('Scenario', 'name method url role data seconds', defaults=(None, None, DEFAULT_SECONDS))
+Result = namedtuple('Result', 'status queries template_queries seconds')
+
+
+def read_budgets():
+    budgets = {}
+    for line in BUDGETS_FILE.read_text(encoding='utf-8').splitlines():
+        if line.strip() and not line.startswith('#'):
+            name, queries = line.split()
+            budgets[name] = int(queries)
+    return budgets
+
+
+def write_budgets(results):
+    lines = [
+        '# Бюджеты запросов к базе по сценариям catalog/tests/test_query_budgets.py.',
+        '# Обновление: CATALOG_UPDATE_QUERY_BUDGETS=1 python manage.py test catalog.tests.test_query_budgets',
+    ]
+    lines += [f'{name} {result.queries}' for name, result in results.items()]
+    BUDGETS_FILE.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def format_report(results):
+    lines = [f'# {LAMPS} ламп, корзина {CART_ITEMS} позиций, {ORDERS} заказов по {ORDER_ITEMS} позиций',
+             f'{"сценарий":<36} {"статус":>6} {"запросы":>8} {"шаблоны":>8} {"мс":>8}']
+    for name, result in results.items():
+        lines.append(f'{name:<36} {result.status:>6} {result.queries:>8} {result.template_queries:>8} '
+                     f'{result.seconds * 1000:>8.1f}')
+    return '\n'.join(lines) + '\n'
+
+
+# Бюджеты проверяет сам тест; предупреждения middleware о превышении только засоряли бы вывод
+@override_settings(CATALOG_QUERY_BUDGET=float('inf'), CATALOG_LATENCY_BUDGET=float('inf'))
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.lamp_ids = generate_lamps(LAMPS, prefix='PERF')
+        cls.users = {role: users[0] for role, users in generate_users(1, prefix='perf').items()}
+        manager = cls.users['sales_manager']
+        [cls.cart] = generate_carts([manager], cls.lamp_ids, CART_ITEMS)
+        generate_orders([manager], ORDERS, cls.lamp_ids, ORDER_ITEMS)
+        cls.order = manager.order_set.latest('id')
+
+    def get_scenarios(self):
+        lamp_id = self.lamp_ids[len(self.lamp_ids) // 2]
+        item = self.cart.items.order_by('id').first()
+        cart_changes = {'items': [{'lamp': lamp, 'quantity': 3} for lamp in self.lamp_ids[:100]]}
+        csv_rows = ['Артикул,Марка,Цена'] + [f'PERF{index:08d},Imported,990.00' for index in range(100)]
+        reprice = {'lamp_type': 'table', 'price_fields': ['price'], 'mode': 'percent', 'amount': '5'}
+        lamp_form = {'brand': 'Edited', 'power_watts': '60', 'color': 'White', 'lamp_type': 'table', 'price': '990'}
+        return [
+            Scenario('lamp_list', 'GET', reverse('catalog:lamp_list')),
+            Scenario('lamp_list_filtered', 'GET', reverse('catalog:lamp_list') + '?lamp_type=table&has_dimmer=true'
+                     '&min_power=40&max_power=150&sort_by=price&sort_order=desc&page=3'),
+            Scenario('lamp_list_search', 'GET', reverse('catalog:lamp_list') + '?search=Brand+7'),
+            Scenario('lamp_list_grouped', 'GET', reverse('catalog:lamp_list') + '?group_by=color'),
+            Scenario('lamp_list_cursor', 'GET', reverse('catalog:lamp_list') + '?pagination=cursor&sort_by=power_watts'),
+            Scenario('lamp_list_customer', 'GET', reverse('catalog:lamp_list'), 'guest'),
+            Scenario('about', 'GET', reverse('catalog:about')),
+            Scenario('lamp_detail', 'GET', reverse('catalog:lamp_detail', args=[lamp_id])),
+            Scenario('edit_lamp_description', 'GET', reverse('catalog:edit_lamp_description', args=[lamp_id]),
+                     'merchandiser'),
+            Scenario('edit_lamp_description_post', 'POST', reverse('catalog:edit_lamp_description', args=[lamp_id]),
+                     'merchandiser', {'description': 'Новое описание'}),
+            Scenario('cart_detail', 'GET', reverse('catalog:cart_detail'), 'sales_manager'),
+            Scenario('cart_detail_empty', 'GET', reverse('catalog:cart_detail'), 'guest'),
+            Scenario('add_to_cart', 'POST', reverse('catalog:add_to_cart', args=[lamp_id]), 'sales_manager',
+                     {'quantity': 2}),
+            Scenario('update_cart', 'POST', reverse('catalog:update_cart'), 'sales_manager', cart_changes),
+            Scenario('update_cart_item', 'POST', reverse('catalog:update_cart_item', args=[item.id]), 'sales_manager',
+                     {'quantity': 7}),
+            Scenario('remove_from_cart', 'POST', reverse('catalog:remove_from_cart', args=[item.id]), 'sales_manager'),
+            Scenario('create_order', 'POST', reverse('catalog:create_order'), 'sales_manager', seconds=1.0),
+            Scenario('order_list', 'GET', reverse('catalog:order_list') + '?page=5', 'sales_manager'),
+            Scenario('order_list_admin', 'GET', reverse('catalog:order_list'), 'admin'),
+            Scenario('order_detail', 'GET', reverse('catalog:order_detail', args=[self.order.id]), 'sales_manager'),
+            Scenario('api_lamp_list', 'GET', reverse('catalog:api_lamp_list') + '?limit=100&sort_by=price'),
+            Scenario('api_lamp_list_fields', 'GET', reverse('catalog:api_lamp_list') + '?fields=article,price'
+                     '&lamp_type=floor'),
+            Scenario('api_lamp_detail', 'GET', reverse('catalog:api_lamp_detail', args=[lamp_id])),
+            Scenario('metrics', 'GET', reverse('catalog:metrics')),
+            Scenario('merchandiser_product_list', 'GET', reverse('catalog:merchandiser_product_list')
+                     + '?sort_by=price', 'merchandiser'),
+            Scenario('export_lamps', 'GET', reverse('catalog:export_lamps') + '?format=csv', 'merchandiser',
+                     seconds=10.0),
+            Scenario('import_lamps', 'GET', reverse('catalog:import_lamps'), 'merchandiser'),
+            Scenario('import_lamps_post', 'POST', reverse('catalog:import_lamps'), 'merchandiser',
+                     {'file': '\n'.join(csv_rows)}),
+            Scenario('bulk_reprice', 'GET', reverse('catalog:bulk_reprice'), 'merchandiser'),
+            Scenario('bulk_reprice_preview', 'POST', reverse('catalog:bulk_reprice'), 'merchandiser',
+                     dict(reprice, action='preview'), seconds=1.0),
+            Scenario('edit_lamp', 'GET', reverse('catalog:edit_lamp', args=[lamp_id]), 'merchandiser'),
+            Scenario('edit_lamp_post', 'POST', reverse('catalog:edit_lamp', args=[lamp_id]), 'merchandiser',
+                     lamp_form),
+        ]
+
+    def run_scenario(self, scenario):
+        """Холодный запрос в отдельной транзакции, которая откатывается после замера"""
+        with transaction.atomic():
+            cache.clear()
+            client = Client()
+            if scenario.role:
+                client.force_login(self.users[scenario.role])
+            data = scenario.data
+            extra = {}
+            if scenario.name == 'update_cart':
+                data, extra = json.dumps(data), {'content_type': 'application/json'}
+            elif scenario.name == 'import_lamps_post':
+                data = {'file': SimpleUploadedFile('lamps.csv', data['file'].encode())}
+
+            with CaptureQueriesContext(connection) as captured:
+                start = perf_counter()
+                response = getattr(client, scenario.method.lower())(scenario.url, data, **extra)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                seconds = perf_counter() - start
+            template_queries = self.template_queries(response)
+            transaction.set_rollback(True)
+        return Result(response.status_code, len(captured), template_queries, seconds)
+
+    def template_queries(self, response):
+        # Запросы, выполненные при отрисовке шаблонов (N+1 в шаблоне), - из метрик middleware
+        metrics = get_view_metrics().get(response.resolver_match.view_name)
+        return metrics.template_queries if metrics else 0
+
+    def test_every_url_has_scenario(self):
+        covered = {resolve(scenario.url.split('?')[0]).url_name for scenario in self.get_scenarios()}
+        names = {pattern.name for pattern in get_urlpatterns()}
+        self.assertEqual(names - covered, set(), 'Для новых адресов нужны сценарии и бюджеты запросов')
+
+    def test_query_budgets(self):
+        results = {}
+        for scenario in self.get_scenarios():
+            reset_view_metrics()
+            results[scenario.name] = self.run_scenario(scenario)
+
+        if os.environ.get('CATALOG_PERF_REPORT'):
+            Path(os.environ['CATALOG_PERF_REPORT']).write_text(format_report(results), encoding='utf-8')
+        if os.environ.get('CATALOG_UPDATE_QUERY_BUDGETS') == '1':
+            write_budgets(results)
+
+        budgets = read_budgets()
+        for scenario in self.get_scenarios():
+            result = results[scenario.name]
+            with self.subTest(scenario.name):
+                self.assertLess(result.status, 400)
+                self.assertIn(scenario.name, budgets, 'Нет бюджета в query_budgets.txt')
+                self.assertLessEqual(result.queries, budgets[scenario.name], 'Запросов больше бюджета')
+                if CHECK_TIME:
+                    self.assertLessEqual(result.seconds, scenario.seconds * TIME_FACTOR, 'Ответ медленнее бюджета')
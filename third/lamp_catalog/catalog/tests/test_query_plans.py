@@ -0,0 +1,52 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from ..management.commands.check_query_plans import is_full_scan
+from ..models import Lamp
+from decimal import Decimal
+
+
+class QueryPlanTests(TestCase):
+    def setUp(self):
+        for i in range(30):
+            Lamp.objects.create(
+                article=f'QP{i:03d}',
+                brand=f'Brand {i % 5}',
+                has_dimmer=i % 2 == 0,
+                power_watts=40 + i,
+                height_cm=None if i % 4 == 0 else 30 + i,
+                color=['White', 'Black', 'Red'][i % 3],
+                lamp_type=['table', 'floor', 'wall'][i % 3],
+                price=Decimal('100.00') + i,
+                description='Lamp description',
+            )
+
+    def test_catalog_queries_use_indexes(self):
+        out = StringIO()
+        call_command('check_query_plans', '--verbose-plans', stdout=out)
+        self.assertIn('полных просмотров нет', out.getvalue())
+
+
+class FullScanDetectionTests(SimpleTestCase):
+    tables = {'catalog_lamp', 'catalog_lamp_fts'}
+
+    def test_plan_strings(self):
+        plans = {
+            'SCAN catalog_lamp': True,
+            # SQLite до 3.36
+            'SCAN TABLE catalog_lamp': True,
+            'SCAN catalog_lamp USING INDEX lamp_brand_idx': False,
+            'SCAN TABLE catalog_lamp USING INDEX lamp_brand_idx': False,
+            'SCAN TABLE catalog_lamp USING COVERING INDEX lamp_power_idx': False,
+            'SEARCH catalog_lamp USING INDEX lamp_type_price_idx (lamp_type=?)': False,
+            'SEARCH TABLE catalog_lamp USING INTEGER PRIMARY KEY (rowid=?)': False,
+            # Подзапросы с псевдонимом таблицы
+            'SCAN U0': False,
+            'SCAN TABLE catalog_lamp AS U0': False,
+            'SCAN catalog_lamp_fts VIRTUAL TABLE INDEX 0:M1': False,
+            'SCAN TABLE catalog_order': False,
+        }
+        for detail, expected in plans.items():
+            with self.subTest(detail):
+                self.assertIs(is_full_scan(detail, self.tables), expected)
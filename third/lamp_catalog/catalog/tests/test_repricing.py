@@ -0,0 +1,101 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..cache import get_catalog_version
+from ..models import Lamp, UserProfile
+from ..repricing import Repricing, RepricingError, select_lamps
+from decimal import Decimal
+
+
+class RepricingTests(TestCase):
+    def setUp(self):
+        self.lamps = {}
+        for article, brand, lamp_type, power, price, small in [
+            ('RP001', 'Lumen', 'table', 40, '100.05', '90.00'),
+            ('RP002', 'lumen', 'table', 60, '200.00', None),
+            ('RP003', 'Lumen', 'floor', 60, '300.00', '250.00'),
+            ('RP004', 'Other', 'table', 60, '400.00', None),
+            ('RP005', 'Lumen', 'table', 150, '500.00', None),
+        ]:
+            self.lamps[article] = Lamp.objects.create(
+                article=article, brand=brand, power_watts=power, color='White', lamp_type=lamp_type,
+                price=Decimal(price), small_wholesale_price=Decimal(small) if small else None,
+                small_wholesale_quantity=10 if small else None,
+            )
+
+    def prices(self):
+        return {
+            lamp.article: (lamp.price, lamp.small_wholesale_price)
+            for lamp in Lamp.objects.order_by('article')
+        }
+
+    def test_percent_change_applies_to_selection(self):
+        queryset = select_lamps({'brand': 'LUMEN', 'lamp_type': 'table', 'max_power': 100})
+        repricing = Repricing(queryset, ['price', 'small_wholesale_price'], 'percent', '10')
+        updated_at = self.lamps['RP001'].updated_at
+        version = get_catalog_version()
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(repricing.apply(), 2)
+        self.assertEqual(len([query for query in captured if query['sql'].startswith('UPDATE')]), 1)
+
+        prices = self.prices()
+        # 100.05 * 1.1 = 110.055 - округление половины вверх
+        self.assertEqual(prices['RP001'], (Decimal('110.06'), Decimal('99.00')))
+        self.assertEqual(prices['RP002'], (Decimal('220.00'), None))
+        self.assertEqual(prices['RP003'], (Decimal('300.00'), Decimal('250.00')))
+        self.assertEqual(prices['RP004'][0], Decimal('400.00'))
+        self.assertEqual(prices['RP005'][0], Decimal('500.00'))
+        self.assertGreater(Lamp.objects.get(article='RP001').updated_at, updated_at)
+        self.assertNotEqual(get_catalog_version(), version)
+
+    def test_preview_matches_result(self):
+        repricing = Repricing(select_lamps({'brand': 'Lumen'}), ['price', 'small_wholesale_price'], 'absolute', '-0.05')
+        summary = repricing.summary()
+        self.assertEqual(summary['lamps'], 4)
+        self.assertEqual(summary['small_wholesale_price_changed'], 2)
+        self.assertEqual(summary['invalid'], 0)
+        self.assertEqual(summary['new_price_sum'], Decimal('1099.85'))
+        preview = {row['article']: (row['new_price'], row['new_small_wholesale_price']) for row in repricing.preview()}
+
+        repricing.apply(expected_count=summary['lamps'])
+        prices = self.prices()
+        for article, new_prices in preview.items():
+            self.assertEqual(prices[article], new_prices)
+        self.assertEqual(prices['RP004'][0], Decimal('400.00'))
+
+    def test_invalid_result_changes_nothing(self):
+        before = self.prices()
+        repricing = Repricing(select_lamps({}), ['price'], 'absolute', '-150')
+        self.assertEqual(repricing.summary()['invalid'], 1)
+        with self.assertRaises(RepricingError):
+            repricing.apply()
+        with self.assertRaises(RepricingError):
+            Repricing(select_lamps({}), ['price'], 'percent', '5').apply(expected_count=4)
+        self.assertEqual(self.prices(), before)
+
+    def test_view_preview_and_apply(self):
+        merchandiser = User.objects.create_user(username='merch', password='merch123')
+        UserProfile.objects.create(user=merchandiser, role='merchandiser')
+        client = Client()
+        client.force_login(merchandiser)
+        url = reverse('catalog:bulk_reprice')
+        data = {'lamp_type': 'floor', 'price_fields': ['price'], 'mode': 'percent', 'amount': '-10'}
+
+        response = client.post(url, dict(data, action='preview'))
+        self.assertContains(response, '300.00 → 270.00')
+        self.assertEqual(Lamp.objects.get(article='RP003').price, Decimal('300.00'))
+
+        response = client.post(url, dict(data, action='apply', expected_count='1'))
+        self.assertRedirects(response, reverse('catalog:merchandiser_product_list'))
+        self.assertEqual(Lamp.objects.get(article='RP003').price, Decimal('270.00'))
+
+        response = client.post(url, dict(data, amount='-100', action='preview'))
+        self.assertFalse(response.context['form'].is_valid())
+
+        guest = User.objects.create_user(username='guest', password='guest123')
+        UserProfile.objects.create(user=guest, role='guest')
+        client.force_login(guest)
+        self.assertEqual(client.get(url).status_code, 302)
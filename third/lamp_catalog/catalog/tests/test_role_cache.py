@@ -0,0 +1,63 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ..models import UserProfile
+from ..roles import get_user_role
+
+
+class RoleCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='manager', password='manager123')
+        self.profile = UserProfile.objects.create(user=self.user, role='sales_manager')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def profile_queries(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in captured if 'catalog_userprofile' in query['sql']]
+
+    def test_role_is_loaded_once_and_cached(self):
+        # Первый запрос загружает роль, следующие берут ее из кэша
+        self.assertEqual(len(self.profile_queries(reverse('catalog:order_list'))), 1)
+        self.assertEqual(self.profile_queries(reverse('catalog:order_list')), [])
+        self.assertEqual(self.profile_queries(reverse('catalog:cart_detail')), [])
+
+    def test_role_cache_expires(self):
+        # Сброс кэша не доходит до других процессов, поэтому роль хранится ограниченное время
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            self.assertEqual(get_user_role(self.user), 'sales_manager')
+        cache_set.assert_called_once_with(f'catalog:role:{self.user.pk}', 'sales_manager', 60)
+
+    def test_role_change_is_visible_immediately(self):
+        self.client.get(reverse('catalog:order_list'))
+        self.profile.role = 'guest'
+        self.profile.save()
+        response = self.client.get(reverse('catalog:order_list'))
+        self.assertRedirects(response, reverse('catalog:lamp_list'))
+
+        self.profile.role = 'admin'
+        self.profile.save()
+        response = self.client.get(reverse('catalog:lamp_list'))
+        self.assertEqual(response.wsgi_request.role, 'admin')
+
+    def test_user_without_profile(self):
+        user = User.objects.create_user(username='noprofile', password='noprofile123')
+        self.assertEqual(get_user_role(user), '')
+        self.client.force_login(user)
+        response = self.client.get(reverse('catalog:order_list'))
+        self.assertRedirects(response, reverse('catalog:lamp_list'))
+
+        UserProfile.objects.create(user=user, role='sales_manager')
+        self.assertEqual(self.client.get(reverse('catalog:order_list')).status_code, 200)
+
+    def test_anonymous(self):
+        response = Client().get(reverse('catalog:about'))
+        self.assertEqual(response.wsgi_request.role, '')
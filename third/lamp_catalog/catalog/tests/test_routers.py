@@ -0,0 +1,107 @@
+from time import time
+
+from django.contrib.auth.models import User
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from ..models import Lamp, LampType, UserProfile, Cart, CartItem, Order, OrderItem
+from ..routers import PIN_COOKIE, ReplicaPinMiddleware, record_write, request_routing
+from lamp_catalog.database import replica_configs
+from decimal import Decimal
+
+REPLICAS = ['replica1', 'replica2']
+
+
+@override_settings(CATALOG_READ_REPLICAS=REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+    def test_reads_go_to_replicas_only_inside_request(self):
+        self.assertEqual(Lamp.objects.all().db, 'default')
+        with request_routing():
+            self.assertIn(Lamp.objects.all().db, REPLICAS)
+            self.assertIn(LampType.objects.all().db, REPLICAS)
+            # Пользователи, роли, корзины и заказы - только с основной базы
+            self.assertEqual(User.objects.all().db, 'default')
+            for model in (UserProfile, Cart, CartItem, Order, OrderItem):
+                self.assertEqual(model.objects.all().db, 'default', model.__name__)
+            self.assertEqual(Lamp.objects.db_manager().select_for_update().db, 'default')
+        with request_routing(pinned=True):
+            self.assertEqual(Lamp.objects.all().db, 'default')
+
+    def test_write_pins_reads_to_primary(self):
+        execute = lambda sql, params, many, context: None
+        with request_routing() as state:
+            record_write(execute, 'SELECT 1', (), False, {})
+            self.assertFalse(state.wrote)
+            self.assertIn(Lamp.objects.all().db, REPLICAS)
+
+            record_write(execute, '  insert INTO "catalog_cart" ...', (), False, {})
+            self.assertTrue(state.wrote)
+            self.assertEqual(Lamp.objects.all().db, 'default')
+
+    def test_saving_replica_object_writes_to_primary(self):
+        lamp = Lamp(article='R1')
+        lamp._state.db = 'replica1'
+        cart = Cart(user_id=1)
+        cart._state.db = 'default'
+        with request_routing():
+            self.assertEqual(router.db_for_write(Lamp, instance=lamp), 'default')
+            self.assertTrue(router.allow_relation(lamp, cart))
+
+    def test_replica_configs(self):
+        self.assertEqual(replica_configs({}, '.'), {})
+        replicas = replica_configs({'DB_REPLICAS': '/tmp/r1.sqlite3, /tmp/r2.sqlite3'}, '.')
+        self.assertEqual(list(replicas), REPLICAS)
+        self.assertEqual(replicas['replica2']['NAME'], '/tmp/r2.sqlite3')
+        self.assertEqual(replicas['replica1']['TEST'], {'MIRROR': 'default'})
+
+        replicas = replica_configs({'DB_ENGINE': 'postgresql', 'DB_REPLICAS': 'db-r1,db-r2:6432'}, '.')
+        self.assertEqual((replicas['replica1']['HOST'], replicas['replica1']['PORT']), ('db-r1', '5432'))
+        self.assertEqual((replicas['replica2']['HOST'], replicas['replica2']['PORT']), ('db-r2', '6432'))
+
+
+@override_settings(CATALOG_READ_REPLICAS=REPLICAS)
+class ReplicaPinMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.databases_used = []
+
+    def get_response(self, request):
+        self.databases_used.append(Lamp.objects.all().db)
+        return HttpResponse()
+
+    def test_pinning(self):
+        middleware = ReplicaPinMiddleware(self.get_response)
+        response = middleware(self.factory.get('/'))
+        self.assertIn(self.databases_used[-1], REPLICAS)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+        middleware(self.factory.post('/'))
+        self.assertEqual(self.databases_used[-1], 'default')
+
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = str(time() + 5)
+        middleware(request)
+        self.assertEqual(self.databases_used[-1], 'default')
+
+        request.COOKIES[PIN_COOKIE] = str(time() - 1)
+        middleware(request)
+        self.assertIn(self.databases_used[-1], REPLICAS)
+
+
+class ReadYourWritesTests(TestCase):
+    def setUp(self):
+        self.lamp = Lamp.objects.create(article='RW1', brand='Brand', power_watts=40, color='White',
+                                        lamp_type='table', price=Decimal('100.00'))
+        self.user = User.objects.create_user(username='buyer', password='secret')
+        self.client.force_login(self.user)
+
+    def test_write_sets_pin_cookie(self):
+        response = self.client.get(reverse('catalog:lamp_list'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+        response = self.client.post(reverse('catalog:add_to_cart', args=[self.lamp.id]), {'quantity': 2})
+        self.assertEqual(response.status_code, 302)
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertGreater(float(cookie.value), time())
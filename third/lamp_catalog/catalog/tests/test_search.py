@@ -0,0 +1,105 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from ..models import Lamp
+from decimal import Decimal
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.lamp1 = Lamp.objects.create(
+            article='LX-2000',
+            brand='Lumex',
+            power_watts=60,
+            color='White',
+            lamp_type='table',
+            price=Decimal('100.00'),
+            description='Настольная лампа с гибкой ножкой',
+        )
+        self.lamp2 = Lamp.objects.create(
+            article='NV-100',
+            brand='Novotech',
+            power_watts=40,
+            color='Black',
+            lamp_type='floor',
+            price=Decimal('200.00'),
+            description='Совместима с лампами Lumex',
+        )
+        self.lamp3 = Lamp.objects.create(
+            article='AR-300',
+            brand='Arte',
+            power_watts=75,
+            color='Red',
+            lamp_type='wall',
+            price=Decimal('300.00'),
+            description='Бра для спальни',
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('catalog:lamp_list'), dict(params, search=query))
+        return list(response.context['lamps'])
+
+    def test_results_are_ranked(self):
+        # Совпадение в марке важнее совпадения в описании
+        self.assertEqual(self.search('lumex'), [self.lamp1, self.lamp2])
+
+    def test_article_prefix(self):
+        self.assertEqual(self.search('LX'), [self.lamp1])
+        self.assertEqual(self.search('nv-1'), [self.lamp2])
+
+    def test_all_words_required(self):
+        self.assertEqual(self.search('лампа ножкой'), [self.lamp1])
+        self.assertEqual(self.search('лампа спальни'), [])
+
+    def test_explicit_sort_overrides_rank(self):
+        self.assertEqual(self.search('lumex', sort_by='price', sort_order='desc'), [self.lamp2, self.lamp1])
+
+    def test_punctuation_only_query(self):
+        self.assertEqual(self.search('"*'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.lamp3.description = 'Бра для гостиной'
+        self.lamp3.save()
+        self.assertEqual(self.search('гостиной'), [self.lamp3])
+        self.assertEqual(self.search('спальни'), [])
+
+        self.lamp3.delete()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM catalog_lamp_fts')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_rebuild_command(self):
+        # Изменение в обход сигналов не попадает в индекс до перестроения
+        Lamp.objects.filter(pk=self.lamp3.pk).update(description='Бра для кухни')
+        self.assertEqual(self.search('кухни'), [])
+
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('3', out.getvalue())
+        self.assertEqual(self.search('кухни'), [self.lamp3])
+
+    @override_settings(CATALOG_SEARCH_BACKEND='catalog.search.DatabaseSearchBackend')
+    def test_database_backend(self):
+        self.assertEqual(self.search('umex', sort_by='brand'), [self.lamp1, self.lamp2])
+
+    def test_cursor_pagination_over_ranked_results(self):
+        for i in range(12):
+            Lamp.objects.create(
+                article=f'LX-{i:03d}', brand='Generic', power_watts=60, color='White',
+                lamp_type='table', price=Decimal('50.00'),
+                description='Лампа Lumex' if i % 2 else 'Лампа Lumex Lumex',
+            )
+        expected = self.search('lumex')
+        params = {'search': 'lumex', 'pagination': 'cursor'}
+        response = self.client.get(reverse('catalog:lamp_list'), params)
+        found = list(response.context['lamps'])
+        params['cursor'] = response.context['page_obj'].next_cursor
+        response = self.client.get(reverse('catalog:lamp_list'), params)
+        found.extend(response.context['lamps'])
+        self.assertEqual(len(found), 14)
+        self.assertEqual(found[:10], expected)
+        self.assertEqual(len(set(found)), 14)
@@ -1,20 +1,50 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'catalog'
 
-urlpatterns = [
-    path('', views.LampListView.as_view(), name='lamp_list'),
-    path('about/', views.about, name='about'),
-    path('lamp/<int:pk>/', views.LampDetailView.as_view(), name='lamp_detail'),
-    path('lamp/<int:pk>/edit-description/', views.edit_lamp_description, name='edit_lamp_description'),
-    path('cart/', views.cart_detail, name='cart_detail'),
-    path('cart/add/<int:lamp_id>/', views.add_to_cart, name='add_to_cart'),
-    path('cart/update/<int:item_id>/', views.update_cart_item, name='update_cart_item'),
-    path('cart/remove/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
-    path('cart/create-order/', views.create_order, name='create_order'),
-    path('orders/', views.order_list, name='order_list'),
-    path('orders/<int:pk>/', views.order_detail, name='order_detail'),
-    path('merchandiser/products/', views.merchandiser_product_list, name='merchandiser_product_list'),
-    path('merchandiser/products/<int:pk>/edit/', views.edit_lamp, name='edit_lamp'),
-] 
\ No newline at end of file
+
+def get_urlpatterns(async_views=False):
+    """
+    Маршруты приложения. async_views - асинхронные представления списка, карточки,
+    корзины и JSON API (для ASGI); остальные представления общие.
+    """
+    if async_views:
+        lamp_list = views.AsyncLampListView.as_view()
+        lamp_detail = views.AsyncLampDetailView.as_view()
+        cart_detail = views.async_cart_detail
+        api_lamp_list = views.AsyncLampApiView.as_view()
+        api_lamp_detail = views.async_api_lamp_detail
+    else:
+        lamp_list = views.LampListView.as_view()
+        lamp_detail = views.LampDetailView.as_view()
+        cart_detail = views.cart_detail
+        api_lamp_list = views.LampApiView.as_view()
+        api_lamp_detail = views.api_lamp_detail
+
+    return [
+        path('', lamp_list, name='lamp_list'),
+        path('about/', views.about, name='about'),
+        path('lamp/<int:pk>/', lamp_detail, name='lamp_detail'),
+        path('lamp/<int:pk>/edit-description/', views.edit_lamp_description, name='edit_lamp_description'),
+        path('cart/', cart_detail, name='cart_detail'),
+        path('cart/add/<int:lamp_id>/', views.add_to_cart, name='add_to_cart'),
+        path('cart/update/', views.update_cart, name='update_cart'),
+        path('cart/update/<int:item_id>/', views.update_cart_item, name='update_cart_item'),
+        path('cart/remove/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
+        path('cart/create-order/', views.create_order, name='create_order'),
+        path('orders/', views.order_list, name='order_list'),
+        path('orders/<int:pk>/', views.order_detail, name='order_detail'),
+        path('api/lamps/', api_lamp_list, name='api_lamp_list'),
+        path('api/lamps/<int:pk>/', api_lamp_detail, name='api_lamp_detail'),
+        path('metrics/', views.metrics, name='metrics'),
+        path('merchandiser/products/', views.merchandiser_product_list, name='merchandiser_product_list'),
+        path('merchandiser/products/export/', views.export_lamps, name='export_lamps'),
+        path('merchandiser/products/import/', views.import_lamps_upload, name='import_lamps'),
+        path('merchandiser/products/reprice/', views.bulk_reprice, name='bulk_reprice'),
+        path('merchandiser/products/<int:pk>/edit/', views.edit_lamp, name='edit_lamp'),
+    ]
+
+
+urlpatterns = get_urlpatterns(settings.CATALOG_ASYNC_VIEWS)
@@ -1,30 +1,77 @@
+import hashlib
+import json
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, DetailView
-from django.db.models import Q
+from django.db.models import F, Q, Count
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
-from django.http import JsonResponse
-from .models import Lamp, Cart, CartItem, Order, UserProfile
-from .forms import UserRegistrationForm
+from django.views.decorators.http import require_POST
+from django.http import HttpResponse, JsonResponse, Http404, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.utils.decorators import method_decorator
+from django.utils.safestring import mark_safe
+from django.views.generic.base import ContextMixin
+from .models import Lamp, Cart, CartItem, Order
+from .forms import BulkRepriceForm, UserRegistrationForm
+from .api import ApiError, compress, dumps as api_dumps, parse_fields, parse_filters, parse_limit
+from .pagination import KeysetPaginator, KeysetPage, InvalidCursor
+from .filters import FILTER_PARAMS, filter_lamps
+from .facets import aget_facet_counts, build_facets
+from .export import EXPORT_FORMATS, export_rows, iter_export
+from .instrumentation import render_metrics
+from .importer import IMPORT_FORMATS, import_lamps, open_upload
+from .pricing import asummarize_cart, summarize_cart
+from .repricing import REPRICE_FIELDS, RepricingError
+from .roles import aget_user_role, get_user_role
+from . import cache as catalog_cache
+
+ORDERS_PER_PAGE = 20
+# Максимальное количество изменений в одном запросе пакетного обновления корзины
+MAX_CART_CHANGES = 500
+# Границы полей: id ламп - BigAutoField, количество - PositiveIntegerField
+MAX_LAMP_ID = 9223372036854775807
+MAX_CART_QUANTITY = 2147483647
+# Сколько ошибок импорта показывать на странице
+SHOWN_IMPORT_ERRORS = 100
+MERCHANDISER_PER_PAGE = 50
+# Предел подсчета товаров в списке мерчендайзера, чтобы не считать весь каталог
+MERCHANDISER_COUNT_LIMIT = 10000
+# Поля сортировки списка мерчендайзера; у каждого есть индекс с id (см. Lamp.Meta)
+MERCHANDISER_SORT_FIELDS = {
+    'created_at': 'Дата добавления',
+    'article': 'Артикул',
+    'brand': 'Бренд',
+    'lamp_type': 'Тип',
+    'price': 'Цена',
+}
+# Колонки таблицы списка мерчендайзера
+MERCHANDISER_LIST_FIELDS = [
+    'id', 'article', 'brand', 'lamp_type', 'price', 'created_at',
+    'small_wholesale_price', 'small_wholesale_quantity', 'large_wholesale_price', 'large_wholesale_quantity',
+]
 
 def about(request):
     return render(request, 'catalog/about.html')
 
 def has_role(role):
     def check_role(user):
-        try:
-            return user.userprofile.role == role
-        except UserProfile.DoesNotExist:
-            return False
+        return get_user_role(user) == role
     return check_role
 
 def has_role_or_admin(roles):
     def check_role(user):
-        try:
-            return user.userprofile.role in roles or user.userprofile.role == 'admin'
-        except UserProfile.DoesNotExist:
-            return False
+        role = get_user_role(user)
+        return role in roles or role == 'admin'
     return check_role
 
 class LampListView(ListView):
@@ -32,65 +79,259 @@ class LampListView(ListView):
     template_name = 'catalog/lamp_list.html'
     context_object_name = 'lamps'
     paginate_by = 10
+    # Курсорная пагинация включается атрибутом или параметром ?pagination=cursor
+    cursor_pagination = False
+    # Предел для приблизительного подсчета найденных ламп в курсорном режиме
+    count_limit = 1000
+    # Кэширование отрисованного списка и id ламп страницы, см. catalog/cache.py
+    page_cache = True
+    results_template_name = 'catalog/lamp_list_results.html'
+    # Количество ламп у вариантов фильтров, см. catalog/facets.py
+    facet_counts = True
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-        
-        # Получаем параметры фильтрации из GET-запроса
-        lamp_type = self.request.GET.get('lamp_type')
-        has_dimmer = self.request.GET.get('has_dimmer')
-        min_power = self.request.GET.get('min_power')
-        max_power = self.request.GET.get('max_power')
+    sort_fields = ['brand', 'price', 'power_watts', 'height_cm', 'color', 'lamp_type']
+    group_fields = ['lamp_type', 'has_dimmer', 'color']
+
+    def get_ordering(self):
         search_query = self.request.GET.get('search')
-        sort_by = self.request.GET.get('sort_by', 'brand')  # По умолчанию сортируем по бренду
+        # По умолчанию сортируем по бренду, а результаты поиска - по релевантности
+        sort_by = self.request.GET.get('sort_by', '' if search_query else 'brand')
         sort_order = self.request.GET.get('sort_order', 'asc')  # По умолчанию сортируем по возрастанию
         group_by = self.request.GET.get('group_by')  # Параметр для группировки
-        
-        # Применяем фильтры
-        if lamp_type:
-            queryset = queryset.filter(lamp_type=lamp_type)
-        if has_dimmer:
-            queryset = queryset.filter(has_dimmer=True)
-        if min_power:
-            queryset = queryset.filter(power_watts__gte=min_power)
-        if max_power:
-            queryset = queryset.filter(power_watts__lte=max_power)
-        
-        # Применяем поиск
-        if search_query:
-            queryset = queryset.filter(
-                Q(article__icontains=search_query) |
-                Q(brand__icontains=search_query) |
-                Q(description__icontains=search_query)
-            )
-        
-        # Применяем сортировку
-        if sort_by in ['brand', 'price', 'power_watts', 'height_cm', 'color', 'lamp_type']:
+
+        if sort_by in self.sort_fields:
             if sort_order == 'desc':
                 sort_by = f'-{sort_by}'
-            queryset = queryset.order_by(sort_by)
-        
-        # Применяем группировку
-        if group_by in ['lamp_type', 'has_dimmer', 'color']:
-            queryset = queryset.order_by(group_by)
-            # Устанавливаем текущую группу для каждого объекта
-            for lamp in queryset:
-                lamp._current_group = group_by
-        
-        return queryset
+            ordering = [sort_by]
+        elif search_query:
+            ordering = ['search_rank']
+        else:
+            ordering = list(self.model._meta.ordering)
+
+        # При группировке сначала упорядочиваем по группе, внутри группы - по выбранному полю
+        if group_by in self.group_fields:
+            ordering = [group_by] + [field for field in ordering if field.lstrip('-') != group_by]
+        return ordering
+
+    def get_group_by(self):
+        group_by = self.request.GET.get('group_by')
+        return group_by if group_by in self.group_fields else None
+
+    def use_cursor_pagination(self):
+        return self.cursor_pagination or self.request.GET.get('pagination') == 'cursor'
+
+    def get_cache_prefix(self, prefix):
+        # Настройки представления входят в ключ: другой размер страницы - другая запись
+        return f'{prefix}:{self.paginate_by}:{self.count_limit}'
+
+    def get_cache_key(self, prefix):
+        return catalog_cache.make_key(self.get_cache_prefix(prefix), self.request.GET)
+
+    def get_cached_page_state(self):
+        key = self.get_cache_key('ids') if self.page_cache else None
+        cached = cache.get(key) if key else None
+        if key:
+            catalog_cache.record('ids', cached is not None)
+        return key, cached
+
+    def get_page_state(self, paginator, page):
+        """Что нужно для восстановления страницы из кэша (см. restore_page)"""
+        if not self.use_cursor_pagination():
+            state = {'count': paginator.count, 'number': page.number}
+        else:
+            state = {
+                'has_next': page.has_next(),
+                'has_previous': page.has_previous(),
+                'next_cursor': page.next_cursor,
+                'previous_cursor': page.previous_cursor,
+                'preceding_key': page.preceding_key,
+            }
+        state['ids'] = [lamp.id for lamp in page.object_list]
+        return state
+
+    def save_page_state(self, key, paginator, page):
+        if key:
+            cache.set(key, self.get_page_state(paginator, page), catalog_cache.get_timeout())
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def paginate_queryset(self, queryset, page_size):
+        key, cached = self.get_cached_page_state()
+        if cached is not None:
+            return self.restore_page(queryset, page_size, cached, queryset.filter(id__in=cached['ids']))
+
+        if not self.use_cursor_pagination():
+            paginator, page, object_list, is_paginated = super().paginate_queryset(queryset, page_size)
+            page.object_list = list(page.object_list)
+        else:
+            paginator = KeysetPaginator(queryset, self.get_ordering(), page_size)
+            try:
+                page = paginator.page(self.request.GET.get('cursor'))
+            except InvalidCursor as e:
+                raise Http404(str(e))
+        return self.save_page_state(key, paginator, page)
+
+    def restore_page(self, queryset, page_size, state, lamps):
+        """Восстанавливает страницу по закэшированным id: lamps - выборка по первичному ключу"""
+        lamps = {lamp.id: lamp for lamp in lamps}
+        lamps = [lamps[lamp_id] for lamp_id in state['ids'] if lamp_id in lamps]
+        if not self.use_cursor_pagination():
+            paginator = self.get_paginator(queryset, page_size)
+            paginator.count = state['count']
+            page = paginator.page(state['number'])
+            page.object_list = lamps
+        else:
+            paginator = KeysetPaginator(queryset, self.get_ordering(), page_size)
+            page = KeysetPage(
+                lamps, paginator,
+                has_next=state['has_next'],
+                has_previous=state['has_previous'],
+                next_cursor=state['next_cursor'],
+                previous_cursor=state['previous_cursor'],
+                preceding_key=state['preceding_key'],
+            )
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def get_queryset(self):
+        # Фильтры и поиск общие для списка, экспорта и API - см. catalog/filters.py
+        queryset = filter_lamps(self.model._default_manager.all(), self.request.GET)
+        group_by = self.get_group_by()  # Параметр для группировки
+
+        # Применяем группировку: ключ группы вычисляется в запросе
+        if group_by:
+            queryset = queryset.annotate(group_key=F(group_by))
+
+        # Применяем сортировку (после поиска - он добавляет ранг релевантности)
+        return queryset.order_by(*self.get_ordering())
+
+    def get_lamp_groups(self, queryset, page):
+        """
+        Разбивает лампы текущей страницы на группы.
+        Количество ламп в группах считается одним агрегирующим запросом по всей выборке,
+        поэтому заголовки и счетчики верны и для групп, начатых на предыдущей странице.
+        """
+        group_by = self.get_group_by()
+        lamps = list(page.object_list)
+        if not lamps:
+            return []
+        counts = self.get_group_counts(queryset)
+
+        # Есть ли у первой группы страницы лампы на предыдущих страницах
+        first_key = lamps[0].group_key
+        if isinstance(page.paginator, KeysetPaginator):
+            continued = page.preceding_key is not None and \
+                page.preceding_key[0] == page.paginator.row_key(lamps[0])[0]
+        else:
+            offset = 0
+            for key, count in counts:
+                if key == first_key:
+                    break
+                offset += count
+            continued = page.start_index() - 1 > offset
+
+        counts = dict(counts)
+        groups = []
+        for lamp in lamps:
+            if not groups or groups[-1]['key'] != lamp.group_key:
+                groups.append({
+                    'key': lamp.group_key,
+                    'label': Lamp.get_group_display(group_by, lamp.group_key),
+                    'count': counts.get(lamp.group_key, 0),
+                    'continued': not groups and continued,
+                    'lamps': [],
+                })
+            groups[-1]['lamps'].append(lamp)
+        return groups
+
+    def group_counts_queryset(self, queryset):
+        group_by = self.get_group_by()
+        return queryset.order_by(group_by).values_list(group_by).annotate(count=Count('id'))
+
+    def get_group_counts(self, queryset):
+        return list(self.group_counts_queryset(queryset))
+
+    def get_lamp_count(self, paginator):
+        return paginator.approximate_count(self.count_limit)
+
+    def get_facets(self):
+        return build_facets(self.request.GET)
+
+    def get_cached_results(self):
+        """Ключ кэша страниц и отрисованный список из него (None при промахе)"""
+        key = self.get_cache_key('page') if self.page_cache else None
+        results = cache.get(key) if key else None
+        if key:
+            catalog_cache.record('page', results is not None)
+        return key, results
 
     def get_context_data(self, **kwargs):
+        """
+        Список найденных ламп с пагинацией отрисовывается отдельным шаблоном и кэшируется
+        по нормализованным параметрам запроса; при попадании в кэш запросы к лампам не выполняются.
+        """
+        key, results = self.get_cached_results()
+        self.cache_hit = results is not None
+
+        if self.cache_hit:
+            context = ContextMixin.get_context_data(self, **kwargs)
+            context.update(self.get_filter_context())
+            context['lamp_results'] = mark_safe(results)
+            return context
+
         context = super().get_context_data(**kwargs)
-        
+        context.update(self.get_filter_context())
+
+        if self.get_group_by() and context['page_obj'] is not None:
+            context['lamp_groups'] = self.get_lamp_groups(self.object_list, context['page_obj'])
+
+        context['cursor_pagination'] = self.use_cursor_pagination()
+        if context['cursor_pagination'] and self.count_limit:
+            context['lamp_count'], context['lamp_count_exact'] = self.get_lamp_count(context['paginator'])
+
+        context['lamp_results'] = render_to_string(self.results_template_name, context, request=self.request)
+        if key:
+            self.save_results(key, str(context['lamp_results']))
+        return context
+
+    def save_results(self, key, results):
+        cache.set(key, results, catalog_cache.get_timeout())
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if self.page_cache:
+            response['X-Catalog-Cache'] = 'hit' if self.cache_hit else 'miss'
+        return response
+
+    def get_filter_context(self):
+        context = {}
+
         # Добавляем текущие значения фильтров в контекст
         context['current_lamp_type'] = self.request.GET.get('lamp_type', '')
         context['current_has_dimmer'] = self.request.GET.get('has_dimmer', '')
         context['current_min_power'] = self.request.GET.get('min_power', '')
         context['current_max_power'] = self.request.GET.get('max_power', '')
+        context['current_brand'] = self.request.GET.get('brand', '')
+        context['current_color'] = self.request.GET.get('color', '')
         context['current_search'] = self.request.GET.get('search', '')
-        context['current_sort'] = self.request.GET.get('sort_by', 'brand')
+        context['current_sort'] = self.request.GET.get('sort_by', '' if context['current_search'] else 'brand')
         context['current_sort_order'] = self.request.GET.get('sort_order', 'asc')
-        context['current_group'] = self.request.GET.get('group_by', '')
+        context['current_group'] = self.get_group_by() or ''
+
+        # Параметры запроса без номера страницы и курсора - для ссылок пагинации
+        # (в нормализованном виде - ссылки входят в кэшируемый фрагмент)
+        context['query_string'] = urlencode([
+            (name, value) for name, value in catalog_cache.normalize_params(self.request.GET)
+            if name not in ('page', 'cursor')
+        ])
+        # Ссылки на диапазоны мощности заменяют только min_power и max_power
+        context['power_query'] = urlencode([
+            (name, value) for name, value in catalog_cache.normalize_params(self.request.GET)
+            if name not in ('page', 'cursor', 'min_power', 'max_power')
+        ])
+        context['cursor_pagination'] = self.use_cursor_pagination()
+
+        # Количество ламп для вариантов фильтров (кэшируется отдельно от списка)
+        if self.facet_counts:
+            context['facets'] = self.get_facets()
         
         # Добавляем типы ламп в контекст
         context['lamp_types'] = Lamp.TYPE_CHOICES
@@ -114,67 +355,460 @@ class LampListView(ListView):
         
         return context
 
+async def load_user(request):
+    """
+    Загружает пользователя и его роль асинхронно, чтобы шаблоны асинхронных
+    представлений (user, request.role) не обращались к базе синхронно
+    """
+    request.user = await request.auser()
+    await aget_user_role(request.user)
+
+class AsyncLampListView(LampListView):
+    """
+    Список ламп для ASGI: все запросы к базе и кэшу выполняются асинхронно до отрисовки,
+    а методы LampListView получают уже загруженные страницу, счетчики групп и фильтров.
+    Отрисованный список записывается в кэш после отрисовки.
+    """
+
+    def get_cached_results(self):
+        return self.cached_results
+
+    def save_results(self, key, results):
+        self.results_to_save = (key, results)
+
+    async def aget_cache_key(self, prefix):
+        return await catalog_cache.amake_key(self.get_cache_prefix(prefix), self.request.GET)
+
+    async def aget_cached_results(self):
+        key = await self.aget_cache_key('page') if self.page_cache else None
+        results = await cache.aget(key) if key else None
+        if key:
+            await catalog_cache.arecord('page', results is not None)
+        return key, results
+
+    async def aget_cached_page_state(self):
+        key = await self.aget_cache_key('ids') if self.page_cache else None
+        cached = await cache.aget(key) if key else None
+        if key:
+            await catalog_cache.arecord('ids', cached is not None)
+        return key, cached
+
+    async def asave_page_state(self, key, paginator, page):
+        if key:
+            await cache.aset(key, self.get_page_state(paginator, page), catalog_cache.get_timeout())
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def paginate_queryset(self, queryset, page_size):
+        return self.page_result
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        if getattr(self, 'lamp_total', None) is not None:
+            paginator.count = self.lamp_total
+        return paginator
+
+    def get_group_counts(self, queryset):
+        return self.group_counts
+
+    def get_lamp_count(self, paginator):
+        return self.lamp_count
+
+    def get_facets(self):
+        return self.facets
+
+    async def apaginate_queryset(self, queryset, page_size):
+        key, cached = await self.aget_cached_page_state()
+        if cached is not None:
+            lamps = [lamp async for lamp in queryset.filter(id__in=cached['ids'])]
+            return self.restore_page(queryset, page_size, cached, lamps)
+
+        if not self.use_cursor_pagination():
+            self.lamp_total = await queryset.acount()
+            paginator, page, object_list, is_paginated = super(LampListView, self).paginate_queryset(
+                queryset, page_size
+            )
+            page.object_list = [lamp async for lamp in page.object_list]
+        else:
+            paginator = KeysetPaginator(queryset, self.get_ordering(), page_size)
+            try:
+                page = await paginator.apage(self.request.GET.get('cursor'))
+            except InvalidCursor as e:
+                raise Http404(str(e))
+        return await self.asave_page_state(key, paginator, page)
+
+    async def get(self, request, *args, **kwargs):
+        await load_user(request)
+        self.object_list = self.get_queryset()
+        if self.facet_counts:
+            self.facets = build_facets(request.GET, await aget_facet_counts(request.GET))
+
+        self.results_to_save = None
+        self.cached_results = await self.aget_cached_results()
+        if self.cached_results[1] is None:
+            self.page_result = await self.apaginate_queryset(self.object_list, self.paginate_by)
+            paginator, page = self.page_result[:2]
+            if self.get_group_by() and page.object_list:
+                self.group_counts = [row async for row in self.group_counts_queryset(self.object_list)]
+            if self.use_cursor_pagination() and self.count_limit:
+                self.lamp_count = await paginator.aapproximate_count(self.count_limit)
+
+        # Все данные загружены: шаблон отрисовывается здесь же, без перехода в поток
+        response = self.render_to_response(self.get_context_data()).render()
+        if self.results_to_save:
+            await cache.aset(*self.results_to_save, catalog_cache.get_timeout())
+        if self.page_cache:
+            response['X-Catalog-Cache'] = 'hit' if self.cache_hit else 'miss'
+        return response
+
 class LampDetailView(DetailView):
+    """
+    Карточка лампы с условными запросами: ETag строится из id и updated_at лампы
+    (и пользователя - страница содержит его корзину и кнопки по роли), поэтому
+    повторный запрос неизмененной лампы получает 304 без отрисовки.
+    Лампа берется из кэша, характеристики - кэшируемый фрагмент шаблона.
+    """
     model = Lamp
     template_name = 'catalog/lamp_detail.html'
     context_object_name = 'lamp'
 
+    def get_object(self, queryset=None):
+        lamp = catalog_cache.get_lamp(self.kwargs['pk'])
+        if lamp is None:
+            raise Http404('Лампа не найдена')
+        return lamp
+
+    def get_etag(self, lamp):
+        user = self.request.user
+        parts = [lamp.pk, lamp.updated_at.isoformat()]
+        if user.is_authenticated:
+            # Формы страницы содержат CSRF-токен, а вход в систему меняет секрет: копия,
+            # сохраненная до повторного входа, отправила бы устаревший токен и получила 403
+            get_token(self.request)
+            parts += [user.pk, get_user_role(user), self.request.META['CSRF_COOKIE']]
+        return quote_etag(hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return self.get_lamp_response(request)
+
+    def get_lamp_response(self, request):
+        etag = self.get_etag(self.object)
+        # Last-Modified не учитывает пользователя, поэтому отдается только анонимным
+        last_modified = None if request.user.is_authenticated else self.object.updated_at
+
+        # Непоказанные сообщения (например, "Товар добавлен в корзину") требуют полной страницы
+        response = None
+        if not len(messages.get_messages(request)):
+            response = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=int(last_modified.timestamp()) if last_modified else None,
+            )
+        if response is None:
+            context = self.get_context_data(object=self.object)
+            context['fragment_timeout'] = catalog_cache.get_timeout()
+            response = self.render_to_response(context)
+
+        response.headers['ETag'] = etag
+        if last_modified:
+            response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+        patch_cache_control(response, max_age=0, must_revalidate=True, private=request.user.is_authenticated)
+        return response
+
+class AsyncLampDetailView(LampDetailView):
+    """
+    Карточка лампы для ASGI: лампа, пользователь и роль загружаются асинхронно. Шаблон
+    отрисовывается в потоке: тег {% cache %} обращается к кэшу синхронно.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        await load_user(request)
+        self.object = await catalog_cache.aget_lamp(self.kwargs['pk'])
+        if self.object is None:
+            raise Http404('Лампа не найдена')
+        response = self.get_lamp_response(request)
+        if hasattr(response, 'render'):
+            await sync_to_async(response.render)()
+        return response
+
+class LampApiView(LampListView):
+    """
+    JSON API каталога (только чтение): те же фильтры и сортировка, что у списка ламп,
+    курсорная пагинация, выбор полей (?fields=article,price) и размер страницы (?limit=).
+    Строки читаются через values() без создания моделей; готовое тело ответа
+    кэшируется по параметрам и версии каталога, ответ сжимается (см. catalog/api.py).
+    """
+    cursor_pagination = True
+    page_cache = True
+    facet_counts = False
+
+    def get_cache_prefix(self, prefix):
+        return f'{prefix}:{self.paginate_by}:{",".join(self.fields)}'
+
+    def get_api_paginator(self):
+        paginator = KeysetPaginator(self.get_queryset(), self.get_ordering(), self.paginate_by)
+        # Ключи сортировки нужны для курсора, но в ответ попадают только запрошенные поля
+        key_fields = [field for field, descending in paginator.keys if field not in self.fields]
+        paginator.queryset = paginator.queryset.values(*self.fields, *key_fields)
+        return paginator
+
+    def get_page_data(self, page):
+        query = [
+            (name, value) for name, value in catalog_cache.normalize_params(self.request.GET)
+            if name != 'cursor'
+        ]
+        query += [(name, self.request.GET[name]) for name in ('fields', 'limit') if self.request.GET.get(name)]
+
+        def link(cursor):
+            return f'{self.request.path}?{urlencode(query + [("cursor", cursor)])}' if cursor else None
+
+        return {
+            'results': [{field: row[field] for field in self.fields} for row in page.object_list],
+            'next': link(page.next_cursor),
+            'previous': link(page.previous_cursor),
+        }
+
+    def parse_params(self, request):
+        parse_filters(request.GET)
+        self.fields = parse_fields(request.GET.get('fields'))
+        self.paginate_by = parse_limit(request.GET.get('limit'))
+
+    def get_cached_body(self):
+        key = self.get_cache_key('api')
+        body = cache.get(key)
+        catalog_cache.record('api', body is not None)
+        return key, body
+
+    def make_response(self, request, body, cache_hit):
+        etag = quote_etag(hashlib.md5(body).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+            response['X-Catalog-Cache'] = 'hit' if cache_hit else 'miss'
+        response.headers['ETag'] = etag
+        return response
+
+    @method_decorator(compress)
+    def get(self, request, *args, **kwargs):
+        try:
+            self.parse_params(request)
+        except ApiError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        key, body = self.get_cached_body()
+        cache_hit = body is not None
+        if not cache_hit:
+            try:
+                page = self.get_api_paginator().page(request.GET.get('cursor'))
+            except InvalidCursor as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            body = api_dumps(self.get_page_data(page))
+            cache.set(key, body, catalog_cache.get_timeout())
+        return self.make_response(request, body, cache_hit)
+
+class AsyncLampApiView(LampApiView):
+    """JSON API каталога для ASGI: страница читается асинхронным ORM, кэш - асинхронно"""
+
+    async def aget_cached_body(self):
+        key = await catalog_cache.amake_key(self.get_cache_prefix('api'), self.request.GET)
+        body = await cache.aget(key)
+        await catalog_cache.arecord('api', body is not None)
+        return key, body
+
+    @method_decorator(compress)
+    async def get(self, request, *args, **kwargs):
+        try:
+            self.parse_params(request)
+        except ApiError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        key, body = await self.aget_cached_body()
+        cache_hit = body is not None
+        if not cache_hit:
+            try:
+                page = await self.get_api_paginator().apage(request.GET.get('cursor'))
+            except InvalidCursor as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            body = api_dumps(self.get_page_data(page))
+            await cache.aset(key, body, catalog_cache.get_timeout())
+        return self.make_response(request, body, cache_hit)
+
+@compress
+def api_lamp_detail(request, pk):
+    """Одна лампа в JSON с теми же полями, что и в списке API"""
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+    except ApiError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    lamp = Lamp.objects.filter(pk=pk).values(*fields).first()
+    if lamp is None:
+        return JsonResponse({'error': 'Лампа не найдена'}, status=404)
+    return HttpResponse(api_dumps(lamp), content_type='application/json')
+
+@compress
+async def async_api_lamp_detail(request, pk):
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+    except ApiError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    lamp = await Lamp.objects.filter(pk=pk).values(*fields).afirst()
+    if lamp is None:
+        return JsonResponse({'error': 'Лампа не найдена'}, status=404)
+    return HttpResponse(api_dumps(lamp), content_type='application/json')
+
+def metrics(request):
+    """
+    Метрики для Prometheus (см. catalog.instrumentation). Доступны только с адресов
+    CATALOG_METRICS_ALLOWED_IPS; за прокси REMOTE_ADDR - адрес прокси, и доступ к /metrics/
+    нужно закрыть на нем.
+    """
+    if request.META.get('REMOTE_ADDR') not in settings.CATALOG_METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def parse_quantity(value, minimum):
+    """Количество из формы; ValueError, если это не целое число в границах PositiveIntegerField"""
+    quantity = int(value)
+    if not minimum <= quantity <= MAX_CART_QUANTITY:
+        raise ValueError(value)
+    return quantity
+
 @login_required
 def add_to_cart(request, lamp_id):
     lamp = get_object_or_404(Lamp, id=lamp_id)
-    quantity = int(request.POST.get('quantity', 1))
+    try:
+        quantity = parse_quantity(request.POST.get('quantity', 1), 1)
+    except ValueError:
+        messages.error(request, f'Количество должно быть целым числом от 1 до {MAX_CART_QUANTITY}')
+        return redirect('catalog:lamp_detail', pk=lamp_id)
 
-    cart, created = Cart.objects.get_or_create(user=request.user)
-    cart_item, created = CartItem.objects.get_or_create(
-        cart=cart,
-        lamp=lamp,
-        defaults={'quantity': quantity}
-    )
-    if not created:
-        cart_item.quantity += quantity
-        cart_item.save()
+    cart = Cart.objects.get_active(request.user)
+    cart.add_item(lamp.id, quantity)
     messages.success(request, 'Товар добавлен в корзину')
     return redirect('catalog:lamp_detail', pk=lamp_id)
 
 @login_required
 def cart_detail(request):
-    cart, created = Cart.objects.get_or_create(user=request.user)
-    return render(request, 'catalog/cart_detail.html', {'cart': cart})
+    cart = Cart.objects.get_active(request.user)
+    return render(request, 'catalog/cart_detail.html', {'cart': cart, 'summary': summarize_cart(cart)})
+
+@login_required
+async def async_cart_detail(request):
+    await load_user(request)
+    cart = await Cart.objects.aget_active(request.user)
+    summary = await asummarize_cart(cart)
+    return render(request, 'catalog/cart_detail.html', {'cart': cart, 'summary': summary})
+
+def active_cart_items(user, item_id):
+    """Позиция текущей корзины пользователя в виде выборки, для изменения одним запросом"""
+    return CartItem.objects.filter(id=item_id, cart__user=user, cart__order__isnull=True)
 
 @login_required
 def update_cart_item(request, item_id):
-    cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
-    quantity = int(request.POST.get('quantity', 1))
-    
+    try:
+        quantity = parse_quantity(request.POST.get('quantity', 1), 0)
+    except ValueError:
+        messages.error(request, f'Количество должно быть целым числом от 0 до {MAX_CART_QUANTITY}')
+        return redirect('catalog:cart_detail')
+    items = active_cart_items(request.user, item_id)
+
     if quantity > 0:
-        cart_item.quantity = quantity
-        cart_item.save()
+        changed = items.update(quantity=quantity)
     else:
-        cart_item.delete()
+        changed, deleted = items.delete()
+    if not changed:
+        raise Http404('Позиция корзины не найдена')
     
     return redirect('catalog:cart_detail')
 
 @login_required
 def remove_from_cart(request, item_id):
-    cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
-    cart_item.delete()
+    deleted, by_model = active_cart_items(request.user, item_id).delete()
+    if not deleted:
+        raise Http404('Позиция корзины не найдена')
     messages.success(request, 'Товар удален из корзины')
     return redirect('catalog:cart_detail')
 
+def is_integer_in_range(value, minimum, maximum):
+    """JSON-число без дробной части в границах поля; true/false в JSON - не числа"""
+    return isinstance(value, int) and not isinstance(value, bool) and minimum <= value <= maximum
+
+def parse_cart_changes(body):
+    """
+    Разбирает тело пакетного обновления корзины:
+    {"items": [{"lamp": 1, "quantity": 5}, {"article": "A-100", "quantity": 0}, ...]}
+    Возвращает ({lamp_id: количество}, ошибки). Лампа может быть указана по id или по артикулу.
+    """
+    try:
+        data = json.loads(body)
+        items = data['items']
+    except (ValueError, TypeError, KeyError):
+        return {}, ['Ожидается JSON вида {"items": [{"lamp": id, "quantity": n}]}']
+    if not isinstance(items, list) or not items:
+        return {}, ['Список изменений пуст']
+    if len(items) > MAX_CART_CHANGES:
+        return {}, [f'Не более {MAX_CART_CHANGES} изменений за один запрос']
+
+    errors = []
+    changes = []
+    for index, item in enumerate(items):
+        quantity = item.get('quantity') if isinstance(item, dict) else None
+        if not is_integer_in_range(quantity, 0, MAX_CART_QUANTITY):
+            errors.append(f'Позиция {index}: количество должно быть целым числом от 0 до {MAX_CART_QUANTITY}')
+            continue
+        if 'lamp' in item:
+            if is_integer_in_range(item['lamp'], 1, MAX_LAMP_ID):
+                changes.append(('id', item['lamp'], quantity))
+            else:
+                errors.append(f'Позиция {index}: lamp должен быть целым положительным id')
+        elif isinstance(item.get('article'), str):
+            changes.append(('article', item['article'], quantity))
+        else:
+            errors.append(f'Позиция {index}: укажите lamp (id) или article')
+
+    # Все лампы ищутся одним запросом
+    ids = {value for key, value, quantity in changes if key == 'id'}
+    articles = {value for key, value, quantity in changes if key == 'article'}
+    found = Lamp.objects.filter(Q(id__in=ids) | Q(article__in=articles)).values_list('id', 'article')
+    by_id = {lamp_id: lamp_id for lamp_id, article in found}
+    by_article = {article: lamp_id for lamp_id, article in found}
+
+    quantities = {}
+    for key, value, quantity in changes:
+        lamp_id = by_id.get(value) if key == 'id' else by_article.get(value)
+        if lamp_id is None:
+            errors.append(f'Лампа не найдена: {value}')
+        else:
+            quantities[lamp_id] = quantity
+    return quantities, errors
+
 @login_required
-@user_passes_test(lambda u: u.userprofile.role in ['sales_manager', 'admin'])
+@require_POST
+def update_cart(request):
+    """
+    Пакетное изменение корзины: все количества применяются в одной транзакции,
+    в ответе - пересчитанные позиции и суммы. При ошибках корзина не меняется.
+    """
+    quantities, errors = parse_cart_changes(request.body)
+    if errors:
+        return JsonResponse({'errors': errors}, status=400)
+
+    cart = Cart.objects.get_active(request.user)
+    cart.set_quantities(quantities)
+    return JsonResponse(summarize_cart(cart).as_dict())
+
+@login_required
+@user_passes_test(has_role_or_admin(['sales_manager']))
 def create_order(request):
-    cart = get_object_or_404(Cart, user=request.user)
+    cart = Cart.objects.get_active(request.user)
     if not cart.items.exists():
         messages.error(request, 'Корзина пуста')
         return redirect('catalog:cart_detail')
     
-    # Создаем заказ
-    order = Order.objects.create(cart=cart, sales_manager=request.user)
+    # Создаем заказ, цены и суммы фиксируются в позициях заказа
+    order = Order.objects.create_from_cart(cart, request.user)
     
     # Создаем новую корзину для пользователя
-    new_cart = Cart.objects.create(user=request.user)
-    
     Cart.objects.create(user=request.user)
     
     messages.success(request, 'Заказ успешно создан')
@@ -182,30 +816,34 @@ def create_order(request):
 
 @login_required
 def order_detail(request, pk):
-    order = get_object_or_404(Order, id=pk)
-    if not (request.user == order.sales_manager or request.user.userprofile.role == 'admin'):
+    order = get_object_or_404(Order.objects.select_related('sales_manager'), id=pk)
+    if not (request.user == order.sales_manager or request.role == 'admin'):
         messages.error(request, 'У вас нет доступа к этому заказу')
         return redirect('catalog:lamp_list')
     
-    return render(request, 'catalog/order_detail.html', {'order': order})
+    return render(request, 'catalog/order_detail.html', {'order': order, 'items': order.items.all()})
 
 @login_required
 def order_list(request):
-    if request.user.userprofile.role == 'admin':
+    if request.role == 'admin':
         orders = Order.objects.all().order_by('-created_at')
-    elif request.user.userprofile.role == 'sales_manager':
+    elif request.role == 'sales_manager':
         orders = Order.objects.filter(sales_manager=request.user).order_by('-created_at')
     else:
         messages.error(request, 'У вас нет доступа к списку заказов')
         return redirect('catalog:lamp_list')
-    return render(request, 'catalog/order_list.html', {'orders': orders})
+
+    # Суммы хранятся в заказе, менеджер загружается тем же запросом
+    orders = orders.select_related('sales_manager')
+    page_obj = Paginator(orders, ORDERS_PER_PAGE).get_page(request.GET.get('page'))
+    return render(request, 'catalog/order_list.html', {'orders': page_obj.object_list, 'page_obj': page_obj})
 
 @login_required
 def edit_lamp_description(request, pk):
     lamp = get_object_or_404(Lamp, id=pk)
 
     if request.method == 'POST':
-        if not (request.user.userprofile.role in ['merchandiser', 'admin']):
+        if request.role not in ['merchandiser', 'admin']:
             return JsonResponse({'error': 'Permission denied'}, status=403)
         lamp.description = request.POST.get('description', '')
         lamp.save()
@@ -228,8 +866,128 @@ def register(request):
 @login_required
 @user_passes_test(has_role_or_admin(['merchandiser']))
 def merchandiser_product_list(request):
-    lamps = Lamp.objects.all().order_by('-created_at')
-    return render(request, 'catalog/merchandiser_product_list.html', {'lamps': lamps})
+    """
+    Список товаров для мерчендайзера: фильтры каталога, сортировка и курсорная пагинация.
+    Загружаются только колонки, которые показывает таблица (без описания).
+    """
+    sort_by = request.GET.get('sort_by')
+    if sort_by not in MERCHANDISER_SORT_FIELDS:
+        sort_by = 'created_at'
+    # Новые товары по умолчанию сверху, остальные поля - по возрастанию
+    sort_order = request.GET.get('sort_order') or ('desc' if sort_by == 'created_at' else 'asc')
+    ordering = [f'-{sort_by}' if sort_order == 'desc' else sort_by]
+
+    queryset = filter_lamps(Lamp.objects.only(*MERCHANDISER_LIST_FIELDS), request.GET, rank=False)
+    paginator = KeysetPaginator(queryset, ordering, MERCHANDISER_PER_PAGE)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor as e:
+        raise Http404(str(e))
+    lamp_count, lamp_count_exact = paginator.approximate_count(MERCHANDISER_COUNT_LIMIT)
+
+    filter_params = [(name, request.GET[name]) for name in FILTER_PARAMS if request.GET.get(name)]
+    return render(request, 'catalog/merchandiser_product_list.html', {
+        'lamps': page.object_list,
+        'page_obj': page,
+        'lamp_count': lamp_count,
+        'lamp_count_exact': lamp_count_exact,
+        'lamp_types': Lamp.TYPE_CHOICES,
+        'sort_fields': MERCHANDISER_SORT_FIELDS.items(),
+        'current_sort': sort_by,
+        'current_sort_order': sort_order,
+        'current_filters': dict(filter_params),
+        # Фильтры - для выгрузки; фильтры и сортировка - для ссылок пагинации
+        'filter_query': urlencode(filter_params),
+        'query_string': urlencode(filter_params + [('sort_by', sort_by), ('sort_order', sort_order)]),
+    })
+
+@login_required
+@user_passes_test(has_role_or_admin(['merchandiser']))
+def export_lamps(request):
+    """
+    Потоковая выгрузка каталога в CSV или XLSX (?format=xlsx) с фильтрами списка ламп.
+    Файл формируется по мере чтения порций из базы и не собирается в памяти целиком.
+    """
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f'Неизвестный формат: {export_format}'}, status=400)
+
+    content_type, extension = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        iter_export(export_format, export_rows(request.GET)),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="lamps.{extension}"'
+    return response
+
+@login_required
+@user_passes_test(has_role_or_admin(['merchandiser']))
+def import_lamps_upload(request):
+    """
+    Загрузка ламп из CSV или JSONL. Файл читается потоком и загружается порциями;
+    строки с ошибками пропускаются и перечисляются в отчете.
+    """
+    context = {'formats': IMPORT_FORMATS}
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        import_format = request.POST.get('format') or (
+            'jsonl' if upload and upload.name.endswith(('.jsonl', '.ndjson')) else 'csv'
+        )
+        if not upload:
+            messages.error(request, 'Выберите файл для загрузки')
+        elif import_format not in IMPORT_FORMATS:
+            messages.error(request, f'Неизвестный формат: {import_format}')
+        else:
+            try:
+                result = import_lamps(open_upload(upload), import_format)
+            except UnicodeDecodeError:
+                messages.error(request, 'Файл должен быть в кодировке UTF-8')
+            else:
+                context['result'] = result
+                context['errors'] = result.errors[:SHOWN_IMPORT_ERRORS]
+    return render(request, 'catalog/import_lamps.html', context)
+
+@login_required
+@user_passes_test(has_role_or_admin(['merchandiser']))
+def bulk_reprice(request):
+    """
+    Массовое изменение цен: лампы выбираются фильтрами, сначала показывается предпросмотр
+    (количество, суммы и первые строки с новыми ценами), затем цены записываются одним UPDATE.
+    """
+    form = BulkRepriceForm(request.POST or None)
+    context = {'form': form}
+    if request.method == 'POST' and form.is_valid():
+        repricing = form.get_repricing()
+        if request.POST.get('action') == 'apply':
+            expected_count = request.POST.get('expected_count')
+            try:
+                updated = repricing.apply(int(expected_count) if expected_count else None)
+            except (RepricingError, ValueError) as e:
+                messages.error(request, str(e))
+            else:
+                messages.success(request, f'Цены обновлены у {updated} товаров')
+                return redirect('catalog:merchandiser_product_list')
+
+        summary = repricing.summary()
+        fields = dict(REPRICE_FIELDS)
+        context.update({
+            'summary': summary,
+            'preview': [
+                {'row': row, 'prices': [(row[field], row[f'new_{field}']) for field in repricing.fields]}
+                for row in repricing.preview()
+            ],
+            'price_changes': [
+                {
+                    'name': field,
+                    'label': fields[field],
+                    'changed': summary[f'{field}_changed'],
+                    'old_sum': summary[f'{field}_sum'],
+                    'new_sum': summary[f'new_{field}_sum'],
+                }
+                for field in repricing.fields
+            ],
+        })
+    return render(request, 'catalog/bulk_reprice.html', context)
 
 @login_required
 @user_passes_test(has_role_or_admin(['merchandiser']))
@@ -0,0 +1,117 @@
+"""
+Настройки базы данных из переменных окружения.
+
+DB_ENGINE=sqlite (по умолчанию) - файл DB_NAME (db.sqlite3 рядом с manage.py).
+С DB_SQLITE_TUNED=1 при подключении включаются WAL (читатели не ждут писателя),
+synchronous=NORMAL (без fsync на каждую транзакцию, в WAL это безопасно при сбое процесса)
+и mmap. Транзакции начинаются с BEGIN IMMEDIATE, а занятая база ожидается до
+DB_SQLITE_BUSY_TIMEOUT секунд, поэтому параллельные записи встают в очередь, а не падают
+с "database is locked". Режим WAL сохраняется в самом файле базы и создает рядом файлы
+-wal и -shm, поэтому он включается явно - для рабочей базы, а не для db.sqlite3 из репозитория.
+
+DB_ENGINE=postgresql - сервер DB_HOST:DB_PORT, база DB_NAME, пользователь DB_USER/DB_PASSWORD.
+DB_POOL=1 включает пул соединений psycopg (DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE), иначе
+соединения постоянные (DB_CONN_MAX_AGE секунд) с проверкой перед повторным использованием.
+Нужен psycopg (psycopg[binary,pool] из requirements.txt).
+
+Поиск по каталогу на SQLite идет по индексу FTS5 (миграция 0006 создает его только там),
+на других СУБД - подстрокой, см. search_backend().
+
+DB_REPLICAS - реплики только для чтения через запятую: пути к файлам SQLite или хосты
+PostgreSQL (host или host:port), остальные настройки - как у основной базы. Они становятся
+базами replica1, replica2, ... и используются catalog.routers.ReplicaRouter. Локально
+реплики SQLite обновляются командой sync_sqlite_replicas.
+"""
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+
+SQLITE_BUSY_TIMEOUT = 20
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+CONN_MAX_AGE = 60
+POOL_MIN_SIZE = 2
+POOL_MAX_SIZE = 10
+SEARCH_BACKENDS = {
+    'django.db.backends.sqlite3': 'catalog.search.SQLiteFTSBackend',
+}
+DEFAULT_SEARCH_BACKEND = 'catalog.search.DatabaseSearchBackend'
+
+
+def _flag(env, name, default):
+    return env.get(name, '1' if default else '0').lower() in ('1', 'true', 'yes', 'on')
+
+
+def sqlite_config(env, base_dir):
+    config = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': env.get('DB_NAME') or Path(base_dir) / 'db.sqlite3',
+        'CONN_MAX_AGE': int(env.get('DB_CONN_MAX_AGE', CONN_MAX_AGE)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+    if _flag(env, 'DB_SQLITE_TUNED', False):
+        mmap_size = int(env.get('DB_SQLITE_MMAP_SIZE', SQLITE_MMAP_SIZE))
+        config['OPTIONS'] = {
+            'timeout': float(env.get('DB_SQLITE_BUSY_TIMEOUT', SQLITE_BUSY_TIMEOUT)),
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f'PRAGMA mmap_size={mmap_size};'
+            ),
+        }
+    return config
+
+
+def postgresql_config(env):
+    config = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': env.get('DB_NAME', 'lamp_catalog'),
+        'USER': env.get('DB_USER', ''),
+        'PASSWORD': env.get('DB_PASSWORD', ''),
+        'HOST': env.get('DB_HOST', 'localhost'),
+        'PORT': env.get('DB_PORT', '5432'),
+        'OPTIONS': {},
+    }
+    if _flag(env, 'DB_POOL', False):
+        # Пул psycopg сам проверяет и переиспользует соединения; CONN_MAX_AGE с ним несовместим
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': int(env.get('DB_POOL_MIN_SIZE', POOL_MIN_SIZE)),
+            'max_size': int(env.get('DB_POOL_MAX_SIZE', POOL_MAX_SIZE)),
+        }
+    else:
+        config['CONN_MAX_AGE'] = int(env.get('DB_CONN_MAX_AGE', CONN_MAX_AGE))
+        config['CONN_HEALTH_CHECKS'] = True
+    return config
+
+
+def database_config(env, base_dir):
+    """Настройки базы 'default' по переменным окружения env"""
+    engine = env.get('DB_ENGINE', 'sqlite')
+    if engine == 'sqlite':
+        return sqlite_config(env, base_dir)
+    if engine == 'postgresql':
+        return postgresql_config(env)
+    raise ImproperlyConfigured(f'Неизвестный DB_ENGINE: {engine} (ожидается sqlite или postgresql)')
+
+
+def search_backend(config):
+    """Поисковый бэкенд каталога (CATALOG_SEARCH_BACKEND) для базы с настройками config"""
+    return SEARCH_BACKENDS.get(config['ENGINE'], DEFAULT_SEARCH_BACKEND)
+
+
+def replica_configs(env, base_dir):
+    """Настройки реплик replica1, replica2, ... по переменной DB_REPLICAS"""
+    locations = [location.strip() for location in env.get('DB_REPLICAS', '').split(',') if location.strip()]
+    replicas = {}
+    for index, location in enumerate(locations, 1):
+        if env.get('DB_ENGINE', 'sqlite') == 'postgresql':
+            host, _, port = location.partition(':')
+            overrides = {'DB_HOST': host, 'DB_PORT': port or env.get('DB_PORT', '5432')}
+        else:
+            overrides = {'DB_NAME': location}
+        config = database_config({**env, **overrides}, base_dir)
+        # В тестах реплика - та же тестовая база, иначе она была бы пустой
+        config['TEST'] = {'MIRROR': 'default'}
+        replicas[f'replica{index}'] = config
+    return replicas
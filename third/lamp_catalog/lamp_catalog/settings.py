@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database import database_config, replica_configs, search_backend
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,10 +45,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'catalog.middleware.RequestMetricsMiddleware',
+    'catalog.routers.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'catalog.middleware.RoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -54,7 +60,9 @@ ROOT_URLCONF = 'lamp_catalog.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Шаблоны Django с замером времени отрисовки (см. catalog/instrumentation.py)
+        'BACKEND': 'catalog.instrumentation.InstrumentedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -73,14 +81,19 @@ WSGI_APPLICATION = 'lamp_catalog.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# Задается переменными окружения DB_*, см. lamp_catalog/database.py
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(os.environ, BASE_DIR),
+    **replica_configs(os.environ, BASE_DIR),
 }
 
+# Чтения каталога - с реплик (DB_REPLICAS), записи - на основную базу (см. catalog/routers.py)
+DATABASE_ROUTERS = ['catalog.routers.ReplicaRouter']
+CATALOG_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# Сколько секунд после записи пользователь читает с основной базы
+CATALOG_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -127,3 +140,34 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = 'catalog:lamp_list'
 LOGOUT_REDIRECT_URL = 'login'
 LOGIN_URL = 'login'
+
+# Catalog search backend (see catalog/search.py): FTS5 on SQLite, substring search elsewhere
+CATALOG_SEARCH_BACKEND = search_backend(DATABASES['default'])
+
+# Кэш страниц каталога (см. catalog/cache.py). В продакшене с несколькими процессами
+# нужен общий бэкенд (Redis, Memcached), иначе инвалидация не дойдет до других процессов
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lamp-catalog',
+    }
+}
+CATALOG_CACHE_TIMEOUT = 300
+# Роли пользователей в кэше (см. catalog/roles.py), секунд
+CATALOG_ROLE_CACHE_TIMEOUT = 60
+
+# Асинхронные варианты представлений каталога, корзины и API (см. catalog/urls.py).
+# Включаются в lamp_catalog/asgi.py; под WSGI остаются синхронные представления.
+# Асинхронные представления обращаются к кэшу через cache.aget/aset и с общим кэшем
+# (Redis, Memcached) не блокируют цикл событий
+CATALOG_ASYNC_VIEWS = os.environ.get('CATALOG_ASYNC_VIEWS') == '1'
+
+# Метрики запросов по представлениям (см. catalog/instrumentation.py): отдаются в формате
+# Prometheus по адресу /metrics/ только с перечисленных адресов. Запросы сверх бюджета
+# (запросов к базе или секунд) пишутся в журнал catalog.instrumentation с повторяющимся SQL;
+# CATALOG_VIEW_BUDGETS задает бюджеты отдельных представлений, например
+# {'catalog:cart_detail': {'queries': 10, 'seconds': 0.2}}
+CATALOG_METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+CATALOG_QUERY_BUDGET = 30
+CATALOG_LATENCY_BUDGET = 0.5
+CATALOG_VIEW_BUDGETS = {}